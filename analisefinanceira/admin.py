@@ -1,9 +1,11 @@
 from django.contrib import admin
+
+from core.admin import FiltroAutocomplete, ListagemGrandeMixin
 from .models import AnaliseFinanceira
 
 
 @admin.register(AnaliseFinanceira)
-class AnaliseFinanceiraAdmin(admin.ModelAdmin):
+class AnaliseFinanceiraAdmin(ListagemGrandeMixin, admin.ModelAdmin):
     """
     Configuração do admin para AnaliseFinanceira.
     """
@@ -12,10 +14,9 @@ class AnaliseFinanceiraAdmin(admin.ModelAdmin):
         'preco_venda_sugerido', 'lucro_previsto', 'margem_lucro_formatada',
         'created_at'
     ]
-    list_filter = [
-        'created_at', 'produto__usuario', 'custo_total_producao',
-        'preco_venda_sugerido', 'lucro_previsto'
-    ]
+    # Sem filtros pelos valores decimais: cada análise tem valores próprios
+    # e a lista de opções teria uma entrada por linha
+    list_filter = ['created_at', ('produto__usuario', FiltroAutocomplete)]
     search_fields = [
         'produto__nome', 'produto__descricao',
         'produto__usuario__username', 'produto__usuario__nome_comercial'
@@ -25,6 +26,7 @@ class AnaliseFinanceiraAdmin(admin.ModelAdmin):
         'custo_total_formatado', 'preco_venda_formatado', 'lucro_formatado',
         'faturamento_formatado', 'created_at'
     ]
+    autocomplete_fields = ['produto']
     fieldsets = (
         ('Produto', {
             'fields': ('produto',)
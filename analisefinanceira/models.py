@@ -112,11 +112,15 @@ class AnaliseFinanceira(models.Model):
         """Retorna o faturamento formatado com símbolo de moeda"""
         return f"R$ {self.faturamento_previsto:.2f}"
 
-    def save(self, *args, **kwargs):
-        """Override do save para calcular automaticamente o custo total"""
+    def calcular_custo_total(self):
+        """Soma os custos no custo total (também usado antes de bulk_create)"""
         self.custo_total_producao = (
             self.custo_ingredientes + 
             self.custo_despesas_fixas + 
             self.custo_despesas_variaveis
         )
+
+    def save(self, *args, **kwargs):
+        """Override do save para calcular automaticamente o custo total"""
+        self.calcular_custo_total()
         super().save(*args, **kwargs)
@@ -52,6 +52,8 @@ class AnaliseFinanceiraViewSet(viewsets.ModelViewSet):
         Retorna apenas as análises financeiras do usuário logado.
         Inclui otimizações de consulta para melhor performance.
         """
+        if getattr(self, 'swagger_fake_view', False):
+            return AnaliseFinanceira.objects.none()
         return AnaliseFinanceira.objects.filter(
             produto__usuario=self.request.user
         ).select_related(
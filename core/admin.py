@@ -0,0 +1,175 @@
+"""
+Recursos compartilhados pelos admins das tabelas grandes.
+
+- PaginadorContagemEstimada: nas listagens sem filtro, usa a estimativa de
+  linhas mantida pelo banco em vez de um COUNT(*) na tabela inteira.
+- FiltroAutocomplete: filtro lateral por chave estrangeira com busca
+  (select2, o mesmo do autocomplete_fields), que não carrega a tabela
+  relacionada inteira como lista de opções.
+- ListagemGrandeMixin: reúne os dois e desliga a contagem total extra.
+- AcoesEmLoteMixin: executa as ações sobre a seleção em lote, em segundo
+  plano quando a seleção é grande, só sobre registros do próprio usuário
+  (ou de qualquer um, para superusuários).
+"""
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from . import tarefas
+
+
+def contagem_estimada(modelo, using='default'):
+    """
+    Número aproximado de linhas da tabela do modelo segundo as estatísticas
+    do banco (PostgreSQL: pg_class; MySQL: information_schema; SQLite:
+    sqlite_stat1, preenchida pelo ANALYZE). None se não houver estimativa.
+    """
+    conexao = connections[using]
+    tabela = modelo._meta.db_table
+    with conexao.cursor() as cursor:
+        if conexao.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)', [tabela])
+        elif conexao.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [tabela],
+            )
+        elif conexao.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [tabela])
+        else:
+            return None
+        linha = cursor.fetchone()
+
+    if linha is None or linha[0] is None:
+        return None
+    # No SQLite, o primeiro número de `stat` é a quantidade de linhas
+    estimativa = int(str(linha[0]).split()[0]) if conexao.vendor == 'sqlite' else int(linha[0])
+    # PostgreSQL devolve -1 para tabelas nunca analisadas
+    return estimativa if estimativa >= 0 else None
+
+
+class PaginadorContagemEstimada(Paginator):
+    """
+    Paginator que, para querysets sem filtro, usa a contagem estimada da
+    tabela quando ela passa de ADMIN_CONTAGEM_ESTIMADA_MINIMO linhas. Com
+    filtros (busca, filtros laterais, date_hierarchy) a contagem é exata.
+    Como a estimativa pode divergir do total real, as últimas páginas podem
+    vir vazias ou faltar.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet) and not self.object_list.query.where:
+            estimativa = contagem_estimada(self.object_list.model, self.object_list.db)
+            if estimativa is not None and estimativa >= settings.ADMIN_CONTAGEM_ESTIMADA_MINIMO:
+                return estimativa
+        return super().count
+
+
+class FiltroAutocomplete(admin.RelatedFieldListFilter):
+    """
+    Filtro por chave estrangeira com campo de busca. Só o valor selecionado
+    é consultado; as opções vêm da view de autocomplete do admin, que usa o
+    search_fields do admin do modelo relacionado. Uso:
+    list_filter = [('produto', FiltroAutocomplete)].
+    """
+    template = 'admin/filtro_autocomplete.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.url_autocomplete = reverse(f'{model_admin.admin_site.name}:autocomplete')
+        # A view de autocomplete valida o campo de origem da relação
+        self.app_label = field.model._meta.app_label
+        self.model_name = field.model._meta.model_name
+        self.field_name = field.name
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def has_output(self):
+        return True
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        alvo = field.target_field
+        selecionados = field.related_model._default_manager.filter(
+            **{f'{alvo.attname}__in': self.lookup_val}
+        )
+        return [(getattr(obj, alvo.attname), str(obj)) for obj in selecionados]
+
+    def choices(self, changelist):
+        self.consulta = changelist.get_query_string(
+            remove=[self.lookup_kwarg, self.lookup_kwarg_isnull]
+        )
+        yield from super().choices(changelist)
+
+
+class ListagemGrandeMixin:
+    """ModelAdmin de tabela grande: contagem estimada e filtros com busca"""
+    paginator = PaginadorContagemEstimada
+    # Evita o segundo COUNT(*) (da tabela inteira) quando há filtro
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        return (
+            super().media
+            + AutocompleteSelect(None, self.admin_site).media
+            + forms.Media(js=['admin/js/autocomplete.js', 'core/js/filtro_autocomplete.js'])
+        )
+
+
+class AcoesEmLoteMixin:
+    """
+    Ações do admin sobre muitos registros. A operação recebe o queryset
+    selecionado e grava em lote, em uma transação; seleções com mais de
+    ADMIN_ACAO_LIMITE_SINCRONO registros vão para uma tarefa em segundo plano
+    (ver core/tarefas.py).
+
+    Como nos formulários (has_change_permission com o objeto), quem não é
+    superusuário só altera os próprios registros, identificados por
+    campo_usuario: a ação é recusada se a seleção tiver registros de outros.
+    """
+    campo_usuario = 'usuario'
+
+    def executar_em_lote(self, request, queryset, operacao, *args, descricao, validar=None):
+        """
+        Executa operacao(queryset, *args) e retorna o resultado, ou agenda a
+        operação e retorna None se a seleção for grande. Retorna None, com
+        uma mensagem de erro, se a seleção tiver registros de outros usuários.
+
+        validar(queryset, *args) roda antes, sempre na requisição, para que
+        o ValidationError chegue ao usuário mesmo quando a operação vai para
+        segundo plano.
+        """
+        if not request.user.is_superuser:
+            de_outros = queryset.exclude(**{self.campo_usuario: request.user}).count()
+            if de_outros:
+                self.message_user(
+                    request,
+                    f'{descricao}: {de_outros} registro(s) selecionado(s) pertencem a outros '
+                    'usuários. Selecione apenas os seus.',
+                    messages.ERROR,
+                )
+                return None
+        if validar is not None:
+            validar(queryset, *args)
+
+        quantidade = queryset.count()
+        if quantidade > settings.ADMIN_ACAO_LIMITE_SINCRONO:
+            tarefas.agendar(operacao, queryset.all(), *args, descricao=descricao)
+            self.message_user(
+                request,
+                f'{descricao}: {quantidade} registro(s) em processamento em segundo plano.',
+                messages.INFO,
+            )
+            return None
+        return operacao(queryset, *args)
@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    verbose_name = 'Núcleo'
+
+    def ready(self):
+        """
+        Liga a medição das consultas SQL e da serialização usada pelas
+        métricas por endpoint (ver metricas.py) e o registro de consultas
+        lentas (ver consultas_lentas.py).
+        """
+        from . import consultas_lentas, metricas
+        metricas.instalar()
+        consultas_lentas.instalar()
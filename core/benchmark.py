@@ -0,0 +1,324 @@
+"""
+Benchmark dos endpoints da API com orçamento de consultas.
+
+Cada cenário é uma requisição (endpoint, método, parâmetros) feita pelo
+cliente de testes do Django, passando por todos os middlewares, com o JWT de
+um comerciante gerado por GeradorDadosSinteticos (ver dados_sinteticos.py).
+Os conjuntos de dados têm três tamanhos (TAMANHOS); o comerciante medido é
+o primeiro de cada conjunto, e os demais só aumentam as tabelas.
+
+Para cada cenário são medidos os percentis da latência (após as requisições
+de aquecimento), a quantidade de consultas SQL e o pico de memória alocada
+durante a requisição (tracemalloc, em uma execução à parte, já que o
+rastreamento deixa a requisição mais lenta).
+
+O cache de respostas (core/respostas.py) fica desligado nos cenários, para
+que meçam as views; os cenários ".cache" medem as mesmas requisições com ele
+ligado, servidas do cache a partir do aquecimento.
+
+comparar() confronta um resultado com a linha de base gravada: latência
+(p95) e memória podem crescer até a tolerância; a quantidade de consultas é
+um orçamento e não pode crescer.
+
+medir_json() compara, à parte, o renderer e o parser JSON do DRF com os de
+core/json_rapido.py em uma página de análises financeiras.
+"""
+import io
+import json
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from analisefinanceira.models import AnaliseFinanceira
+from analisefinanceira.serializers import AnaliseFinanceiraListSerializer
+from produtos.models import Produto
+from .dados_sinteticos import GeradorDadosSinteticos
+from .json_rapido import JSONParserRapido, JSONRendererRapido
+
+
+PREFIXO = 'benchmark'
+
+# Parâmetros do GeradorDadosSinteticos para cada tamanho
+TAMANHOS = {
+    'pequeno': {
+        'comerciantes': 1, 'ingredientes': 30, 'despesas_fixas': 5, 'despesas_variaveis': 3,
+        'produtos': 10, 'anos': 1, 'analises_por_mes': 2,
+    },
+    'medio': {
+        'comerciantes': 2, 'ingredientes': 150, 'despesas_fixas': 10, 'despesas_variaveis': 6,
+        'produtos': 60, 'anos': 3, 'analises_por_mes': 4,
+    },
+    'grande': {
+        'comerciantes': 3, 'ingredientes': 400, 'despesas_fixas': 25, 'despesas_variaveis': 10,
+        'produtos': 150, 'anos': 5, 'analises_por_mes': 8,
+    },
+}
+
+PERCENTIS = (50, 95, 99)
+
+
+@dataclass
+class Cenario:
+    """Uma requisição medida; `caminho` e `corpo` recebem o contexto do conjunto"""
+    nome: str
+    caminho: object
+    metodo: str = 'get'
+    corpo: object = None
+    cache_respostas: bool = False
+
+
+CENARIOS = [
+    Cenario('produtos.list', lambda c: '/api/produtos/'),
+    Cenario('produtos.list.ultima_pagina', lambda c: f'/api/produtos/?page={c["paginas"]["produtos"]}'),
+    Cenario('produtos.search', lambda c: f'/api/produtos/search/?q={c["termo_produto"]}'),
+    Cenario('produtos.stats', lambda c: '/api/produtos/stats/'),
+    Cenario('produtos.calcular', lambda c: f'/api/produtos/{c["produto"]}/calcular/'),
+    Cenario('produtos.custos', lambda c: '/api/produtos/custos/'),
+    Cenario('ingredientes.list', lambda c: '/api/ingredientes/'),
+    Cenario('ingredientes.search', lambda c: f'/api/ingredientes/search/?q={c["termo_ingrediente"]}'),
+    Cenario('ingredientes.stats', lambda c: '/api/ingredientes/stats/'),
+    Cenario('despesas_fixas.list', lambda c: '/api/despesas-fixas/'),
+    Cenario('despesas_fixas.estatisticas', lambda c: '/api/despesas-fixas/estatisticas/'),
+    Cenario('despesas_variaveis.estatisticas', lambda c: '/api/despesas-variaveis/estatisticas/'),
+    Cenario('analises.list', lambda c: '/api/analises-financeiras/'),
+    Cenario(
+        'analises.list.ultima_pagina',
+        lambda c: f'/api/analises-financeiras/?page={c["paginas"]["analises"]}',
+    ),
+    Cenario('analises.stats', lambda c: '/api/analises-financeiras/stats/'),
+    Cenario('analises.relatorio', lambda c: f'/api/analises-financeiras/{c["analises"][0]}/relatorio/'),
+    Cenario(
+        'analises.comparar', lambda c: '/api/analises-financeiras/comparar/',
+        metodo='post', corpo=lambda c: {'analises_ids': c['analises']},
+    ),
+    Cenario('produtos.stats.cache', lambda c: '/api/produtos/stats/', cache_respostas=True),
+    Cenario(
+        'produtos.calcular.cache', lambda c: f'/api/produtos/{c["produto"]}/calcular/',
+        cache_respostas=True,
+    ),
+    Cenario('ingredientes.stats.cache', lambda c: '/api/ingredientes/stats/', cache_respostas=True),
+    Cenario(
+        'despesas_fixas.estatisticas.cache', lambda c: '/api/despesas-fixas/estatisticas/',
+        cache_respostas=True,
+    ),
+]
+
+
+@dataclass
+class ResultadoCenario:
+    latencias: list = field(default_factory=list)
+    consultas: int = 0
+    memoria_pico: int = 0
+    status: int = 0
+
+    def percentil(self, percentil):
+        """Percentil pelo método do posto mais próximo, em milissegundos"""
+        ordenadas = sorted(self.latencias)
+        posicao = max(math.ceil(percentil / 100 * len(ordenadas)) - 1, 0)
+        return ordenadas[posicao] * 1000
+
+    def como_dict(self):
+        dados = {f'p{percentil}_ms': round(self.percentil(percentil), 3) for percentil in PERCENTIS}
+        dados.update({
+            'media_ms': round(sum(self.latencias) / len(self.latencias) * 1000, 3),
+            'consultas': self.consultas,
+            'memoria_pico_kb': round(self.memoria_pico / 1024, 1),
+            'status': self.status,
+        })
+        return dados
+
+
+def _paginas(quantidade, tamanho_pagina=20):
+    return max(math.ceil(quantidade / tamanho_pagina), 1)
+
+
+def preparar(tamanho, semente=42, tamanho_lote=5000):
+    """
+    Gera o conjunto de dados do tamanho e retorna o contexto dos cenários.
+    Deve rodar dentro de uma transação desfeita ao final.
+    """
+    gerador = GeradorDadosSinteticos(
+        prefixo=f'{PREFIXO}_{tamanho}', semente=semente, tamanho_lote=tamanho_lote,
+        data_final=timezone.now().date(), **TAMANHOS[tamanho],
+    )
+    gerador.gerar()
+    usuario = gerador.usuarios()[0]
+    produtos = usuario.produtos.order_by('pk')
+    ingrediente = usuario.ingredientes.order_by('pk').first()
+    analises = list(
+        AnaliseFinanceira.objects.filter(produto__usuario=usuario)
+        .order_by('pk').values_list('pk', flat=True)[:5]
+    )
+    return {
+        'usuario': usuario,
+        'produto': produtos.first().pk,
+        'termo_produto': produtos.first().nome.split()[0],
+        'termo_ingrediente': ingrediente.nome.split()[0],
+        'analises': analises,
+        'paginas': {
+            'produtos': _paginas(produtos.count()),
+            'analises': _paginas(AnaliseFinanceira.objects.filter(produto__usuario=usuario).count()),
+        },
+    }
+
+
+def medir(contexto, cenarios=CENARIOS, repeticoes=20, aquecimento=2):
+    """Mede os cenários com o usuário do contexto; retorna nome -> dict"""
+    token = RefreshToken.for_user(contexto['usuario']).access_token
+    cliente = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+    resultados = {}
+    for cenario in cenarios:
+        caminho = cenario.caminho(contexto)
+        corpo = cenario.corpo(contexto) if cenario.corpo else None
+
+        def requisitar():
+            if corpo is None:
+                return getattr(cliente, cenario.metodo)(caminho)
+            return getattr(cliente, cenario.metodo)(caminho, corpo, content_type='application/json')
+
+        resultado = ResultadoCenario()
+        with override_settings(CACHE_RESPOSTAS_HABILITADO=cenario.cache_respostas):
+            for _ in range(aquecimento):
+                requisitar()
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                with CaptureQueriesContext(connection) as consultas:
+                    response = requisitar()
+                resultado.latencias.append(time.perf_counter() - inicio)
+                resultado.consultas = max(resultado.consultas, len(consultas))
+                resultado.status = response.status_code
+
+            tracemalloc.start()
+            try:
+                requisitar()
+                resultado.memoria_pico = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        resultados[cenario.nome] = resultado.como_dict()
+    return resultados
+
+
+def executar(tamanhos, repeticoes=20, aquecimento=2, semente=42, progresso=None):
+    """Prepara cada tamanho e mede todos os cenários; retorna o relatório"""
+    relatorio = {
+        'gerado_em': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'banco': connection.vendor,
+        'semente': semente,
+        'repeticoes': repeticoes,
+        'tamanhos': {},
+    }
+    # O cliente de testes usa o host "testserver"
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for tamanho in tamanhos:
+            contexto = preparar(tamanho, semente=semente)
+            relatorio['tamanhos'][tamanho] = medir(contexto, repeticoes=repeticoes, aquecimento=aquecimento)
+            if progresso:
+                progresso(tamanho, relatorio['tamanhos'][tamanho])
+    return relatorio
+
+
+def comparar(relatorio, linha_de_base, tolerancia=0.25):
+    """
+    Regressões do relatório em relação à linha de base, como textos. Só os
+    tamanhos e cenários presentes nos dois são comparados.
+    """
+    regressoes = []
+    for tamanho, cenarios in relatorio['tamanhos'].items():
+        base_tamanho = linha_de_base.get('tamanhos', {}).get(tamanho, {})
+        for nome, atual in cenarios.items():
+            base = base_tamanho.get(nome)
+            if base is None:
+                continue
+            if atual['status'] != base['status']:
+                regressoes.append(f'{tamanho}/{nome}: status {atual["status"]} (base {base["status"]})')
+            if atual['consultas'] > base['consultas']:
+                regressoes.append(
+                    f'{tamanho}/{nome}: {atual["consultas"]} consultas (orçamento {base["consultas"]})'
+                )
+            for metrica in ('p95_ms', 'memoria_pico_kb'):
+                if base[metrica] and atual[metrica] > base[metrica] * (1 + tolerancia):
+                    regressoes.append(
+                        f'{tamanho}/{nome}: {metrica} {atual[metrica]} '
+                        f'(base {base[metrica]}, +{(atual[metrica] / base[metrica] - 1) * 100:.0f}%)'
+                    )
+    return regressoes
+
+
+def pagina_analises(linhas=1000):
+    """Página paginada de `linhas` análises em memória, já serializada"""
+    agora = timezone.now()
+    produtos = [Produto(pk=numero, nome=f'Pão de Mel Nº {numero}') for numero in range(1, 51)]
+    analises = []
+    for numero in range(1, linhas + 1):
+        custo = Decimal(numero % 997) + Decimal('12.35')
+        preco = (custo * Decimal('1.45')).quantize(Decimal('0.01'))
+        analises.append(AnaliseFinanceira(
+            pk=numero, produto=produtos[numero % len(produtos)], custo_total_producao=custo,
+            preco_venda_sugerido=preco, lucro_previsto=(preco - custo) * 30,
+            created_at=agora - timedelta(minutes=numero, microseconds=numero * 137),
+        ))
+    return {
+        'count': linhas,
+        'next': 'http://testserver/api/analises-financeiras/?page=2',
+        'previous': None,
+        'results': AnaliseFinanceiraListSerializer(analises, many=True).data,
+    }
+
+
+def _mediana_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return round(statistics.median(tempos) * 1000, 3)
+
+
+def medir_json(linhas=1000, repeticoes=50):
+    """
+    Mediana, em ms, da renderização e do parse de pagina_analises() com as
+    classes do DRF e com as de json_rapido; `identico` indica se as duas
+    saídas têm os mesmos bytes.
+    """
+    pagina = pagina_analises(linhas)
+    renderers = {'drf': JSONRenderer(), 'rapido': JSONRendererRapido()}
+    parsers = {'drf': JSONParser(), 'rapido': JSONParserRapido()}
+    saidas = {nome: renderer.render(pagina) for nome, renderer in renderers.items()}
+    corpo = saidas['drf']
+    return {
+        'linhas': linhas,
+        'bytes': len(corpo),
+        'identico': saidas['drf'] == saidas['rapido'],
+        'renderizacao_ms': {
+            nome: _mediana_ms(lambda renderer=renderer: renderer.render(pagina), repeticoes)
+            for nome, renderer in renderers.items()
+        },
+        'parse_ms': {
+            nome: _mediana_ms(lambda parser=parser: parser.parse(io.BytesIO(corpo)), repeticoes)
+            for nome, parser in parsers.items()
+        },
+    }
+
+
+def ler(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def gravar(relatorio, caminho):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
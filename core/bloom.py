@@ -0,0 +1,57 @@
+"""
+Filtro de Bloom: conjunto probabilístico em memória.
+
+Responde se um valor "talvez está" ou "com certeza não está" no conjunto,
+com uma taxa de falsos positivos escolhida e sem falsos negativos. Usado
+como pré-filtro de consultas ao banco (ver usuarios/revogacao.py): quando o
+filtro diz que o valor não está, a consulta é dispensada.
+"""
+import hashlib
+import math
+
+
+class FiltroBloom:
+    """
+    Filtro para `capacidade` valores com taxa de falsos positivos
+    `taxa_falsos_positivos`. Acima da capacidade a taxa real cresce; use
+    `cheio` para saber quando reconstruí-lo. Não permite remoções.
+    """
+
+    def __init__(self, capacidade, taxa_falsos_positivos=0.001):
+        capacidade = max(int(capacidade), 1)
+        self.capacidade = capacidade
+        self.bits = max(int(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2), 8)
+        self.funcoes = max(round(self.bits / capacidade * math.log(2)), 1)
+        self.quantidade = 0
+        self._dados = bytearray((self.bits + 7) // 8)
+
+    def _posicoes(self, valor):
+        # Duas funções de hash combinadas geram as k posições (Kirsch-Mitzenmacher)
+        resumo = hashlib.blake2b(str(valor).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(resumo[:8], 'little')
+        h2 = int.from_bytes(resumo[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.funcoes))
+
+    def adicionar(self, valor):
+        """Inclui o valor; valores repetidos não contam para a capacidade"""
+        novo = False
+        for posicao in self._posicoes(valor):
+            mascara = 1 << (posicao & 7)
+            if not self._dados[posicao >> 3] & mascara:
+                self._dados[posicao >> 3] |= mascara
+                novo = True
+        if novo:
+            self.quantidade += 1
+
+    def __contains__(self, valor):
+        return all(
+            self._dados[posicao >> 3] & (1 << (posicao & 7))
+            for posicao in self._posicoes(valor)
+        )
+
+    def __len__(self):
+        return self.quantidade
+
+    @property
+    def cheio(self):
+        return self.quantidade >= self.capacidade
@@ -0,0 +1,326 @@
+"""
+Suporte a operações em lote (criação, atualização e remoção) para os ViewSets.
+
+A unicidade de (usuario, nome) é verificada para o lote inteiro em uma única
+consulta e a escrita é feita com bulk_create/bulk_update, evitando o custo de
+uma requisição (e de várias consultas) por registro.
+
+alterar_ativa faz o mesmo para ativar ou desativar despesas (ações do admin).
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .signals import dados_alterados
+
+
+MENSAGEM_NOME_REPETIDO_NO_LOTE = 'Este nome aparece mais de uma vez no lote.'
+
+
+def usuario_do_contexto(context):
+    """
+    Retorna o usuário dono dos registros do lote.
+    Aceita um usuário explícito no contexto (importações, comandos) ou o
+    usuário autenticado da requisição.
+    """
+    if context.get('usuario') is not None:
+        return context['usuario']
+    return context['request'].user
+
+
+def validar_nomes_unicos(model, usuario, nomes, mensagem, excluir_ids=(), ignorar_caixa=True):
+    """
+    Verifica, em uma única consulta, se os nomes do lote já existem para o
+    usuário e se há nomes repetidos dentro do próprio lote.
+    Com ignorar_caixa=True a comparação não diferencia maiúsculas de
+    minúsculas, como as restrições únicas em (usuario, Lower(nome)) dos modelos.
+
+    Retorna uma lista de erros alinhada à lista de nomes recebida.
+    """
+    normalizar = str.lower if ignorar_caixa else str
+    erros = [{} for _ in nomes]
+    vistos = set()
+    for indice, nome in enumerate(nomes):
+        if not nome:
+            continue
+        chave = normalizar(nome)
+        if chave in vistos:
+            erros[indice] = {'nome': [MENSAGEM_NOME_REPETIDO_NO_LOTE]}
+        vistos.add(chave)
+
+    if not vistos:
+        return erros
+
+    queryset = model.objects.filter(usuario=usuario).exclude(pk__in=excluir_ids)
+    if ignorar_caixa:
+        queryset = queryset.annotate(nome_normalizado=Lower('nome')).filter(
+            nome_normalizado__in=vistos
+        ).values_list('nome_normalizado', flat=True)
+    else:
+        queryset = queryset.filter(nome__in=vistos).values_list('nome', flat=True)
+    existentes = set(queryset)
+
+    for indice, nome in enumerate(nomes):
+        if nome and not erros[indice] and normalizar(nome) in existentes:
+            erros[indice] = {'nome': [mensagem]}
+
+    return erros
+
+
+def alterar_ativa(queryset, ativa):
+    """
+    Ativa ou desativa, em um único UPDATE, os registros do queryset que estão
+    no outro estado e avisa os caches e totais derivados (dados_alterados).
+    Retorna a quantidade de registros alterados.
+    """
+    queryset = queryset.exclude(ativa=ativa).order_by()
+    with transaction.atomic():
+        usuario_ids = list(queryset.values_list('usuario_id', flat=True).distinct())
+        alterados = queryset.update(ativa=ativa, updated_at=timezone.now())
+        if alterados:
+            dados_alterados.send(sender=queryset.model, usuario_ids=usuario_ids)
+    return alterados
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer para criação em lote.
+
+    O serializer filho deve definir o atributo `mensagem_nome_duplicado`,
+    usado quando um nome do lote já existe para o usuário, e pode definir
+    `nome_unico_ignora_caixa = False` quando a unicidade diferencia
+    maiúsculas de minúsculas.
+    """
+
+    def to_internal_value(self, data):
+        validados = super().to_internal_value(data)
+
+        erros = validar_nomes_unicos(
+            self.child.Meta.model,
+            usuario_do_contexto(self.context),
+            [item.get('nome') for item in validados],
+            self.child.mensagem_nome_duplicado,
+            ignorar_caixa=getattr(self.child, 'nome_unico_ignora_caixa', True),
+        )
+        if any(erros):
+            raise serializers.ValidationError(erros)
+
+        return validados
+
+    def create(self, validated_data):
+        """Insere todos os registros com bulk_create, na ordem de entrada"""
+        model = self.child.Meta.model
+        objetos = [model(**item) for item in validated_data]
+        return model.objects.bulk_create(objetos)
+
+
+class BulkUpdateListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer para atualização parcial em lote.
+
+    Deve ser instanciado com o queryset de registros que o usuário pode
+    alterar; cada item do lote identifica o registro pelo campo `id`.
+    Os registros são carregados em uma única consulta.
+    """
+    default_error_messages = {
+        'nao_encontrado': 'Registro não encontrado.',
+        'id_repetido': 'Este id aparece mais de uma vez no lote.',
+    }
+
+    def to_internal_value(self, data):
+        ids = []
+        if isinstance(data, list):
+            for item in data:
+                try:
+                    ids.append(int(item.get('id')))
+                except (AttributeError, TypeError, ValueError):
+                    continue
+        self._instancias = self.instance.in_bulk(ids) if ids else {}
+        self._ids_vistos = set()
+
+        validados = super().to_internal_value(data)
+
+        nomes_finais = [
+            item.get('nome', self._instancias[item['id']].nome)
+            for item in validados
+        ]
+        erros = validar_nomes_unicos(
+            self.child.Meta.model,
+            usuario_do_contexto(self.context),
+            nomes_finais,
+            self.child.mensagem_nome_duplicado,
+            excluir_ids=list(self._instancias),
+            ignorar_caixa=getattr(self.child, 'nome_unico_ignora_caixa', True),
+        )
+        if any(erros):
+            raise serializers.ValidationError(erros)
+
+        return validados
+
+    def run_child_validation(self, data):
+        pk = data.get('id') if isinstance(data, dict) else None
+        if pk is None:
+            raise serializers.ValidationError({
+                'id': [serializers.Field.default_error_messages['required']]
+            })
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({
+                'id': [serializers.IntegerField.default_error_messages['invalid']]
+            })
+
+        if pk in self._ids_vistos:
+            raise serializers.ValidationError({'id': [self.error_messages['id_repetido']]})
+        self._ids_vistos.add(pk)
+
+        instancia = self._instancias.get(pk)
+        if instancia is None:
+            raise serializers.ValidationError({'id': [self.error_messages['nao_encontrado']]})
+
+        self.child.instance = instancia
+        self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def update(self, instance, validated_data):
+        """Aplica as alterações e grava tudo com um único bulk_update"""
+        model = self.child.Meta.model
+        agora = timezone.now()
+        campos = {'updated_at'}
+        objetos = []
+
+        for item in validated_data:
+            item = dict(item)
+            objeto = self._instancias[item.pop('id')]
+            for campo, valor in item.items():
+                setattr(objeto, campo, valor)
+                campos.add(campo)
+            objeto.updated_at = agora
+            objetos.append(objeto)
+
+        model.objects.bulk_update(objetos, sorted(campos))
+        return objetos
+
+
+class BulkModelViewSetMixin:
+    """
+    Adiciona o endpoint /bulk/ a um ModelViewSet:
+    - POST   /<recurso>/bulk/ - Cria uma lista de registros
+    - PATCH  /<recurso>/bulk/ - Atualiza parcialmente uma lista de registros
+    - DELETE /<recurso>/bulk/ - Remove os registros informados em {"ids": [...]}
+
+    O ViewSet deve definir os serializers usados em cada operação.
+    """
+    bulk_create_serializer_class = None
+    bulk_update_serializer_class = None
+    bulk_response_serializer_class = None
+
+    def get_bulk_max_itens(self):
+        return getattr(settings, 'BULK_MAX_ITENS', 1000)
+
+    def get_bulk_serializer(self, serializer_class, *args, **kwargs):
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(
+            *args,
+            many=True,
+            allow_empty=False,
+            max_length=self.get_bulk_max_itens(),
+            **kwargs
+        )
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Operações em lote.
+
+        POST   /<recurso>/bulk/  [{...}, {...}]
+        PATCH  /<recurso>/bulk/  [{"id": 1, ...}, {"id": 2, ...}]
+        DELETE /<recurso>/bulk/  {"ids": [1, 2, 3]}
+        """
+        if request.method == 'POST':
+            return self._criar_em_lote(request)
+        if request.method == 'PATCH':
+            return self._atualizar_em_lote(request)
+        return self._remover_em_lote(request)
+
+    def _notificar_alteracao(self):
+        dados_alterados.send(
+            sender=self.get_queryset().model, usuario_ids=[self.request.user.pk]
+        )
+
+    def _salvar_lote(self, serializer, **kwargs):
+        try:
+            with transaction.atomic():
+                objetos = serializer.save(**kwargs)
+                self._notificar_alteracao()
+                return objetos
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    'Não foi possível gravar o lote: um ou mais registros conflitam com dados existentes.'
+                ]
+            })
+
+    def _criar_em_lote(self, request):
+        serializer = self.get_bulk_serializer(
+            self.bulk_create_serializer_class, data=request.data
+        )
+        serializer.is_valid(raise_exception=True)
+        objetos = self._salvar_lote(serializer, usuario=request.user)
+
+        response_serializer = self.bulk_response_serializer_class(
+            objetos, many=True, context=self.get_serializer_context()
+        )
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+    def _atualizar_em_lote(self, request):
+        serializer = self.get_bulk_serializer(
+            self.bulk_update_serializer_class,
+            self.get_queryset().select_related('usuario'),
+            data=request.data,
+            partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        objetos = self._salvar_lote(serializer)
+
+        response_serializer = self.bulk_response_serializer_class(
+            objetos, many=True, context=self.get_serializer_context()
+        )
+        return Response(response_serializer.data)
+
+    def _remover_em_lote(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            return Response(
+                {'error': 'Informe a lista "ids" com os registros a remover.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > self.get_bulk_max_itens():
+            return Response(
+                {'error': f'Máximo de {self.get_bulk_max_itens()} registros por lote.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = {int(pk) for pk in ids}
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'A lista "ids" deve conter apenas números inteiros.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.get_queryset().filter(pk__in=ids)
+        encontrados = set(queryset.values_list('pk', flat=True))
+        with transaction.atomic():
+            _, por_modelo = queryset.delete()
+            self._notificar_alteracao()
+        removidos = por_modelo.get(queryset.model._meta.label, 0)
+
+        return Response({
+            'message': f'{removidos} registro(s) removido(s) com sucesso.',
+            'removidos': removidos,
+            'nao_encontrados': sorted(ids - encontrados)
+        })
@@ -0,0 +1,114 @@
+"""
+Versões por usuário para invalidação de caches derivados.
+
+Cada recurso (ex.: 'despesas_variaveis') tem um número de versão por usuário,
+incrementado a cada escrita. As chaves de cache incluem a versão atual, então
+uma escrita torna obsoletas todas as entradas daquele recurso sem precisar
+conhecê-las; as entradas antigas expiram sozinhas.
+
+Em implantações com mais de um processo, CACHES deve apontar para um cache
+compartilhado (Redis, Memcached ou banco); com o cache em memória local cada
+processo só enxerga as próprias invalidações.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+
+
+# Tempo de vida das entradas derivadas (as versões não expiram)
+TIMEOUT_PADRAO = 60 * 60
+
+
+def _chave_versao(recurso, usuario_id):
+    return f'versao:{recurso}:{usuario_id}'
+
+
+def _versao_inicial():
+    # Baseada no relógio: se a chave de versão for descartada pelo cache,
+    # a nova versão nunca coincide com uma já usada em entradas antigas
+    return time.time_ns()
+
+
+def obter_versao(recurso, usuario_id):
+    """Retorna a versão atual do recurso para o usuário"""
+    chave = _chave_versao(recurso, usuario_id)
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, _versao_inicial(), timeout=None)
+        versao = cache.get(chave)
+    return versao
+
+
+def obter_versoes(recursos, usuario_id):
+    """Versões atuais de vários recursos para o usuário, em uma leitura do cache"""
+    chaves = [_chave_versao(recurso, usuario_id) for recurso in recursos]
+    versoes = cache.get_many(chaves)
+    for recurso, chave in zip(recursos, chaves):
+        if chave not in versoes:
+            versoes[chave] = obter_versao(recurso, usuario_id)
+    return [versoes[chave] for chave in chaves]
+
+
+def incrementar_versao(recurso, usuario_id):
+    """Invalida imediatamente todas as entradas do recurso para o usuário"""
+    chave = _chave_versao(recurso, usuario_id)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.add(chave, _versao_inicial(), timeout=None)
+
+
+def invalidar(recurso, *usuario_ids):
+    """
+    Invalida o recurso para os usuários informados.
+
+    A versão é incrementada na hora (para leituras na mesma transação) e de
+    novo após o commit, para descartar valores que outra requisição tenha
+    calculado com os dados anteriores enquanto a transação estava aberta.
+    """
+    for usuario_id in set(usuario_ids):
+        incrementar_versao(recurso, usuario_id)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(
+                lambda usuario_id=usuario_id: incrementar_versao(recurso, usuario_id)
+            )
+
+
+def chave_versionada(recurso, usuario_id, *partes):
+    """Monta uma chave de cache que muda sempre que o recurso é alterado"""
+    versao = obter_versao(recurso, usuario_id)
+    return ':'.join([recurso, str(usuario_id), str(versao), *map(str, partes)])
+
+
+def obter_ou_calcular(recurso, usuario_id, calcular, *partes, timeout=TIMEOUT_PADRAO):
+    """
+    Retorna o valor em cache para a versão atual do recurso ou o calcula
+    com calcular() e o armazena.
+    """
+    chave = chave_versionada(recurso, usuario_id, *partes)
+    valor = cache.get(chave)
+    if valor is None:
+        valor = calcular()
+        cache.set(chave, valor, timeout)
+    return valor
+
+
+def etag_versionada(recurso, usuario_id, *partes):
+    """
+    ETag derivada da versão do recurso: muda a cada alteração, então pode
+    ser conferida sem recalcular a resposta.
+    """
+    chave = chave_versionada(recurso, usuario_id, *partes)
+    return '"%s"' % hashlib.md5(chave.encode('utf-8')).hexdigest()
+
+
+def etag_corresponde(request, etag):
+    """Indica se o cliente já tem a representação atual (If-None-Match)"""
+    cabecalho = request.headers.get('If-None-Match')
+    if not cabecalho:
+        return False
+    etags = {valor.removeprefix('W/') for valor in parse_etags(cabecalho)}
+    return '*' in etags or etag in etags
@@ -0,0 +1,249 @@
+"""
+Registro de consultas SQL lentas.
+
+Toda consulta que passa de CONSULTAS_LENTAS_LIMITE_MS milissegundos é
+gravada, uma por linha em JSON, no arquivo CONSULTAS_LENTAS_ARQUIVO, com
+rotação por tamanho (CONSULTAS_LENTAS_ARQUIVO_MAX_BYTES, mantendo
+CONSULTAS_LENTAS_ARQUIVOS arquivos anteriores). Cada registro traz o SQL, o
+endpoint da requisição (ver metricas.py), o trecho da pilha de chamadas que
+pertence ao projeto, a impressão digital da consulta e, para SELECTs, o
+plano de execução (EXPLAIN) obtido logo após a consulta.
+
+Os parâmetros só são gravados com CONSULTAS_LENTAS_PARAMETROS. Mesmo assim,
+as consultas que tocam dados sensíveis (TRECHOS_SENSIVEIS: tokens JWT,
+hashes de senha, sessões) são gravadas sem parâmetros e sem EXPLAIN, que no
+PostgreSQL pode trazer os valores das condições.
+
+O comando `consultas_lentas` agrega os registros por impressão digital e
+lista as consultas que mais pesam.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from . import metricas
+from .metricas import ENDPOINT_NAO_RESOLVIDO, medicao_atual
+
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo do texto dos parâmetros gravado em cada registro
+MAX_PARAMETROS = 2000
+# Quadros da pilha gravados (os mais próximos da consulta)
+MAX_QUADROS = 15
+
+# Trechos do SQL (em minúsculas) das consultas com dados sensíveis: refresh
+# tokens da blacklist do Simple JWT, a coluna de senha e as sessões
+TRECHOS_SENSIVEIS = ('token_blacklist_', 'password', 'django_session')
+PARAMETROS_OMITIDOS = '[omitidos: consulta com dados sensíveis]'
+
+_explicando = contextvars.ContextVar('explicando_consulta', default=False)
+
+_trava = threading.Lock()
+_handler = None
+_caminho_handler = None
+
+
+def impressao_digital(sql):
+    """
+    Normaliza o SQL (literais, listas de IN e espaços) e devolve um resumo
+    que agrupa as execuções da mesma consulta com valores diferentes.
+    """
+    normalizado = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    normalizado = re.sub(r'\b\d+(?:\.\d+)?\b', '?', normalizado)
+    normalizado = re.sub(r'%s', '?', normalizado)
+    normalizado = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', normalizado)
+    normalizado = re.sub(r'\s+', ' ', normalizado).strip()
+    return hashlib.sha1(normalizado.encode('utf-8')).hexdigest()[:12], normalizado
+
+
+def _pilha():
+    """Quadros da pilha dentro do projeto (fora de bibliotecas e da medição)"""
+    base = str(settings.BASE_DIR)
+    medicao = {__file__, metricas.__file__}
+    quadros = [
+        quadro for quadro in traceback.extract_stack()
+        if quadro.filename.startswith(base)
+        and 'site-packages' not in quadro.filename
+        and quadro.filename not in medicao
+    ]
+    return [
+        f'{Path(quadro.filename).relative_to(base)}:{quadro.lineno} em {quadro.name}'
+        for quadro in quadros[-MAX_QUADROS:]
+    ]
+
+
+def sensivel(sql):
+    """Se a consulta toca dados sensíveis (ver TRECHOS_SENSIVEIS)"""
+    sql = sql.lower()
+    return any(trecho in sql for trecho in TRECHOS_SENSIVEIS)
+
+
+def _parametros(sql, params):
+    if not settings.CONSULTAS_LENTAS_PARAMETROS:
+        return None
+    if sensivel(sql):
+        return PARAMETROS_OMITIDOS
+    return repr(params)[:MAX_PARAMETROS]
+
+
+def explicar(connection, sql, params):
+    """Plano de execução da consulta como texto; None se não for possível"""
+    inicio = sql.lstrip()[:6].upper()
+    if not (inicio.startswith('SELECT') or inicio.startswith('WITH')):
+        return None
+    token = _explicando.set(True)
+    try:
+        prefixo = connection.ops.explain_query_prefix()
+        # Dentro de uma transação, o savepoint impede que uma falha do
+        # EXPLAIN invalide o restante dela
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefixo} {sql}', params)
+                linhas = cursor.fetchall()
+    except (DatabaseError, NotImplementedError) as erro:
+        return f'EXPLAIN indisponível: {erro}'
+    finally:
+        _explicando.reset(token)
+    if connection.vendor == 'sqlite':
+        # id, parent, notused, detail
+        return '\n'.join(str(linha[-1]) for linha in linhas)
+    return '\n'.join(' '.join(str(coluna) for coluna in linha) for linha in linhas)
+
+
+def _obter_handler():
+    global _handler, _caminho_handler
+    caminho = Path(settings.CONSULTAS_LENTAS_ARQUIVO)
+    with _trava:
+        if _handler is None or _caminho_handler != caminho:
+            if _handler is not None:
+                _handler.close()
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            _handler = RotatingFileHandler(
+                caminho,
+                maxBytes=settings.CONSULTAS_LENTAS_ARQUIVO_MAX_BYTES,
+                backupCount=settings.CONSULTAS_LENTAS_ARQUIVOS,
+                encoding='utf-8',
+                delay=True,
+            )
+            _handler.setFormatter(logging.Formatter('%(message)s'))
+            _caminho_handler = caminho
+        return _handler
+
+
+def gravar(registro):
+    """Grava um registro (dicionário) como uma linha JSON do arquivo"""
+    handler = _obter_handler()
+    handler.handle(logging.makeLogRecord({
+        'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+        'msg': json.dumps(registro, ensure_ascii=False, default=str), 'args': None,
+    }))
+
+
+def _registrar(connection, sql, params, many, duracao_ms):
+    digital, _ = impressao_digital(sql)
+    medicao = medicao_atual()
+    registro = {
+        'horario': timezone.now().isoformat(),
+        'duracao_ms': round(duracao_ms, 3),
+        'impressao_digital': digital,
+        'banco': connection.alias,
+        'endpoint': medicao.endpoint if medicao is not None else ENDPOINT_NAO_RESOLVIDO,
+        'sql': sql,
+        'parametros': _parametros(sql, params),
+        'pilha': _pilha(),
+        'explain': None,
+    }
+    if settings.CONSULTAS_LENTAS_EXPLAIN and not many and not sensivel(sql):
+        registro['explain'] = explicar(connection, sql, params)
+    gravar(registro)
+
+
+def _medir(execute, sql, params, many, context):
+    limite = settings.CONSULTAS_LENTAS_LIMITE_MS
+    if not limite or _explicando.get():
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    resultado = execute(sql, params, many, context)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    if duracao_ms >= limite:
+        try:
+            _registrar(context['connection'], sql, params, many, duracao_ms)
+        except Exception:
+            # O registro nunca deve derrubar a consulta que o originou
+            logger.exception('Falha ao registrar consulta lenta')
+    return resultado
+
+
+def _instalar_na_conexao(sender, connection, **kwargs):
+    if _medir not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir)
+
+
+def instalar():
+    """Liga o registro de consultas lentas (CoreConfig.ready)"""
+    connection_created.connect(_instalar_na_conexao, dispatch_uid='consultas_lentas')
+
+
+def arquivos():
+    """Arquivo atual e os rotacionados que existirem, do mais antigo ao mais novo"""
+    caminho = Path(settings.CONSULTAS_LENTAS_ARQUIVO)
+    anteriores = [
+        Path(f'{caminho}.{indice}') for indice in range(settings.CONSULTAS_LENTAS_ARQUIVOS, 0, -1)
+    ]
+    return [arquivo for arquivo in (*anteriores, caminho) if arquivo.exists()]
+
+
+def ler_registros(caminhos=None):
+    """Registros gravados, em ordem; linhas inválidas são ignoradas"""
+    for caminho in caminhos if caminhos is not None else arquivos():
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                try:
+                    yield json.loads(linha)
+                except ValueError:
+                    continue
+
+
+def agregar(registros):
+    """
+    Agrupa os registros por impressão digital. Retorna uma lista de
+    dicionários com quantidade, tempo total, médio e máximo, endpoints e o
+    registro mais lento de cada consulta.
+    """
+    grupos = {}
+    for registro in registros:
+        grupo = grupos.get(registro['impressao_digital'])
+        if grupo is None:
+            grupo = grupos[registro['impressao_digital']] = {
+                'impressao_digital': registro['impressao_digital'],
+                'sql': impressao_digital(registro['sql'])[1],
+                'quantidade': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'endpoints': {},
+                'mais_lenta': registro,
+            }
+        grupo['quantidade'] += 1
+        grupo['total_ms'] += registro['duracao_ms']
+        if registro['duracao_ms'] >= grupo['max_ms']:
+            grupo['max_ms'] = registro['duracao_ms']
+            grupo['mais_lenta'] = registro
+        endpoint = registro.get('endpoint') or ENDPOINT_NAO_RESOLVIDO
+        grupo['endpoints'][endpoint] = grupo['endpoints'].get(endpoint, 0) + 1
+
+    for grupo in grupos.values():
+        grupo['media_ms'] = grupo['total_ms'] / grupo['quantidade']
+    return list(grupos.values())
@@ -0,0 +1,338 @@
+"""
+Geração de dados sintéticos para testes de escala.
+
+GeradorDadosSinteticos cria comerciantes com ingredientes, despesas fixas e
+variáveis, produtos com 5 a 80 componentes e anos de histórico de
+AnaliseFinanceira. Tudo sai de um único random.Random com a semente
+informada: a mesma semente, a mesma escala e a mesma data final geram
+exatamente os mesmos dados.
+
+Os registros são gravados com bulk_create em lotes de `tamanho_lote`, em uma
+transação por comerciante; ao fim de cada comerciante o signal
+dados_alterados atualiza os totais e invalida os caches derivados, como nas
+importações (ver importacao/importador.py). bulk_create precisa devolver as
+chaves primárias (PostgreSQL, SQLite 3.35+ ou MariaDB 10.5+).
+
+As datas de criação são espalhadas pelo período do histórico; para isso o
+auto_now_add dos campos created_at é desligado enquanto o gerador grava.
+"""
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from analisefinanceira.models import AnaliseFinanceira
+from despesafixa.models import DespesaFixa
+from despesavariavel.models import DespesaVariavel
+from ingredientes.models import Ingrediente
+from produtos.models import Produto, ProdutoDespesaFixa, ProdutoDespesaVariavel, ProdutoIngrediente
+from .signals import dados_alterados
+
+
+User = get_user_model()
+
+SENHA = 'Sintetico#2026'
+
+CENTAVOS = Decimal('0.01')
+MILESIMOS = Decimal('0.001')
+
+# Componentes (ingredientes) por produto: mínimo, mais comum e máximo
+COMPONENTES = (5, 12, 80)
+
+INGREDIENTES = [
+    'Farinha de Trigo', 'Açúcar', 'Manteiga', 'Ovos', 'Leite', 'Fermento', 'Chocolate',
+    'Creme de Leite', 'Leite Condensado', 'Queijo', 'Presunto', 'Tomate', 'Cebola',
+    'Alho', 'Azeite', 'Sal', 'Orégano', 'Frango', 'Carne Moída', 'Bacon', 'Calabresa',
+    'Mussarela', 'Morango', 'Coco Ralado', 'Castanha', 'Canela', 'Baunilha', 'Polvilho',
+    'Arroz', 'Feijão', 'Batata', 'Cenoura', 'Embalagem', 'Guardanapo', 'Etiqueta',
+]
+FORNECEDORES = ['Atacadão', 'Assaí', 'Makro', 'Feira Local', 'Distribuidora Central', None]
+# Unidade e mediana do preço por unidade (o preço segue uma lognormal)
+UNIDADES = [('kg', 18), ('g', 0.05), ('litro', 9), ('ml', 0.02), ('unidade', 1.5), ('pacote', 12)]
+
+DESPESAS_FIXAS = [
+    ('Aluguel', 2500), ('Energia', 600), ('Água', 180), ('Internet', 120), ('Gás', 250),
+    ('Contador', 450), ('Salário', 1800), ('Seguro', 900), ('Software', 90), ('Limpeza', 300),
+    ('Manutenção', 400), ('Marketing', 500), ('Alvará', 700), ('Telefone', 80),
+]
+# Pesos das recorrências, na ordem de DespesaFixa.RECORRENCIA_CHOICES
+PESOS_RECORRENCIA = [70, 4, 8, 4, 10, 4]
+
+DESPESAS_VARIAVEIS = [
+    ('Embalagem', 'unidade', 0.8), ('Entrega', 'pedido', 7), ('Taxa do Cartão', 'venda', 1.2),
+    ('Comissão', 'venda', 3), ('Gás de Cozinha', 'hora', 2.5), ('Sacola', 'unidade', 0.3),
+    ('Etiqueta', 'unidade', 0.1), ('Taxa do Aplicativo', 'pedido', 4),
+]
+
+PRODUTOS = [
+    'Bolo', 'Torta', 'Pão', 'Pizza', 'Coxinha', 'Empada', 'Brigadeiro', 'Cookie', 'Lasanha',
+    'Marmita', 'Sanduíche', 'Esfiha', 'Quiche', 'Pudim', 'Brownie', 'Cuca', 'Salgado Frito',
+]
+SABORES = [
+    'de Chocolate', 'de Frango', 'de Queijo', 'de Morango', 'Integral', 'Especial',
+    'de Carne', 'de Coco', 'Tradicional', 'Vegano', 'de Calabresa', 'Caseiro',
+]
+
+
+def _decimal(valor, casas=CENTAVOS):
+    return Decimal(str(valor)).quantize(casas)
+
+
+def _lognormal(rng, mediana, dispersao):
+    return mediana * math.exp(rng.gauss(0, dispersao))
+
+
+@contextmanager
+def _datas_explicitas(*modelos):
+    """Desliga o auto_now_add dos created_at para gravar datas do histórico"""
+    campos = [modelo._meta.get_field('created_at') for modelo in modelos]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+class ResultadoGeracao:
+    """Registros criados por modelo e tempo gasto"""
+
+    def __init__(self):
+        self.criados = {}
+        self.inicio = time.perf_counter()
+
+    def somar(self, modelo, quantidade):
+        nome = modelo._meta.verbose_name_plural
+        self.criados[nome] = self.criados.get(nome, 0) + quantidade
+
+    @property
+    def total(self):
+        return sum(self.criados.values())
+
+    @property
+    def duracao(self):
+        return time.perf_counter() - self.inicio
+
+
+class GeradorDadosSinteticos:
+    """
+    Gera `comerciantes` usuários com nome `{prefixo}_00001` em diante. As
+    quantidades por comerciante são médias: cada comerciante recebe entre
+    metade e uma vez e meia do valor. O histórico de análises cobre `anos`
+    anos até `data_final`, com `analises_por_mes` análises de cada produto
+    por mês.
+    """
+
+    def __init__(
+        self, comerciantes, semente=42, prefixo='sintetico', ingredientes=150,
+        despesas_fixas=10, despesas_variaveis=6, produtos=60, anos=3,
+        analises_por_mes=4, data_final=None, tamanho_lote=5000, progresso=None,
+    ):
+        self.comerciantes = comerciantes
+        self.prefixo = prefixo
+        self.ingredientes = ingredientes
+        self.despesas_fixas = despesas_fixas
+        self.despesas_variaveis = despesas_variaveis
+        self.produtos = produtos
+        self.anos = anos
+        self.analises_por_mes = analises_por_mes
+        self.tamanho_lote = tamanho_lote
+        self.progresso = progresso
+        self.rng = random.Random(semente)
+
+        data_final = data_final or datetime.now(dt_timezone.utc).date()
+        self.fim = datetime.combine(data_final, dt_time(), tzinfo=dt_timezone.utc)
+        self.meses = max(anos * 12, 1)
+        self.inicio = self.fim - timedelta(days=30 * self.meses)
+        self.resultado = ResultadoGeracao()
+
+    def usernames(self):
+        return [f'{self.prefixo}_{indice:05d}' for indice in range(1, self.comerciantes + 1)]
+
+    def usuarios(self):
+        """Comerciantes já gravados, na ordem dos usernames"""
+        return list(User.objects.filter(username__in=self.usernames()).order_by('username'))
+
+    def gerar(self):
+        """Grava todos os comerciantes e retorna o ResultadoGeracao"""
+        senha = make_password(SENHA)
+        with _datas_explicitas(
+            Ingrediente, DespesaFixa, DespesaVariavel, Produto, ProdutoIngrediente,
+            ProdutoDespesaFixa, ProdutoDespesaVariavel, AnaliseFinanceira,
+        ):
+            for username in self.usernames():
+                with transaction.atomic():
+                    usuario = self._gravar(User, [self._usuario(username, senha)])[0]
+                    self._gerar_comerciante(usuario)
+                for modelo in (
+                    Ingrediente, DespesaFixa, DespesaVariavel, Produto, ProdutoIngrediente,
+                    ProdutoDespesaFixa, ProdutoDespesaVariavel,
+                ):
+                    dados_alterados.send(sender=modelo, usuario_ids=[usuario.pk])
+                if self.progresso:
+                    self.progresso(username, self.resultado)
+        return self.resultado
+
+    def _gravar(self, modelo, objetos):
+        criados = modelo.objects.bulk_create(objetos, batch_size=self.tamanho_lote)
+        self.resultado.somar(modelo, len(criados))
+        return criados
+
+    def _quantidade(self, media):
+        return self.rng.randint(max(media // 2, 1), max(media * 3 // 2, 1))
+
+    def _data(self):
+        """Data de cadastro em algum ponto do período do histórico"""
+        return self.inicio + timedelta(seconds=self.rng.uniform(0, (self.fim - self.inicio).total_seconds()))
+
+    def _usuario(self, username, senha):
+        return User(
+            username=username, email=f'{username}@exemplo.com', password=senha,
+            nome_comercial=f'Comércio {username.rsplit("_", 1)[-1]}', date_joined=self.inicio,
+        )
+
+    def _gerar_comerciante(self, usuario):
+        rng = self.rng
+        ingredientes = self._gravar(Ingrediente, [
+            self._ingrediente(usuario, indice) for indice in range(self._quantidade(self.ingredientes))
+        ])
+        despesas_fixas = self._gravar(DespesaFixa, [
+            self._despesa_fixa(usuario, indice) for indice in range(self._quantidade(self.despesas_fixas))
+        ])
+        despesas_variaveis = self._gravar(DespesaVariavel, [
+            self._despesa_variavel(usuario, indice)
+            for indice in range(self._quantidade(self.despesas_variaveis))
+        ])
+        produtos = self._gravar(Produto, [
+            self._produto(usuario, indice) for indice in range(self._quantidade(self.produtos))
+        ])
+
+        precos = {ingrediente.pk: ingrediente.preco_por_unidade for ingrediente in ingredientes}
+        valores = {despesa.pk: despesa.valor_por_unidade for despesa in despesas_variaveis}
+        total_fixas = sum((despesa.valor for despesa in despesas_fixas), Decimal('0'))
+        componentes, vinculos_fixos, vinculos_variaveis, analises = [], [], [], []
+        for produto in produtos:
+            quantidade = min(
+                round(rng.triangular(COMPONENTES[0], COMPONENTES[2], COMPONENTES[1])), len(ingredientes)
+            )
+            itens = [
+                ProdutoIngrediente(
+                    produto=produto, ingrediente=ingrediente, created_at=produto.created_at,
+                    quantidade=_decimal(_lognormal(rng, 0.2, 1.0) + 0.001, MILESIMOS),
+                )
+                for ingrediente in rng.sample(ingredientes, quantidade)
+            ]
+            componentes += itens
+            vinculos_fixos += [
+                ProdutoDespesaFixa(produto=produto, despesa_fixa=despesa, created_at=produto.created_at)
+                for despesa in rng.sample(despesas_fixas, rng.randint(0, min(4, len(despesas_fixas))))
+            ]
+            variaveis = [
+                ProdutoDespesaVariavel(
+                    produto=produto, despesa_variavel=despesa, created_at=produto.created_at,
+                    quantidade=_decimal(rng.choice([1, 1, 1, 2, 0.5]), MILESIMOS),
+                )
+                for despesa in rng.sample(despesas_variaveis, rng.randint(0, min(3, len(despesas_variaveis))))
+            ]
+            vinculos_variaveis += variaveis
+
+            custo_ingredientes = sum(
+                (item.quantidade * precos[item.ingrediente.pk] for item in itens), Decimal('0')
+            )
+            custo_variaveis = sum(
+                (item.quantidade * valores[item.despesa_variavel.pk] for item in variaveis), Decimal('0')
+            )
+            custo_fixo = total_fixas / len(produtos) / (produto.producao_diaria * 30)
+            analises += self._historico(produto, custo_ingredientes, custo_fixo, custo_variaveis)
+            if len(analises) >= self.tamanho_lote:
+                self._gravar(AnaliseFinanceira, analises)
+                analises = []
+
+        self._gravar(ProdutoIngrediente, componentes)
+        self._gravar(ProdutoDespesaFixa, vinculos_fixos)
+        self._gravar(ProdutoDespesaVariavel, vinculos_variaveis)
+        self._gravar(AnaliseFinanceira, analises)
+
+    def _ingrediente(self, usuario, indice):
+        rng = self.rng
+        unidade, mediana = rng.choice(UNIDADES)
+        return Ingrediente(
+            usuario=usuario,
+            nome=f'{rng.choice(INGREDIENTES)} {indice + 1:04d}',
+            preco_por_unidade=max(_decimal(_lognormal(rng, mediana, 0.6)), CENTAVOS),
+            unidade_medida=unidade,
+            fornecedor=rng.choice(FORNECEDORES),
+            created_at=self._data(),
+        )
+
+    def _despesa_fixa(self, usuario, indice):
+        rng = self.rng
+        nome, mediana = rng.choice(DESPESAS_FIXAS)
+        recorrencia = rng.choices(
+            [codigo for codigo, _ in DespesaFixa.RECORRENCIA_CHOICES], PESOS_RECORRENCIA
+        )[0]
+        criada_em = self._data()
+        return DespesaFixa(
+            usuario=usuario,
+            nome=f'{nome} {indice + 1:03d}',
+            valor=_decimal(_lognormal(rng, mediana, 0.5)),
+            recorrencia=recorrencia,
+            data_inicio=criada_em.date() if recorrencia == 'unica' else None,
+            ativa=rng.random() < 0.9,
+            created_at=criada_em,
+        )
+
+    def _despesa_variavel(self, usuario, indice):
+        rng = self.rng
+        nome, unidade, mediana = rng.choice(DESPESAS_VARIAVEIS)
+        return DespesaVariavel(
+            usuario=usuario,
+            nome=f'{nome} {indice + 1:03d}',
+            valor_por_unidade=max(_decimal(_lognormal(rng, mediana, 0.4)), CENTAVOS),
+            unidade_medida=unidade,
+            ativa=rng.random() < 0.9,
+            created_at=self._data(),
+        )
+
+    def _produto(self, usuario, indice):
+        rng = self.rng
+        return Produto(
+            usuario=usuario,
+            nome=f'{rng.choice(PRODUTOS)} {rng.choice(SABORES)} {indice + 1:04d}',
+            tempo_preparo=rng.randint(5, 240),
+            margem_lucro=_decimal(rng.uniform(10, 150)),
+            periodo_analise=rng.choice([7, 15, 30, 30, 30, 60, 90]),
+            producao_diaria=min(max(round(_lognormal(rng, 20, 0.8)), 1), 1000),
+            created_at=self.inicio,
+        )
+
+    def _historico(self, produto, custo_ingredientes, custo_fixo, custo_variaveis):
+        """Análises mensais do produto, com os custos subindo ~0,5% ao mês"""
+        rng = self.rng
+        quantidade = produto.producao_diaria * produto.periodo_analise
+        margem = 1 + produto.margem_lucro / 100
+        analises = []
+        for mes in range(self.meses):
+            fator = Decimal(str(1.005 ** mes * rng.uniform(0.95, 1.05)))
+            for _ in range(self.analises_por_mes):
+                analise = AnaliseFinanceira(
+                    produto=produto,
+                    custo_ingredientes=_decimal(custo_ingredientes * fator),
+                    custo_despesas_fixas=_decimal(custo_fixo * fator),
+                    custo_despesas_variaveis=_decimal(custo_variaveis * fator),
+                    created_at=self.inicio + timedelta(days=30 * mes + rng.uniform(0, 30)),
+                )
+                analise.calcular_custo_total()
+                preco = _decimal(analise.custo_total_producao * margem)
+                analise.preco_venda_sugerido = preco
+                analise.faturamento_previsto = preco * quantidade
+                analise.lucro_previsto = (preco - analise.custo_total_producao) * quantidade
+                analises.append(analise)
+        return analises
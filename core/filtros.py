@@ -0,0 +1,19 @@
+"""
+Backends de filtro compartilhados pelos ViewSets.
+"""
+from rest_framework.filters import OrderingFilter
+
+
+class OrdenacaoPorAcao(OrderingFilter):
+    """
+    OrderingFilter que aceita, por ação, apenas os campos listados em
+    `ordering_fields_por_acao` do ViewSet (ex.: só as colunas cobertas por
+    índices nas listagens de ativas). Ações fora do dicionário usam
+    `ordering_fields`. Campos fora da lista são ignorados, sem erro.
+    """
+
+    def get_valid_fields(self, queryset, view, context={}):
+        campos = getattr(view, 'ordering_fields_por_acao', {}).get(getattr(view, 'action', None))
+        if campos is None:
+            return super().get_valid_fields(queryset, view, context)
+        return [(campo, campo) for campo in campos]
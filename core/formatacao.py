@@ -0,0 +1,14 @@
+"""
+Formatação de valores para exibição.
+"""
+
+# Troca os separadores do formato americano (1,234.56) pelos do
+# brasileiro (1.234,56) em uma única passada
+_SEPARADORES_BR = str.maketrans({',': '.', '.': ','})
+
+
+def formatar_real(valor):
+    """Formata um valor em real brasileiro: 1234.5 -> 'R$ 1.234,50'"""
+    if not valor:
+        return 'R$ 0,00'
+    return f'R$ {valor:,.2f}'.translate(_SEPARADORES_BR)
@@ -0,0 +1,98 @@
+"""
+Unicidade garantida pelo banco, com os erros traduzidos para a API.
+
+Os serializers não consultam o banco para saber se um nome já existe: a
+gravação é feita em um savepoint e, se uma restrição de unicidade do modelo
+for violada, a IntegrityError vira o mesmo erro de validação (400) que a
+verificação prévia retornava. Assim a regra vale também para requisições
+concorrentes, sem uma consulta extra por escrita.
+"""
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+
+def _restricoes_unicas(model):
+    """Pares (nome, campos) das restrições de unicidade do modelo"""
+    opts = model._meta
+    for campos in opts.unique_together:
+        yield None, tuple(campos)
+    for restricao in opts.total_unique_constraints:
+        yield restricao.name, tuple(restricao.fields)
+    for restricao in opts.constraints:
+        if getattr(restricao, 'expressions', None) and restricao.name:
+            # Restrições funcionais (ex.: Lower('nome')): campos referenciados
+            campos = tuple(
+                referencia for expressao in restricao.expressions
+                for referencia in _campos_da_expressao(expressao)
+            )
+            yield restricao.name, campos
+
+
+def _campos_da_expressao(expressao):
+    nome = getattr(expressao, 'name', None)
+    if isinstance(nome, str):
+        return [nome]
+    campos = []
+    for origem in getattr(expressao, 'get_source_expressions', lambda: [])():
+        campos.extend(_campos_da_expressao(origem))
+    return campos
+
+
+def campos_da_restricao_violada(model, erro):
+    """
+    Campos da restrição de unicidade indicada pela IntegrityError, ou ()
+    se ela não corresponder a nenhuma restrição conhecida do modelo.
+
+    O PostgreSQL informa o nome da restrição; o SQLite informa o nome do
+    índice (restrições funcionais) ou as colunas (tabela.coluna).
+    """
+    mensagem = str(erro)
+    diagnostico = getattr(getattr(erro, '__cause__', None), 'diag', None)
+    nome_violado = getattr(diagnostico, 'constraint_name', None)
+    tabela = model._meta.db_table
+
+    for nome, campos in _restricoes_unicas(model):
+        if nome and (nome == nome_violado or f"'{nome}'" in mensagem or f'"{nome}"' in mensagem):
+            return campos
+        colunas = [model._meta.get_field(campo).column for campo in campos]
+        if nome_violado is None and all(f'{tabela}.{coluna}' in mensagem for coluna in colunas):
+            return campos
+    return ()
+
+
+@contextmanager
+def traduzir_violacoes_de_unicidade(model, mensagens):
+    """
+    Executa o bloco em um savepoint e converte violações de unicidade em
+    serializers.ValidationError.
+
+    `mensagens` mapeia o campo da restrição (ex.: 'nome') para a mensagem
+    de erro; violações sem mensagem configurada são propagadas.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as erro:
+        campos = campos_da_restricao_violada(model, erro)
+        campo = next((campo for campo in reversed(campos) if campo in mensagens), None)
+        if campo is None:
+            raise
+        raise serializers.ValidationError({campo: [mensagens[campo]]}) from erro
+
+
+class UnicidadeNoBancoMixin:
+    """
+    Mixin para ModelSerializers cujas restrições de unicidade são verificadas
+    pelo banco. Defina `mensagens_unicidade = {'campo': 'mensagem'}`.
+    """
+    mensagens_unicidade = {}
+
+    def create(self, validated_data):
+        with traduzir_violacoes_de_unicidade(self.Meta.model, self.mensagens_unicidade):
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with traduzir_violacoes_de_unicidade(self.Meta.model, self.mensagens_unicidade):
+            return super().update(instance, validated_data)
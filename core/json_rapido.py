@@ -0,0 +1,108 @@
+"""
+Renderer e parser JSON da API com o orjson.
+
+JSONRendererRapido e JSONParserRapido substituem os equivalentes do DRF
+(selecionados por JSON_RAPIDO em settings) e produzem o mesmo resultado:
+os tipos que o orjson não serializa do mesmo jeito (Decimal, datetime,
+date, time, dataclasses, lazy strings) passam pelo JSONEncoder do DRF, e
+\\u2028/\\u2029 continuam escapados. O renderer do DRF é usado quando a saída
+não seria a mesma:
+- indentação, UNICODE_JSON=False ou COMPACT_JSON=False;
+- dados recusados pelo orjson (inteiros com mais de 64 bits);
+- floats com |x| < 1e-4 ou >= 1e16, que o json da biblioteca padrão escreve
+  como 1e-05 e 1e+16 e o orjson como 0.00001 e 1e16. O calcular produz
+  valores assim (quantidades com 3 casas vezes preços com 2). Eles são
+  detectados na saída do orjson por _float_divergente(); um texto parecido
+  dentro de uma string (ex.: "3e5") apenas faz a resposta usar o DRF.
+
+O orjson está no requirements.txt; sem ele instalado, as duas classes se
+comportam exatamente como as do DRF.
+
+Diferenças restantes: NaN/Infinity viram null em vez de erro, e no parser
+inteiros com mais de 64 bits viram float.
+"""
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+ORJSON_DISPONIVEL = orjson is not None
+
+if ORJSON_DISPONIVEL:
+    # Datetimes e dataclasses passam pelo encoder do DRF, que limita os
+    # microssegundos a milissegundos e usa "Z" para UTC
+    OPCOES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+_EXPOENTE = re.compile(rb'e[-0-9]')
+_QUATRO_ZEROS = re.compile(rb'0\.0000')
+_DIGITOS = frozenset(b'0123456789')
+_SEPARADORES_JS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+_CODIFICACOES_UTF8 = {'utf-8', 'utf8'}
+
+
+def _float_divergente(ret):
+    """
+    Se a saída do orjson tem um float que o json da biblioteca padrão
+    formata de outro jeito: em notação científica (dígito seguido de "e") ou
+    com quatro zeros após o ponto (0.0000...). Buscas por trechos literais,
+    bem mais rápidas que uma expressão regular com classes no início.
+    """
+    for trecho in _EXPOENTE.finditer(ret):
+        if trecho.start() and ret[trecho.start() - 1] in _DIGITOS:
+            return True
+    if b'0.0000' in ret:
+        for trecho in _QUATRO_ZEROS.finditer(ret):
+            if not trecho.start() or ret[trecho.start() - 1] not in _DIGITOS:
+                return True
+    return False
+
+
+class JSONRendererRapido(JSONRenderer):
+    """JSONRenderer com a mesma saída em bytes, codificado pelo orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            not ORJSON_DISPONIVEL or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encoders.JSONEncoder().default, option=OPCOES)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if _float_divergente(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separador, escapado in _SEPARADORES_JS:
+            if separador in ret:
+                ret = ret.replace(separador, escapado)
+        return ret
+
+
+class JSONParserRapido(JSONParser):
+    """JSONParser decodificado pelo orjson; erros passam pelo parser do DRF"""
+    renderer_class = JSONRendererRapido
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not ORJSON_DISPONIVEL or encoding.lower() not in _CODIFICACOES_UTF8:
+            return super().parse(stream, media_type, parser_context)
+
+        corpo = stream.read()
+        try:
+            return orjson.loads(corpo)
+        except orjson.JSONDecodeError:
+            # Mesma mensagem de erro do DRF, e aceita o que só o json da
+            # biblioteca padrão aceita (ex.: surrogates isolados)
+            return super().parse(io.BytesIO(corpo), media_type, parser_context)
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core import benchmark
+
+
+class Rollback(Exception):
+    """Desfaz os dados gerados para o benchmark"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede latência (p50/p95/p99), consultas SQL e pico de memória dos endpoints '
+        'em conjuntos de dados sintéticos e compara com uma linha de base'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanhos', nargs='+', choices=list(benchmark.TAMANHOS), default=['pequeno', 'medio'],
+            help='Tamanhos dos conjuntos de dados medidos'
+        )
+        parser.add_argument('--repeticoes', type=int, default=20, help='Requisições medidas por cenário')
+        parser.add_argument('--aquecimento', type=int, default=2, help='Requisições descartadas por cenário')
+        parser.add_argument('--semente', type=int, default=42, help='Semente dos dados sintéticos')
+        parser.add_argument('--saida', help='Arquivo JSON em que o resultado é gravado')
+        parser.add_argument('--baseline', help='Arquivo JSON da linha de base para comparação')
+        parser.add_argument(
+            '--tolerancia', type=float, default=25,
+            help='Aumento percentual tolerado de p95 e do pico de memória em relação à linha de base'
+        )
+        parser.add_argument(
+            '--atualizar-baseline', action='store_true',
+            help='Grava o resultado como a nova linha de base (em --baseline), sem comparar'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeticoes'] < 1 or options['aquecimento'] < 0:
+            raise CommandError('--repeticoes deve ser maior que zero e --aquecimento não pode ser negativo.')
+        if options['atualizar_baseline'] and not options['baseline']:
+            raise CommandError('Informe o arquivo em --baseline para atualizá-lo.')
+        linha_de_base = None
+        if options['baseline'] and not options['atualizar_baseline']:
+            try:
+                linha_de_base = benchmark.ler(options['baseline'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Não foi possível ler a linha de base: {e}')
+
+        # Os dados sintéticos são gerados e medidos em uma transação desfeita ao final
+        try:
+            with transaction.atomic():
+                relatorio = benchmark.executar(
+                    options['tamanhos'],
+                    repeticoes=options['repeticoes'],
+                    aquecimento=options['aquecimento'],
+                    semente=options['semente'],
+                    progresso=self._exibir if options['verbosity'] > 0 else None,
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options['saida']:
+            benchmark.gravar(relatorio, options['saida'])
+        if options['atualizar_baseline']:
+            benchmark.gravar(relatorio, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f'Linha de base gravada em {options["baseline"]}.'))
+            return
+        if linha_de_base is None:
+            return
+
+        regressoes = benchmark.comparar(relatorio, linha_de_base, options['tolerancia'] / 100)
+        for regressao in regressoes:
+            self.stderr.write(regressao)
+        if regressoes:
+            raise CommandError(f'{len(regressoes)} regressão(ões) em relação à linha de base.')
+        self.stdout.write(self.style.SUCCESS('Nenhuma regressão em relação à linha de base.'))
+
+    def _exibir(self, tamanho, resultados):
+        self.stdout.write(f'\n[{tamanho}]')
+        self.stdout.write(
+            f'{"cenário":<34} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"consultas":>10} {"memória KB":>11}'
+        )
+        for nome, medidas in resultados.items():
+            self.stdout.write(
+                f'{nome:<34} {medidas["p50_ms"]:>9.2f} {medidas["p95_ms"]:>9.2f} {medidas["p99_ms"]:>9.2f} '
+                f'{medidas["consultas"]:>10} {medidas["memoria_pico_kb"]:>11.1f}'
+            )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import benchmark
+from core.json_rapido import ORJSON_DISPONIVEL
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a renderização e o parse JSON do DRF com os do orjson (JSON_RAPIDO) '
+        'em uma página de análises financeiras'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=1000, help='Análises na página medida')
+        parser.add_argument('--repeticoes', type=int, default=50, help='Repetições medidas de cada operação')
+
+    def handle(self, *args, **options):
+        if options['linhas'] < 1 or options['repeticoes'] < 1:
+            raise CommandError('--linhas e --repeticoes devem ser maiores que zero.')
+        if not ORJSON_DISPONIVEL:
+            raise CommandError('O orjson não está instalado (pip install orjson).')
+
+        resultado = benchmark.medir_json(options['linhas'], options['repeticoes'])
+        self.stdout.write(f'{resultado["linhas"]} análises, {resultado["bytes"]} bytes')
+        self.stdout.write(f'{"operação":<14} {"DRF ms":>9} {"orjson ms":>10} {"ganho":>7}')
+        for operacao, chave in (('renderização', 'renderizacao_ms'), ('parse', 'parse_ms')):
+            tempos = resultado[chave]
+            self.stdout.write(
+                f'{operacao:<14} {tempos["drf"]:>9.2f} {tempos["rapido"]:>10.2f} '
+                f'{tempos["drf"] / tempos["rapido"]:>6.1f}x'
+            )
+        if not resultado['identico']:
+            raise CommandError('As saídas do DRF e do orjson são diferentes.')
+        self.stdout.write(self.style.SUCCESS('Saídas idênticas byte a byte.'))
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.consultas_lentas import agregar, arquivos, ler_registros
+
+
+ORDENS = {
+    'total': 'total_ms',
+    'max': 'max_ms',
+    'media': 'media_ms',
+    'quantidade': 'quantidade',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Agrega o registro de consultas lentas (CONSULTAS_LENTAS_ARQUIVO e os '
+        'arquivos rotacionados) por impressão digital e lista as piores consultas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limite', type=int, default=10,
+            help='Quantidade de consultas listadas'
+        )
+        parser.add_argument(
+            '--ordem', choices=sorted(ORDENS), default='total',
+            help='Critério de ordenação: tempo total, máximo, médio ou quantidade'
+        )
+        parser.add_argument(
+            '--endpoint',
+            help='Considera só as consultas feitas por este endpoint (ex.: AnaliseFinanceiraViewSet.list)'
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Mostra o SQL, os parâmetros, a pilha e o EXPLAIN da execução mais lenta'
+        )
+        parser.add_argument(
+            'arquivos', nargs='*',
+            help='Arquivos a ler (padrão: CONSULTAS_LENTAS_ARQUIVO e os rotacionados)'
+        )
+
+    def handle(self, *args, **options):
+        if options['limite'] < 1:
+            raise CommandError('--limite deve ser maior que zero.')
+
+        registros = ler_registros(options['arquivos'] or arquivos())
+        if options['endpoint']:
+            registros = (r for r in registros if r.get('endpoint') == options['endpoint'])
+        grupos = agregar(registros)
+        if not grupos:
+            self.stdout.write(f'Nenhuma consulta lenta registrada em {settings.CONSULTAS_LENTAS_ARQUIVO}.')
+            return
+
+        campo = ORDENS[options['ordem']]
+        grupos.sort(key=lambda grupo: grupo[campo], reverse=True)
+        self.stdout.write(f'{len(grupos)} consulta(s) distinta(s); as {options["limite"]} piores por {options["ordem"]}:')
+        for posicao, grupo in enumerate(grupos[:options['limite']], 1):
+            endpoints = ', '.join(
+                f'{endpoint} ({quantidade})'
+                for endpoint, quantidade in sorted(grupo['endpoints'].items(), key=lambda item: -item[1])
+            )
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{posicao}. [{grupo["impressao_digital"]}] {grupo["quantidade"]}x, '
+                f'total {grupo["total_ms"]:.1f} ms, média {grupo["media_ms"]:.1f} ms, '
+                f'máximo {grupo["max_ms"]:.1f} ms'
+            ))
+            self.stdout.write(f'   Endpoints: {endpoints}')
+            self.stdout.write(f'   {grupo["sql"]}')
+            if options['explain']:
+                self._detalhar(grupo['mais_lenta'])
+
+    def _detalhar(self, registro):
+        self.stdout.write(f'   Mais lenta em {registro["horario"]}:')
+        self.stdout.write(f'   SQL: {registro["sql"]}')
+        if registro.get('parametros') is not None:
+            self.stdout.write(f'   Parâmetros: {registro["parametros"]}')
+        for quadro in registro.get('pilha') or []:
+            self.stdout.write(f'     {quadro}')
+        if registro.get('explain'):
+            self.stdout.write('   EXPLAIN:')
+            for linha in registro['explain'].splitlines():
+                self.stdout.write(f'     {linha}')
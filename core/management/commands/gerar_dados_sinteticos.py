@@ -0,0 +1,88 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from core.dados_sinteticos import SENHA, GeradorDadosSinteticos
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera um conjunto de dados sintético e determinístico (comerciantes, '
+        'ingredientes, despesas, produtos e histórico de análises) para testes de escala'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('comerciantes', type=int, help='Quantidade de comerciantes (usuários)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador aleatório')
+        parser.add_argument(
+            '--prefixo', default='sintetico',
+            help='Prefixo dos usernames gerados ({prefixo}_00001, ...)'
+        )
+        parser.add_argument('--ingredientes', type=int, default=150, help='Ingredientes por comerciante (média)')
+        parser.add_argument('--despesas-fixas', type=int, default=10, help='Despesas fixas por comerciante (média)')
+        parser.add_argument(
+            '--despesas-variaveis', type=int, default=6, help='Despesas variáveis por comerciante (média)'
+        )
+        parser.add_argument('--produtos', type=int, default=60, help='Produtos por comerciante (média)')
+        parser.add_argument('--anos', type=int, default=3, help='Anos de histórico de análises financeiras')
+        parser.add_argument(
+            '--analises-por-mes', type=int, default=4, help='Análises de cada produto por mês de histórico'
+        )
+        parser.add_argument(
+            '--data-final', type=date.fromisoformat,
+            help='Fim do histórico, AAAA-MM-DD (padrão: hoje); fixe-a para repetir os mesmos dados'
+        )
+        parser.add_argument('--tamanho-lote', type=int, default=5000, help='Registros por INSERT')
+        parser.add_argument(
+            '--remover', action='store_true',
+            help='Remove antes os comerciantes já gerados com o mesmo prefixo'
+        )
+
+    def handle(self, *args, **options):
+        numericas = [
+            'comerciantes', 'ingredientes', 'despesas_fixas', 'despesas_variaveis', 'produtos',
+            'anos', 'analises_por_mes', 'tamanho_lote',
+        ]
+        for nome in numericas:
+            if options[nome] < (0 if nome == 'analises_por_mes' else 1):
+                raise CommandError(f'--{nome.replace("_", "-")} inválido: {options[nome]}.')
+
+        gerador = GeradorDadosSinteticos(
+            options['comerciantes'],
+            semente=options['semente'],
+            prefixo=options['prefixo'],
+            ingredientes=options['ingredientes'],
+            despesas_fixas=options['despesas_fixas'],
+            despesas_variaveis=options['despesas_variaveis'],
+            produtos=options['produtos'],
+            anos=options['anos'],
+            analises_por_mes=options['analises_por_mes'],
+            data_final=options['data_final'],
+            tamanho_lote=options['tamanho_lote'],
+            progresso=self._progresso if options['verbosity'] > 0 else None,
+        )
+
+        existentes = User.objects.filter(username__in=gerador.usernames())
+        if options['remover']:
+            removidos, _ = User.objects.filter(username__startswith=f"{options['prefixo']}_").delete()
+            self.stdout.write(f'{removidos} registro(s) removido(s).')
+        elif existentes.exists():
+            raise CommandError(
+                f'Já existem comerciantes com o prefixo "{options["prefixo"]}". '
+                'Use --remover para gerá-los de novo ou outro --prefixo.'
+            )
+
+        resultado = gerador.gerar()
+        resumo = ', '.join(f'{nome}: {total}' for nome, total in resultado.criados.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.total} registros gerados em {resultado.duracao:.1f} s '
+            f'({resultado.total / resultado.duracao:.0f}/s; {resumo}). Senha dos comerciantes: {SENHA}'
+        ))
+
+    def _progresso(self, username, resultado):
+        self.stdout.write(
+            f'{username}: {resultado.total} registros, '
+            f'{resultado.total / resultado.duracao:.0f}/s'
+        )
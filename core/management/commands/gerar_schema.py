@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.schema import gravar_artefatos
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera o schema OpenAPI da API e o grava em SCHEMA_DIR (openapi.json e '
+        'openapi.yaml). Execute a cada implantação, antes de iniciar os processos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='URL base da API incluída no schema (ex.: https://api.exemplo.com)'
+        )
+
+    def handle(self, *args, **options):
+        versao = gravar_artefatos(options['url'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Schema {versao} gravado em {settings.SCHEMA_DIR}.'
+        ))
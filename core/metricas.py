@@ -0,0 +1,361 @@
+"""
+Métricas por endpoint no formato de exposição do Prometheus.
+
+O MetricasMiddleware mede cada requisição e a atribui ao endpoint resolvido
+(classe da view e ação do ViewSet, ex.: `ProdutoViewSet.calcular`), ao
+método e à classe do status (2xx, 4xx...):
+
+- histograma da duração da requisição e da quantidade de consultas SQL;
+- tempo total gasto nas consultas SQL, na serialização (Serializer.data do
+  DRF) e bytes enviados nas respostas.
+
+As consultas são medidas por um execute_wrapper instalado em cada conexão
+com o banco, e a requisição em andamento é encontrada por uma ContextVar;
+por isso a medição funciona no WSGI (core/wsgi.py) e no ASGI (core/asgi.py),
+em que as views síncronas rodam em outra thread mas herdam o contexto.
+
+Os contadores são do processo e separados por thread: cada thread só altera
+os próprios, sem trava, e a exposição (GET /internal/metrics/) soma todos.
+Com vários processos, o Prometheus deve coletar cada um deles.
+
+Outros módulos podem expor valores próprios com registrar_coletor().
+"""
+import contextvars
+import hmac
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+
+
+PREFIXO = 'impostometro'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+ENDPOINT_NAO_RESOLVIDO = 'nao_resolvido'
+
+
+class Medicao:
+    """Medidas da requisição em andamento"""
+    __slots__ = ('endpoint', 'inicio', 'consultas', 'tempo_sql', 'tempo_serializacao')
+
+    def __init__(self):
+        self.endpoint = ENDPOINT_NAO_RESOLVIDO
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.tempo_serializacao = 0.0
+
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+
+def medicao_atual():
+    """Medição da requisição em andamento neste contexto, ou None"""
+    return _medicao_atual.get()
+
+
+class _Serie:
+    """Acumulados de um endpoint/método/status em uma thread"""
+    __slots__ = (
+        'duracao', 'duracao_soma', 'consultas', 'consultas_soma', 'requisicoes',
+        'tempo_sql', 'tempo_serializacao', 'bytes',
+    )
+
+    def __init__(self):
+        # Contagens por bucket, não acumuladas; a última posição é o +Inf
+        self.duracao = [0] * (len(BUCKETS_DURACAO) + 1)
+        self.consultas = [0] * (len(BUCKETS_CONSULTAS) + 1)
+        self.duracao_soma = 0.0
+        self.consultas_soma = 0
+        self.requisicoes = 0
+        self.tempo_sql = 0.0
+        self.tempo_serializacao = 0.0
+        self.bytes = 0
+
+    def somar(self, outra):
+        for indice, quantidade in enumerate(outra.duracao):
+            self.duracao[indice] += quantidade
+        for indice, quantidade in enumerate(outra.consultas):
+            self.consultas[indice] += quantidade
+        self.duracao_soma += outra.duracao_soma
+        self.consultas_soma += outra.consultas_soma
+        self.requisicoes += outra.requisicoes
+        self.tempo_sql += outra.tempo_sql
+        self.tempo_serializacao += outra.tempo_serializacao
+        self.bytes += outra.bytes
+
+
+def _bucket(buckets, valor):
+    for indice, limite in enumerate(buckets):
+        if valor <= limite:
+            return indice
+    return len(buckets)
+
+
+_local = threading.local()
+_trava_registro = threading.Lock()
+_series_por_thread = []
+_coletores = {}
+
+
+def _series_da_thread():
+    try:
+        return _local.series
+    except AttributeError:
+        series = {}
+        # A trava só é usada na primeira requisição de cada thread
+        with _trava_registro:
+            _series_por_thread.append(series)
+        _local.series = series
+        return series
+
+
+def registrar(medicao, metodo, status, tamanho):
+    """Acumula as medidas de uma requisição concluída"""
+    duracao = time.perf_counter() - medicao.inicio
+    chave = (medicao.endpoint, metodo, f'{status // 100}xx')
+    series = _series_da_thread()
+    serie = series.get(chave)
+    if serie is None:
+        serie = series[chave] = _Serie()
+    serie.duracao[_bucket(BUCKETS_DURACAO, duracao)] += 1
+    serie.consultas[_bucket(BUCKETS_CONSULTAS, medicao.consultas)] += 1
+    serie.duracao_soma += duracao
+    serie.consultas_soma += medicao.consultas
+    serie.requisicoes += 1
+    serie.tempo_sql += medicao.tempo_sql
+    serie.tempo_serializacao += medicao.tempo_serializacao
+    serie.bytes += tamanho
+
+
+def totais():
+    """Séries somadas de todas as threads: (endpoint, método, status) -> _Serie"""
+    with _trava_registro:
+        todas = list(_series_por_thread)
+    resultado = {}
+    for series in todas:
+        # dict() copia de uma vez (sob o GIL), mesmo com a thread dona gravando
+        for chave, serie in dict(series).items():
+            resultado.setdefault(chave, _Serie()).somar(serie)
+    return resultado
+
+
+def zerar():
+    """Descarta as métricas acumuladas (usado nos testes)"""
+    with _trava_registro:
+        for series in _series_por_thread:
+            series.clear()
+
+
+def registrar_coletor(nome, coletor):
+    """
+    Registra uma função que devolve métricas extras, como tuplas
+    (nome, tipo, ajuda, valor); tipo é 'counter' ou 'gauge'.
+    """
+    _coletores[nome] = coletor
+
+
+# Medição das consultas SQL e da serialização
+
+def _medir_consulta(execute, sql, params, many, context):
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.consultas += 1
+        medicao.tempo_sql += time.perf_counter() - inicio
+
+
+def _instalar_na_conexao(sender, connection, **kwargs):
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_consulta)
+
+
+def _instalar_no_drf():
+    # Serializer.data e ListSerializer.data delegam a BaseSerializer.data,
+    # que chama to_representation; os campos aninhados não passam por aqui
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, 'medido', False):
+        return
+
+    def data(self):
+        medicao = _medicao_atual.get()
+        if medicao is None:
+            return original.fget(self)
+        inicio = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            medicao.tempo_serializacao += time.perf_counter() - inicio
+
+    data.medido = True
+    BaseSerializer.data = property(data)
+
+
+def instalar():
+    """Liga a medição das consultas e da serialização (CoreConfig.ready)"""
+    connection_created.connect(_instalar_na_conexao, dispatch_uid='metricas_consultas')
+    _instalar_no_drf()
+
+
+# Middleware
+
+def nome_do_endpoint(request, view_func):
+    """Classe da view e, nos ViewSets, a ação (ex.: ProdutoViewSet.calcular)"""
+    classe = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if classe is None:
+        return getattr(view_func, '__qualname__', ENDPOINT_NAO_RESOLVIDO)
+    acao = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+    return f'{classe.__name__}.{acao}' if acao else classe.__name__
+
+
+def _tamanho(response):
+    if response.streaming:
+        return int(response.headers.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class MetricasMiddleware:
+    """Mede as requisições; deve ser o primeiro da lista MIDDLEWARE"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        if not settings.METRICAS_HABILITADAS:
+            return self.get_response(request)
+        medicao = Medicao()
+        token = _medicao_atual.set(medicao)
+        try:
+            response = self.get_response(request)
+            registrar(medicao, request.method, response.status_code, _tamanho(response))
+            return response
+        finally:
+            _medicao_atual.reset(token)
+
+    async def __acall__(self, request):
+        if not settings.METRICAS_HABILITADAS:
+            return await self.get_response(request)
+        medicao = Medicao()
+        token = _medicao_atual.set(medicao)
+        try:
+            response = await self.get_response(request)
+            registrar(medicao, request.method, response.status_code, _tamanho(response))
+            return response
+        finally:
+            _medicao_atual.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.endpoint = nome_do_endpoint(request, view_func)
+        return None
+
+
+# Exposição
+
+def _rotulos(**rotulos):
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{%s}' % ','.join(f'{nome}="{escapar(valor)}"' for nome, valor in rotulos.items())
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _histograma(linhas, nome, ajuda, series, buckets, atributo, atributo_soma):
+    linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} histogram']
+    for (endpoint, metodo, status), serie in series:
+        rotulos = {'endpoint': endpoint, 'metodo': metodo, 'status': status}
+        acumulado = 0
+        contagens = getattr(serie, atributo)
+        for limite, quantidade in zip((*buckets, '+Inf'), contagens):
+            acumulado += quantidade
+            linhas.append(f'{nome}_bucket{_rotulos(**rotulos, le=limite)} {acumulado}')
+        linhas.append(f'{nome}_sum{_rotulos(**rotulos)} {_numero(getattr(serie, atributo_soma))}')
+        linhas.append(f'{nome}_count{_rotulos(**rotulos)} {acumulado}')
+
+
+def _contador(linhas, nome, ajuda, series, atributo):
+    linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} counter']
+    for (endpoint, metodo, status), serie in series:
+        rotulos = _rotulos(endpoint=endpoint, metodo=metodo, status=status)
+        linhas.append(f'{nome}{rotulos} {_numero(getattr(serie, atributo))}')
+
+
+def exposicao_texto():
+    """Todas as métricas do processo no formato texto do Prometheus"""
+    series = sorted(totais().items())
+    linhas = []
+    _histograma(
+        linhas, f'{PREFIXO}_requisicao_duracao_segundos',
+        'Duração das requisições por endpoint.',
+        series, BUCKETS_DURACAO, 'duracao', 'duracao_soma',
+    )
+    _histograma(
+        linhas, f'{PREFIXO}_requisicao_consultas_sql',
+        'Consultas SQL por requisição.',
+        series, BUCKETS_CONSULTAS, 'consultas', 'consultas_soma',
+    )
+    _contador(
+        linhas, f'{PREFIXO}_sql_duracao_segundos_total',
+        'Tempo gasto nas consultas SQL.', series, 'tempo_sql',
+    )
+    _contador(
+        linhas, f'{PREFIXO}_serializacao_duracao_segundos_total',
+        'Tempo gasto na serialização (Serializer.data).', series, 'tempo_serializacao',
+    )
+    _contador(
+        linhas, f'{PREFIXO}_resposta_bytes_total',
+        'Bytes enviados no corpo das respostas.', series, 'bytes',
+    )
+    for coletor in list(_coletores.values()):
+        for nome, tipo, ajuda, valor in coletor():
+            linhas += [
+                f'# HELP {PREFIXO}_{nome} {ajuda}',
+                f'# TYPE {PREFIXO}_{nome} {tipo}',
+                f'{PREFIXO}_{nome} {_numero(valor)}',
+            ]
+    return '\n'.join(linhas) + '\n'
+
+
+def _autorizado(request):
+    token = settings.METRICAS_TOKEN
+    if token:
+        cabecalho = request.headers.get('Authorization', '')
+        if hmac.compare_digest(cabecalho.encode(), f'Bearer {token}'.encode()):
+            return True
+    usuario = getattr(request, 'user', None)
+    return bool(usuario and usuario.is_staff)
+
+
+@require_safe
+def metricas(request):
+    """
+    GET /internal/metrics/ - métricas do processo para o Prometheus.
+    Exige o token de METRICAS_TOKEN (Authorization: Bearer) ou sessão de staff.
+    """
+    if not _autorizado(request):
+        raise PermissionDenied
+    return HttpResponse(exposicao_texto(), content_type=CONTENT_TYPE)
@@ -0,0 +1,41 @@
+"""
+Funções auxiliares usadas por migrações de dados.
+"""
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def renomear_nomes_repetidos(model, tamanho_maximo=255):
+    """
+    Resolve nomes repetidos por usuário sem diferenciar maiúsculas de
+    minúsculas, antes da criação de uma restrição única em (usuario, Lower(nome)).
+
+    Em cada grupo o registro mais antigo (menor id) mantém o nome; os demais
+    recebem um sufixo numérico: 'Farinha', 'farinha' -> 'Farinha', 'farinha (2)'.
+    """
+    repetidos = (
+        model.objects.order_by()
+        .values('usuario_id', nome_normalizado=Lower('nome'))
+        .annotate(quantidade=Count('id'))
+        .filter(quantidade__gt=1)
+    )
+    for grupo in repetidos:
+        registros = list(
+            model.objects.annotate(nome_normalizado=Lower('nome'))
+            .filter(usuario_id=grupo['usuario_id'], nome_normalizado=grupo['nome_normalizado'])
+            .order_by('id')
+        )
+        usados = {
+            nome.lower() for nome in
+            model.objects.filter(usuario_id=grupo['usuario_id']).values_list('nome', flat=True)
+        }
+        for registro in registros[1:]:
+            numero = 2
+            while True:
+                sufixo = f' ({numero})'
+                novo_nome = registro.nome[:tamanho_maximo - len(sufixo)] + sufixo
+                if novo_nome.lower() not in usados:
+                    break
+                numero += 1
+            usados.add(novo_nome.lower())
+            model.objects.filter(pk=registro.pk).update(nome=novo_nome)
@@ -0,0 +1,206 @@
+"""
+Perfilamento sob demanda de requisições, restrito a staff.
+
+Um usuário staff (sessão do admin ou JWT) que envia o cabeçalho
+`X-Perfilar: 1` ou o parâmetro `?perfilar=1` tem a requisição executada sob o
+cProfile. O resultado fica no cache por PERFILAMENTO_TIMEOUT segundos com
+um identificador, devolvido no cabeçalho `X-Perfil-Id` da resposta, e pode
+ser consultado em GET /internal/perfis/<id>/ (resumo das funções e a linha
+do tempo das consultas SQL) ou baixado no formato do pstats com
+`?formato=pstats` (para snakeviz, `python -m pstats` etc.).
+
+Sem o cabeçalho ou o parâmetro, o middleware só verifica a presença deles;
+o usuário só é autenticado quando a marcação vem na requisição, e as
+consultas SQL só são acompanhadas enquanto há um perfilamento em andamento
+(o execute_wrapper é instalado por requisição, nas conexões da thread).
+
+O cProfile acompanha apenas a thread em que é ligado; por isso o middleware
+é síncrono e, no ASGI, roda junto com a view síncrona na mesma thread.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException, PermissionDenied
+
+from .metricas import ENDPOINT_NAO_RESOLVIDO, nome_do_endpoint
+
+
+CABECALHO = 'HTTP_X_PERFILAR'
+PARAMETRO = 'perfilar'
+
+# Funções listadas no resumo (ordenadas pelo tempo acumulado)
+MAX_FUNCOES = 50
+# Consultas guardadas na linha do tempo; as seguintes só são contadas
+MAX_CONSULTAS = 1000
+
+
+def _chave(identificador):
+    return f'perfil:{identificador}'
+
+
+def _marcada(request):
+    """Se a requisição pede perfilamento (sem ler o corpo)"""
+    if request.META.get(CABECALHO, '') not in ('', '0'):
+        return True
+    # Confere a query string crua antes de montar request.GET
+    if PARAMETRO not in request.META.get('QUERY_STRING', ''):
+        return False
+    return request.GET.get(PARAMETRO, '') not in ('', '0')
+
+
+def usuario_staff(request):
+    """
+    Usuário staff da requisição, pela sessão ou pelo JWT do cabeçalho
+    Authorization; None se não houver.
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario if usuario.is_staff else None
+    from usuarios.autenticacao import JWTAuthenticationComCache
+
+    try:
+        resultado = JWTAuthenticationComCache().authenticate(request)
+    except APIException:
+        return None
+    if resultado is None or not resultado[0].is_staff:
+        return None
+    return resultado[0]
+
+
+class _Perfil:
+    """Dados do perfilamento em andamento"""
+
+    def __init__(self, request, usuario):
+        self.identificador = uuid.uuid4().hex
+        self.request = request
+        self.usuario = usuario
+        self.endpoint = ENDPOINT_NAO_RESOLVIDO
+        self.inicio = time.perf_counter()
+        self.consultas = []
+        self.total_consultas = 0
+        self.tempo_sql = 0.0
+
+    def medir_consulta(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            fim = time.perf_counter()
+            self.total_consultas += 1
+            self.tempo_sql += fim - inicio
+            if len(self.consultas) < MAX_CONSULTAS:
+                self.consultas.append({
+                    'inicio_ms': round((inicio - self.inicio) * 1000, 3),
+                    'duracao_ms': round((fim - inicio) * 1000, 3),
+                    'banco': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                })
+
+    def registro(self, profiler, response):
+        """Dicionário guardado no cache"""
+        duracao = time.perf_counter() - self.inicio
+        resumo = io.StringIO()
+        estatisticas = pstats.Stats(profiler, stream=resumo)
+        estatisticas.sort_stats('cumulative').print_stats(MAX_FUNCOES)
+        return {
+            'id': self.identificador,
+            'horario': timezone.now().isoformat(),
+            'metodo': self.request.method,
+            'caminho': self.request.get_full_path(),
+            'endpoint': self.endpoint,
+            'usuario': self.usuario.get_username(),
+            'status': response.status_code,
+            'duracao_ms': round(duracao * 1000, 3),
+            'sql': {
+                'quantidade': self.total_consultas,
+                'duracao_ms': round(self.tempo_sql * 1000, 3),
+                'consultas': self.consultas,
+            },
+            'resumo': resumo.getvalue(),
+            'estatisticas': marshal.dumps(estatisticas.stats),
+        }
+
+
+class PerfilamentoMiddleware:
+    """
+    Perfila as requisições marcadas de usuários staff. Deve vir depois do
+    AuthenticationMiddleware, para reconhecer a sessão do admin.
+    """
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PERFILAMENTO_HABILITADO or not _marcada(request):
+            return self.get_response(request)
+        usuario = usuario_staff(request)
+        if usuario is None:
+            return self.get_response(request)
+
+        perfil = _Perfil(request, usuario)
+        request._perfil = perfil
+        profiler = cProfile.Profile()
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(perfil.medir_consulta))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+
+        cache.set(
+            _chave(perfil.identificador), perfil.registro(profiler, response),
+            timeout=settings.PERFILAMENTO_TIMEOUT,
+        )
+        response['X-Perfil-Id'] = perfil.identificador
+        response['X-Perfil-Url'] = reverse('perfil', args=[perfil.identificador])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        perfil = getattr(request, '_perfil', None)
+        if perfil is not None:
+            perfil.endpoint = nome_do_endpoint(request, view_func)
+        return None
+
+
+def obter(identificador):
+    """Perfil guardado, ou None se não existir ou tiver expirado"""
+    return cache.get(_chave(identificador))
+
+
+@require_safe
+def perfil(request, identificador):
+    """
+    GET /internal/perfis/<id>/ - resumo e consultas SQL de um perfilamento.
+    Com ?formato=pstats, devolve as estatísticas no formato do pstats.
+    Exige usuário staff (sessão ou JWT).
+    """
+    if usuario_staff(request) is None:
+        # Mesma resposta da DRF para acesso negado
+        return JsonResponse({'detail': str(PermissionDenied.default_detail)}, status=403)
+    registro = obter(identificador)
+    if registro is None:
+        raise Http404('Perfil não encontrado ou expirado.')
+
+    estatisticas = registro.pop('estatisticas')
+    if request.GET.get('formato') == 'pstats':
+        response = HttpResponse(estatisticas, content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="perfil-{identificador}.prof"'
+        return response
+    return JsonResponse(registro, json_dumps_params={'ensure_ascii': False})
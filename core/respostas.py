@@ -0,0 +1,88 @@
+"""
+Cache de respostas de leitura com ETag e GET condicional.
+
+O decorador resposta_versionada() é aplicado a actions GET dos ViewSets
+cujas respostas dependem só dos dados do usuário autenticado. A ETag é
+derivada das versões dos recursos informados (ver core/cache.py), que são
+incrementadas a cada escrita pelos signals de cada app; o cálculo da ETag
+custa uma leitura no cache (get_many) e nenhuma consulta ao banco.
+
+- If-None-Match com a ETag atual: 304, sem executar a view;
+- resposta já calculada para a versão atual: devolvida do cache;
+- caso contrário a view é executada e, se retornar 200, os dados da
+  resposta (antes da renderização) são guardados.
+
+As respostas ficam no cache 'respostas' de CACHES, configurado à parte
+(CACHE_RESPOSTAS_URL): memória local (padrão) ou arquivos (filecache://)
+para implantações em um único servidor, ou um cache compartilhado (Redis,
+Memcached) quando há vários servidores. As versões continuam no cache
+padrão; com mais de um processo, ele também deve ser compartilhado.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import TIMEOUT_PADRAO, etag_corresponde, obter_versoes
+
+
+# Recursos versionados usados só pelas respostas em cache; os demais
+# (rateio, despesas variáveis) são os dos caches de cada app
+PRODUTOS = 'respostas_produtos'
+INGREDIENTES = 'respostas_ingredientes'
+DESPESAS_FIXAS = 'respostas_despesas_fixas'
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def cache_respostas():
+    return caches['respostas']
+
+
+def _identificador(view, request, kwargs, recursos, variacao):
+    usuario_id = request.user.pk
+    partes = [
+        type(view).__name__, view.action, str(usuario_id),
+        *(f'{recurso}={versao}' for recurso, versao in zip(recursos, obter_versoes(recursos, usuario_id))),
+        *(f'{nome}={valor}' for nome, valor in sorted(kwargs.items())),
+        *(f'{nome}={valor}' for nome, valor in sorted(request.query_params.lists())),
+    ]
+    if variacao is not None:
+        partes.append(str(variacao(request)))
+    return hashlib.md5(':'.join(partes).encode('utf-8')).hexdigest()
+
+
+def resposta_versionada(*recursos, variacao=None):
+    """
+    Decorador de actions GET: ETag, 304 e cache da resposta enquanto os
+    recursos do usuário não mudam. `variacao(request)` acrescenta à chave o
+    que mais influencia a resposta além dos parâmetros da URL (ex.: a data
+    de hoje, quando o cálculo depende dela).
+    """
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envolvido(self, request, *args, **kwargs):
+            if not settings.CACHE_RESPOSTAS_HABILITADO:
+                return metodo(self, request, *args, **kwargs)
+
+            identificador = _identificador(self, request, kwargs, recursos, variacao)
+            cabecalhos = {'ETag': f'"{identificador}"', 'Cache-Control': CACHE_CONTROL}
+            if etag_corresponde(request, cabecalhos['ETag']):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+
+            chave = f'resposta:{identificador}'
+            dados = cache_respostas().get(chave)
+            if dados is not None:
+                return Response(dados, headers=cabecalhos)
+
+            response = metodo(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache_respostas().set(chave, response.data, TIMEOUT_PADRAO)
+                for nome, valor in cabecalhos.items():
+                    response[nome] = valor
+            return response
+        return envolvido
+    return decorador
@@ -0,0 +1,153 @@
+"""
+Schema OpenAPI da API, gerado uma vez por implantação.
+
+Gerar o schema com o drf_yasg percorre todos os ViewSets e serializers e
+custa centenas de milissegundos de CPU. O comando `gerar_schema` grava o
+resultado em SCHEMA_DIR (openapi.json e openapi.yaml) durante a implantação;
+cada processo lê os arquivos uma vez e os serve com ETag e Cache-Control de
+longa duração. Sem os arquivos, o schema é gerado na primeira requisição e
+mantido em memória até o fim do processo.
+
+O drf_yasg só é importado aqui dentro das funções, para que processos com a
+documentação desabilitada (DOCUMENTACAO_API = False) não carreguem os
+geradores e renderizadores. As views anotam os endpoints com o
+swagger_auto_schema e o openapi daqui, que com a documentação desabilitada
+não fazem nada; por isso, execute `gerar_schema` com DOCUMENTACAO_API = True.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.views.decorators.http import require_safe
+
+from .cache import etag_corresponde
+
+
+FORMATOS = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+_trava = threading.Lock()
+_artefatos = {}
+
+
+class _Ausente:
+    """Substitui o openapi do drf_yasg: atributos e chamadas devolvem o próprio objeto"""
+
+    def __getattr__(self, nome):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+if settings.DOCUMENTACAO_API:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    openapi = _Ausente()
+
+    def swagger_auto_schema(**kwargs):
+        """Documentação desabilitada: devolve a view sem anotações"""
+        return lambda view: view
+
+
+def informacoes():
+    """Informações gerais exibidas na documentação"""
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Impostômetro API",
+        default_version='v1',
+        description="""
+        API para gerenciamento de despesas, ingredientes, produtos e análise financeira.
+
+        ## Funcionalidades principais:
+        - **Usuários**: Gerenciamento de usuários e autenticação
+        - **Despesas Fixas**: Controle de despesas fixas mensais
+        - **Despesas Variáveis**: Controle de despesas variáveis
+        - **Ingredientes**: Cadastro e gerenciamento de ingredientes
+        - **Produtos**: Cadastro e gerenciamento de produtos
+        - **Análise Financeira**: Relatórios e análises financeiras
+
+        ## Autenticação:
+        Esta API utiliza autenticação JWT (JSON Web Token). Para acessar os endpoints protegidos:
+        1. Faça login através do endpoint `/api/auth/login/`
+        2. Use o token retornado no header Authorization: `Bearer {seu_token}`
+        """,
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="contato@impostometro.com"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+def gerar_schema(url=None):
+    """Gera o schema público da API; retorna um dicionário formato -> bytes"""
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(informacoes(), url=url).get_schema(request=None, public=True)
+    return {
+        'json': OpenAPICodecJson(validators=[]).encode(schema),
+        'yaml': OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def caminho_artefato(formato):
+    return settings.SCHEMA_DIR / f'openapi.{formato}'
+
+
+def versao(conteudo):
+    """Versão (e ETag) de um artefato: resumo do conteúdo"""
+    return hashlib.sha256(conteudo).hexdigest()[:16]
+
+
+def gravar_artefatos(url=None):
+    """Gera o schema e grava os arquivos em SCHEMA_DIR; retorna a versão"""
+    conteudos = gerar_schema(url)
+    settings.SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+    for formato, conteudo in conteudos.items():
+        caminho_artefato(formato).write_bytes(conteudo)
+    descartar_artefatos()
+    return versao(conteudos['json'])
+
+
+def _carregar():
+    try:
+        conteudos = {formato: caminho_artefato(formato).read_bytes() for formato in FORMATOS}
+    except FileNotFoundError:
+        conteudos = gerar_schema()
+    return {
+        formato: (conteudo, '"%s"' % versao(conteudo))
+        for formato, conteudo in conteudos.items()
+    }
+
+
+def obter_artefato(formato):
+    """Conteúdo e ETag do schema no formato pedido"""
+    with _trava:
+        if not _artefatos:
+            _artefatos.update(_carregar())
+        return _artefatos[formato]
+
+
+def descartar_artefatos():
+    """Esquece o schema em memória (relido na próxima requisição)"""
+    with _trava:
+        _artefatos.clear()
+
+
+@require_safe
+def schema(request, format='.json'):
+    """Serve o schema gerado, com ETag e cache de longa duração"""
+    formato = format.lstrip('.')
+    conteudo, etag = obter_artefato(formato)
+    if etag_corresponde(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(conteudo, content_type=FORMATOS[formato])
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.SCHEMA_CACHE_MAX_AGE}'
+    return response
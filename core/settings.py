@@ -54,22 +54,34 @@ THIRD_PARTY_APPS = [
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'django_filters',
-    'drf_yasg',
 ]
 
 LOCAL_APPS = [
+    'core',
     'usuarios',
     'despesafixa',
     'despesavariavel',
     'ingredientes',
     'produtos',
     'analisefinanceira',
+    'importacao',
+    'exportacao',
 ]
 
+# Documentação da API (/swagger/, /redoc/ e o schema OpenAPI); desligada,
+# o drf_yasg não é instalado nem importado (ver core/schema.py)
+DOCUMENTACAO_API = env.bool('DOCUMENTACAO_API', default=DEBUG)
+
+if DOCUMENTACAO_API:
+    THIRD_PARTY_APPS.append('drf_yasg')
+
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    # Primeiro da lista, para medir a requisição inteira (ver core/metricas.py)
+    'core.metricas.MetricasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -78,6 +90,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Depois da autenticação, para reconhecer staff (ver core/perfilamento.py)
+    'core.perfilamento.PerfilamentoMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -108,6 +122,27 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Usado pelos caches derivados por usuário (ver core/cache.py). Com mais de
+# um processo, use um cache compartilhado (ex.: redis://localhost:6379/1).
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+    # Respostas de leitura em cache (ver core/respostas.py); em um único
+    # servidor, também pode ficar em arquivos: filecache:///var/tmp/impostometro
+    'respostas': env.cache('CACHE_RESPOSTAS_URL', default='locmemcache://respostas'),
+}
+
+
+# Autenticação
+# Login por username ou email em uma consulta (ver usuarios/backends.py)
+
+AUTHENTICATION_BACKENDS = [
+    'usuarios.backends.UsernameOuEmailBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -154,18 +189,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
 # Configuração do Django REST Framework
+# Serialização JSON da API
+# Com JSON_RAPIDO, respostas e corpos JSON são codificados pelo orjson, com a
+# mesma saída do renderer do DRF (ver core/json_rapido.py); sem o orjson
+# instalado, o DRF é usado de qualquer forma
+JSON_RAPIDO = env.bool('JSON_RAPIDO', default=True)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'usuarios.autenticacao.JWTAuthenticationComCache',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.json_rapido.JSONRendererRapido' if JSON_RAPIDO else 'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'core.json_rapido.JSONParserRapido' if JSON_RAPIDO else 'rest_framework.parsers.JSONParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -176,13 +217,91 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Configuração das operações em lote (/bulk/)
+# Número máximo de registros aceitos em uma única requisição
+BULK_MAX_ITENS = env.int('BULK_MAX_ITENS', default=1000)
+
+# Configuração da importação de catálogo
+# Número de linhas de cada tipo gravadas por lote (bulk_create)
+IMPORTACAO_TAMANHO_LOTE = env.int('IMPORTACAO_TAMANHO_LOTE', default=1000)
+
+# Configuração da exportação de dados (/api/export/)
+# Registros lidos do banco por vez (iterator com chunk_size)
+EXPORTACAO_CHUNK_SIZE = env.int('EXPORTACAO_CHUNK_SIZE', default=2000)
+
+# Critério padrão de rateio das despesas fixas entre os produtos
+# (volume, tempo_preparo ou igual)
+RATEIO_CRITERIO_PADRAO = env('RATEIO_CRITERIO_PADRAO', default='volume')
+
+# Segundos que o usuário de um token JWT fica em cache entre requisições
+# (ver usuarios/autenticacao.py); alterações no usuário invalidam a entrada
+JWT_USUARIO_CACHE_TIMEOUT = env.int('JWT_USUARIO_CACHE_TIMEOUT', default=300)
+
+# Gravação do último login (last_login) na emissão de tokens (ver
+# usuarios/ultimo_login.py): 'exato' grava a cada login; 'agrupado' acumula
+# os logins em memória e grava em lote a cada ULTIMO_LOGIN_INTERVALO segundos
+# ou ULTIMO_LOGIN_MAX_PENDENTES usuários
+ULTIMO_LOGIN_MODO = env('ULTIMO_LOGIN_MODO', default='agrupado')
+ULTIMO_LOGIN_INTERVALO = env.int('ULTIMO_LOGIN_INTERVALO', default=60)
+ULTIMO_LOGIN_MAX_PENDENTES = env.int('ULTIMO_LOGIN_MAX_PENDENTES', default=500)
+
+# Quantidade de tokens revogados e ainda válidos prevista para o filtro em
+# memória que evita consultar a lista de revogados (ver usuarios/revogacao.py)
+TOKENS_REVOGADOS_CAPACIDADE = env.int('TOKENS_REVOGADOS_CAPACIDADE', default=100000)
+
+# Listagens do admin sem filtro usam a contagem estimada pelo banco em vez
+# de COUNT(*) a partir deste número de linhas (ver core/admin.py)
+ADMIN_CONTAGEM_ESTIMADA_MINIMO = env.int('ADMIN_CONTAGEM_ESTIMADA_MINIMO', default=100000)
+
+# Ações do admin sobre mais registros que este limite rodam em segundo plano
+ADMIN_ACAO_LIMITE_SINCRONO = env.int('ADMIN_ACAO_LIMITE_SINCRONO', default=5000)
+
+# Tarefas em segundo plano (ver core/tarefas.py): 'thread' usa um pool de
+# TAREFAS_MAX_WORKERS threads do processo; 'imediato' executa na hora
+TAREFAS_MODO = env('TAREFAS_MODO', default='thread')
+TAREFAS_MAX_WORKERS = env.int('TAREFAS_MAX_WORKERS', default=2)
+
+# Métricas por endpoint no formato do Prometheus (ver core/metricas.py),
+# expostas em /internal/metrics/ para quem enviar METRICAS_TOKEN
+# (Authorization: Bearer) ou para usuários staff logados
+METRICAS_HABILITADAS = env.bool('METRICAS_HABILITADAS', default=True)
+METRICAS_TOKEN = env('METRICAS_TOKEN', default='')
+
+# Registro de consultas SQL lentas (ver core/consultas_lentas.py): consultas
+# acima de CONSULTAS_LENTAS_LIMITE_MS (0 desliga) são gravadas, com o EXPLAIN,
+# em um arquivo JSON por linha com rotação por tamanho
+CONSULTAS_LENTAS_LIMITE_MS = env.float('CONSULTAS_LENTAS_LIMITE_MS', default=500)
+CONSULTAS_LENTAS_EXPLAIN = env.bool('CONSULTAS_LENTAS_EXPLAIN', default=True)
+# Os parâmetros das consultas podem conter dados pessoais: só são gravados
+# quando habilitado, e nunca os das consultas com tokens, senhas e sessões
+CONSULTAS_LENTAS_PARAMETROS = env.bool('CONSULTAS_LENTAS_PARAMETROS', default=False)
+CONSULTAS_LENTAS_ARQUIVO = Path(env(
+    'CONSULTAS_LENTAS_ARQUIVO', default=str(BASE_DIR / 'logs' / 'consultas_lentas.jsonl')
+))
+CONSULTAS_LENTAS_ARQUIVO_MAX_BYTES = env.int('CONSULTAS_LENTAS_ARQUIVO_MAX_BYTES', default=10 * 1024 * 1024)
+CONSULTAS_LENTAS_ARQUIVOS = env.int('CONSULTAS_LENTAS_ARQUIVOS', default=5)
+
+# Perfilamento sob demanda (ver core/perfilamento.py): requisições de staff com
+# o cabeçalho X-Perfilar ou ?perfilar=1 rodam sob o cProfile, e o resultado
+# fica no cache por PERFILAMENTO_TIMEOUT segundos
+PERFILAMENTO_HABILITADO = env.bool('PERFILAMENTO_HABILITADO', default=True)
+PERFILAMENTO_TIMEOUT = env.int('PERFILAMENTO_TIMEOUT', default=60 * 60)
+
+# Cache das respostas de leitura com ETag (ver core/respostas.py)
+CACHE_RESPOSTAS_HABILITADO = env.bool('CACHE_RESPOSTAS_HABILITADO', default=True)
+
 # Configuração do Simple JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login é gravado por usuarios.ultimo_login (ver ULTIMO_LOGIN_MODO)
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'usuarios.serializers.TokenObtainPairUltimoLoginSerializer',
+    # Verificação de revogação com pré-filtro em memória (ver usuarios/revogacao.py)
+    'TOKEN_REFRESH_SERIALIZER': 'usuarios.serializers.TokenRefreshRevogavelSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'usuarios.serializers.TokenVerifyRevogavelSerializer',
     
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -233,12 +352,19 @@ SWAGGER_SETTINGS = {
     'DEEP_LINKING': True,
     'SHOW_EXTENSIONS': True,
     'DEFAULT_MODEL_RENDERING': 'model',
+    'SPEC_URL': 'schema',
 }
 
 REDOC_SETTINGS = {
     'LAZY_RENDERING': False,
+    'SPEC_URL': 'schema',
 }
 
+# Artefatos do schema OpenAPI gerados por `python manage.py gerar_schema`
+# (ver core/schema.py) e tempo de cache informado aos clientes
+SCHEMA_DIR = Path(env('SCHEMA_DIR', default=str(BASE_DIR / 'schema')))
+SCHEMA_CACHE_MAX_AGE = env.int('SCHEMA_CACHE_MAX_AGE', default=60 * 60 * 24)
+
 # Configurações do CORS Headers
 # Permite requisições de páginas estáticas do GitHub Pages
 CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=[
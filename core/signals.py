@@ -0,0 +1,12 @@
+"""
+Signals compartilhados entre os apps.
+"""
+from django.dispatch import Signal
+
+
+# Enviado após as operações em lote e as importações. bulk_create e
+# bulk_update não disparam post_save, então caches e totais derivados
+# devem ouvir também este signal. Argumentos:
+# - sender: a classe do modelo alterado
+# - usuario_ids: ids dos usuários donos dos registros alterados
+dados_alterados = Signal()
@@ -0,0 +1,16 @@
+'use strict';
+{
+    // Filtro lateral com busca (core/admin.py, FiltroAutocomplete): ao
+    // escolher um valor, recarrega a listagem filtrando por ele
+    const $ = django.jQuery;
+
+    $(function() {
+        $('select.filtro-autocomplete').on('select2:select', function(event) {
+            const parametros = new URLSearchParams(this.dataset.consulta);
+            parametros.delete('p');
+            parametros.delete('e');
+            parametros.set(this.dataset.parametro, event.params.data.id);
+            window.location.search = parametros.toString();
+        });
+    });
+}
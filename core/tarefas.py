@@ -0,0 +1,67 @@
+"""
+Execução de tarefas em segundo plano.
+
+Operações longas disparadas por uma requisição (ex.: ações do admin sobre
+dezenas de milhares de registros) rodam em um pool de threads do processo,
+para não prender a requisição. Cada tarefa usa as próprias conexões com o
+banco, fechadas ao terminar, e as falhas são registradas no log.
+
+O pool é do processo: tarefas em andamento se perdem se ele for encerrado à
+força. Com TAREFAS_MODO = 'imediato' as tarefas rodam na hora, na própria
+thread de quem as agendou (útil em testes e em comandos).
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+MODOS = ('thread', 'imediato')
+
+_trava = threading.Lock()
+_executor = None
+
+
+def _obter_executor():
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TAREFAS_MAX_WORKERS, thread_name_prefix='tarefa'
+            )
+        return _executor
+
+
+def _executar(funcao, args, kwargs, descricao):
+    try:
+        logger.info('Iniciando tarefa: %s', descricao)
+        resultado = funcao(*args, **kwargs)
+        logger.info('Tarefa concluída: %s (%s)', descricao, resultado)
+        return resultado
+    except Exception:
+        logger.exception('Falha na tarefa: %s', descricao)
+        raise
+    finally:
+        # Conexões abertas por esta thread
+        connections.close_all()
+
+
+def agendar(funcao, *args, descricao=None, **kwargs):
+    """
+    Executa funcao(*args, **kwargs) em segundo plano e retorna um Future com
+    o resultado. Querysets passados como argumento são avaliados na tarefa.
+    """
+    if settings.TAREFAS_MODO not in MODOS:
+        raise ImproperlyConfigured(f'TAREFAS_MODO deve ser um de: {", ".join(MODOS)}.')
+    descricao = descricao or funcao.__qualname__
+
+    if settings.TAREFAS_MODO == 'imediato':
+        futuro = Future()
+        futuro.set_result(funcao(*args, **kwargs))
+        return futuro
+    return _obter_executor().submit(_executar, funcao, args, kwargs, descricao)
@@ -0,0 +1,628 @@
+import datetime
+import json
+import marshal
+import os
+import subprocess
+import sys
+import uuid
+import tempfile
+import threading
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from analisefinanceira.models import AnaliseFinanceira
+from core import benchmark, consultas_lentas, metricas, perfilamento, schema, tarefas
+from core.json_rapido import ORJSON_DISPONIVEL, JSONParserRapido, JSONRendererRapido
+from core.admin import PaginadorContagemEstimada, contagem_estimada
+from despesafixa.models import TotalDespesasFixas
+from ingredientes.models import Ingrediente
+from produtos.models import Produto
+
+
+class SchemaArtefatoTest(SimpleTestCase):
+    """Testes do schema OpenAPI servido a partir do artefato gerado"""
+
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio = Path(diretorio.name)
+        configuracao = override_settings(SCHEMA_DIR=self.diretorio, SCHEMA_CACHE_MAX_AGE=3600)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.addCleanup(schema.descartar_artefatos)
+        schema.descartar_artefatos()
+        self.factory = RequestFactory()
+
+    def test_comando_grava_artefatos(self):
+        """Teste se gerar_schema grava o schema em JSON e YAML"""
+        saida = StringIO()
+        call_command('gerar_schema', stdout=saida)
+
+        documento = json.loads((self.diretorio / 'openapi.json').read_bytes())
+        self.assertEqual(documento['info']['title'], 'Impostômetro API')
+        self.assertIn('/despesas-fixas/', documento['paths'])
+        self.assertTrue((self.diretorio / 'openapi.yaml').exists())
+        self.assertIn(schema.versao((self.diretorio / 'openapi.json').read_bytes()), saida.getvalue())
+
+    def test_serve_artefato_com_etag_e_cache(self):
+        """Teste se o schema gravado é servido sem gerar de novo, com ETag e Cache-Control"""
+        (self.diretorio / 'openapi.json').write_bytes(b'{"swagger": "2.0"}')
+        (self.diretorio / 'openapi.yaml').write_bytes(b'swagger: "2.0"\n')
+
+        response = schema.schema(self.factory.get('/api/schema/'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{"swagger": "2.0"}')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+        yaml = schema.schema(self.factory.get('/swagger.yaml'), format='.yaml')
+        self.assertEqual(yaml.content, b'swagger: "2.0"\n')
+        self.assertNotEqual(yaml['ETag'], response['ETag'])
+
+        nao_modificado = schema.schema(
+            self.factory.get('/api/schema/', HTTP_IF_NONE_MATCH=response['ETag'])
+        )
+        self.assertEqual(nao_modificado.status_code, 304)
+        self.assertEqual(nao_modificado['ETag'], response['ETag'])
+
+    def test_sem_artefato_gera_uma_vez(self):
+        """Teste se, sem o artefato, o schema é gerado na primeira requisição e reaproveitado"""
+        primeira = schema.schema(self.factory.get('/api/schema/'))
+        (self.diretorio / 'openapi.json').write_bytes(b'{}')
+        (self.diretorio / 'openapi.yaml').write_bytes(b'{}')
+        segunda = schema.schema(self.factory.get('/api/schema/'))
+
+        self.assertIn('paths', json.loads(primeira.content))
+        self.assertEqual(segunda.content, primeira.content)
+
+    def test_documentacao_desligada_nao_importa_drf_yasg(self):
+        """Teste se, com DOCUMENTACAO_API desligada, as URLs e as views carregam sem o drf_yasg"""
+        codigo = (
+            'import sys, django; django.setup(); '
+            'from django.conf import settings; from django.urls import get_resolver; '
+            'get_resolver().url_patterns; '
+            'print(sorted(m for m in sys.modules if m.split(".")[0] == "drf_yasg")); '
+            'print("drf_yasg" in settings.INSTALLED_APPS)'
+        )
+        ambiente = dict(
+            os.environ, DJANGO_SETTINGS_MODULE='core.settings', DOCUMENTACAO_API='False',
+            SECRET_KEY=settings.SECRET_KEY,
+        )
+        saida = subprocess.run(
+            [sys.executable, '-c', codigo], cwd=settings.BASE_DIR, env=ambiente,
+            capture_output=True, text=True, check=True,
+        ).stdout
+
+        self.assertEqual(saida.split('\n')[:2], ['[]', 'False'])
+
+
+class PaginadorContagemEstimadaTest(TestCase):
+    """Testes da contagem estimada das listagens do admin"""
+
+    def setUp(self):
+        self.Usuario = get_user_model()
+        for indice in range(5):
+            self.Usuario.objects.create(
+                username=f'usuario{indice}', email=f'usuario{indice}@example.com',
+                nome_comercial=f'Loja {indice}'
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        # Linhas criadas depois do ANALYZE ficam fora da estimativa
+        self.Usuario.objects.create(
+            username='novo', email='novo@example.com', nome_comercial='Loja Nova'
+        )
+
+    def test_estimativa_da_tabela(self):
+        """Teste se a estimativa vem das estatísticas do banco"""
+        self.assertEqual(contagem_estimada(self.Usuario), 5)
+
+    @override_settings(ADMIN_CONTAGEM_ESTIMADA_MINIMO=5)
+    def test_sem_filtro_usa_estimativa(self):
+        """Teste se a listagem sem filtro usa a estimativa, sem COUNT(*)"""
+        paginador = PaginadorContagemEstimada(self.Usuario.objects.order_by('pk'), 2)
+        with self.assertNumQueries(2):
+            self.assertEqual(paginador.count, 5)
+
+    @override_settings(ADMIN_CONTAGEM_ESTIMADA_MINIMO=5)
+    def test_com_filtro_conta_exato(self):
+        """Teste se com filtro a contagem é exata"""
+        usuarios = self.Usuario.objects.filter(username__startswith='usuario').order_by('pk')
+        self.assertEqual(PaginadorContagemEstimada(usuarios, 2).count, 5)
+        todos = self.Usuario.objects.filter(is_active=True).order_by('pk')
+        self.assertEqual(PaginadorContagemEstimada(todos, 2).count, 6)
+
+    def test_tabela_pequena_conta_exato(self):
+        """Teste se abaixo do mínimo configurado a contagem é exata"""
+        paginador = PaginadorContagemEstimada(self.Usuario.objects.order_by('pk'), 2)
+        self.assertEqual(paginador.count, 6)
+
+
+class TarefasTest(SimpleTestCase):
+    """Testes das tarefas em segundo plano"""
+
+    @override_settings(TAREFAS_MODO='thread')
+    def test_tarefa_roda_em_outra_thread(self):
+        """Teste se a tarefa roda no pool e devolve o resultado no Future"""
+        futuro = tarefas.agendar(lambda: threading.current_thread().name)
+        self.assertTrue(futuro.result(timeout=5).startswith('tarefa'))
+
+    @override_settings(TAREFAS_MODO='imediato')
+    def test_modo_imediato(self):
+        """Teste se no modo imediato a tarefa roda na hora, na mesma thread"""
+        futuro = tarefas.agendar(sum, [1, 2, 3])
+        self.assertTrue(futuro.done())
+        self.assertEqual(futuro.result(), 6)
+
+    @override_settings(TAREFAS_MODO='celery')
+    def test_modo_invalido(self):
+        with self.assertRaises(ImproperlyConfigured):
+            tarefas.agendar(sum, [1])
+
+
+@override_settings(METRICAS_TOKEN='segredo')
+class MetricasTest(TestCase):
+    """Testes das métricas por endpoint"""
+
+    def setUp(self):
+        metricas.zerar()
+        self.usuario = get_user_model().objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        self.autorizacao = f'Bearer {RefreshToken.for_user(self.usuario).access_token}'
+
+    def coletar(self):
+        response = self.client.get('/internal/metrics/', HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metricas.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_mede_endpoint_e_acao(self):
+        """Teste se a requisição é atribuída ao ViewSet e à ação, com as consultas SQL"""
+        response = self.client.get('/api/despesas-fixas/', HTTP_AUTHORIZATION=self.autorizacao)
+        self.assertEqual(response.status_code, 200)
+
+        texto = self.coletar()
+        rotulos = 'endpoint="DespesaFixaViewSet.list",metodo="GET",status="2xx"'
+        self.assertIn(f'impostometro_requisicao_duracao_segundos_count{{{rotulos}}} 1', texto)
+        self.assertIn(f'impostometro_requisicao_duracao_segundos_bucket{{{rotulos},le="+Inf"}} 1', texto)
+        self.assertRegex(texto, rf'impostometro_requisicao_consultas_sql_sum{{{rotulos}}} [1-9]')
+        self.assertIn(f'impostometro_resposta_bytes_total{{{rotulos}}} {len(response.content)}', texto)
+        self.assertIn(f'impostometro_serializacao_duracao_segundos_total{{{rotulos}}}', texto)
+        self.assertIn('impostometro_cache_usuarios_consultas_total', texto)
+
+    async def test_mede_requisicoes_asgi(self):
+        """Teste se a medição funciona pelo handler ASGI"""
+        response = await self.async_client.get(
+            '/api/despesas-fixas/', headers={'Authorization': self.autorizacao}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        texto = metricas.exposicao_texto()
+        self.assertRegex(
+            texto,
+            r'impostometro_requisicao_consultas_sql_sum\{endpoint="DespesaFixaViewSet.list",'
+            r'metodo="GET",status="2xx"\} [1-9]'
+        )
+
+    def test_exige_token_ou_staff(self):
+        """Teste se a exposição é restrita ao token configurado ou a staff"""
+        self.assertEqual(self.client.get('/internal/metrics/').status_code, 403)
+        response = self.client.get('/internal/metrics/', HTTP_AUTHORIZATION='Bearer errado')
+        self.assertEqual(response.status_code, 403)
+
+        self.usuario.is_staff = True
+        self.usuario.save()
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get('/internal/metrics/').status_code, 200)
+
+
+class PerfilamentoTest(TestCase):
+    """Testes do perfilamento sob demanda"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123',
+            nome_comercial='Loja Teste', is_staff=True
+        )
+        self.autorizacao = f'Bearer {RefreshToken.for_user(self.usuario).access_token}'
+
+    def test_perfila_requisicao_marcada_de_staff(self):
+        """Teste se a requisição marcada é perfilada e o perfil pode ser consultado"""
+        response = self.client.get(
+            '/api/produtos/stats/?perfilar=1', HTTP_AUTHORIZATION=self.autorizacao
+        )
+        self.assertEqual(response.status_code, 200)
+        identificador = response['X-Perfil-Id']
+        self.assertEqual(response['X-Perfil-Url'], f'/internal/perfis/{identificador}/')
+
+        response = self.client.get(
+            f'/internal/perfis/{identificador}/', HTTP_AUTHORIZATION=self.autorizacao
+        )
+        self.assertEqual(response.status_code, 200)
+        dados = response.json()
+        self.assertEqual(dados['endpoint'], 'ProdutoViewSet.stats')
+        self.assertEqual(dados['usuario'], 'testuser')
+        self.assertEqual(dados['status'], 200)
+        self.assertGreater(dados['sql']['quantidade'], 0)
+        self.assertEqual(len(dados['sql']['consultas']), dados['sql']['quantidade'])
+        self.assertIn('SELECT', dados['sql']['consultas'][0]['sql'])
+        self.assertIn('cumulative', dados['resumo'])
+
+        response = self.client.get(
+            f'/internal/perfis/{identificador}/?formato=pstats', HTTP_X_PERFILAR='0',
+            HTTP_AUTHORIZATION=self.autorizacao,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertTrue(marshal.loads(response.content))
+
+    def test_ignora_requisicao_sem_marcacao_ou_de_nao_staff(self):
+        """Teste se só requisições marcadas de staff são perfiladas"""
+        response = self.client.get('/api/produtos/stats/', HTTP_AUTHORIZATION=self.autorizacao)
+        self.assertNotIn('X-Perfil-Id', response)
+
+        self.usuario.is_staff = False
+        self.usuario.save()
+        response = self.client.get(
+            '/api/produtos/stats/', HTTP_X_PERFILAR='1', HTTP_AUTHORIZATION=self.autorizacao
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Perfil-Id', response)
+
+    def test_consulta_exige_staff(self):
+        """Teste se a consulta do perfil é restrita a staff"""
+        response = self.client.get(
+            '/api/produtos/stats/', HTTP_X_PERFILAR='1', HTTP_AUTHORIZATION=self.autorizacao
+        )
+        url = response['X-Perfil-Url']
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get('/internal/perfis/inexistente/').status_code, 404)
+        self.assertIsNotNone(perfilamento.obter(url.rstrip('/').rsplit('/', 1)[-1]))
+
+
+class ConsultasLentasTest(TestCase):
+    """Testes do registro de consultas lentas"""
+
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.arquivo = Path(diretorio.name) / 'consultas_lentas.jsonl'
+        # Limite mínimo: toda consulta é registrada
+        configuracao = override_settings(
+            CONSULTAS_LENTAS_ARQUIVO=self.arquivo, CONSULTAS_LENTAS_LIMITE_MS=0.0001
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.usuario = get_user_model().objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        self.autorizacao = f'Bearer {RefreshToken.for_user(self.usuario).access_token}'
+
+    @override_settings(CONSULTAS_LENTAS_PARAMETROS=True)
+    def test_registra_consulta_com_endpoint_pilha_e_explain(self):
+        """Teste se a consulta lenta é gravada com endpoint, parâmetros, pilha e EXPLAIN"""
+        response = self.client.get(
+            '/api/analises-financeiras/?search=bolo&ordering=-lucro_previsto',
+            HTTP_AUTHORIZATION=self.autorizacao
+        )
+        self.assertEqual(response.status_code, 200)
+
+        registros = [
+            registro for registro in consultas_lentas.ler_registros([self.arquivo])
+            if 'analisefinanceira_analisefinanceira' in registro['sql']
+        ]
+        self.assertTrue(registros)
+        registro = registros[-1]
+        self.assertEqual(registro['endpoint'], 'AnaliseFinanceiraViewSet.list')
+        self.assertIn('%bolo%', registro['parametros'])
+        self.assertTrue(any(quadro.startswith('core/tests.py:') for quadro in registro['pilha']))
+        self.assertFalse(any(quadro.startswith('core/metricas.py:') for quadro in registro['pilha']))
+        self.assertRegex(registro['explain'], r'SCAN|SEARCH')
+
+    def test_parametros_sensiveis_nao_sao_gravados(self):
+        """Teste se parâmetros só são gravados quando habilitados, e nunca os de tokens e senhas"""
+        self.usuario.set_password('novasenha123')
+        self.usuario.save()
+        registros = consultas_lentas.ler_registros([self.arquivo])
+        self.assertTrue(registros)
+        self.assertTrue(all(registro['parametros'] is None for registro in registros))
+
+        arquivo = self.arquivo.with_name('com_parametros.jsonl')
+        with override_settings(
+            CONSULTAS_LENTAS_PARAMETROS=True, CONSULTAS_LENTAS_ARQUIVO=arquivo, ULTIMO_LOGIN_MODO='exato'
+        ):
+            response = self.client.post(
+                '/api/usuarios/login/', {'username': 'testuser', 'password': 'novasenha123'},
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.usuario.set_password('outrasenha123')
+            self.usuario.save()
+
+        conteudo = arquivo.read_text(encoding='utf-8')
+        self.assertNotIn(response.data['tokens']['refresh'], conteudo)
+        self.assertNotIn(self.usuario.password, conteudo)
+        sensiveis = [
+            registro for registro in consultas_lentas.ler_registros([arquivo])
+            if 'token_blacklist_outstandingtoken' in registro['sql'] or 'password' in registro['sql']
+        ]
+        self.assertTrue(sensiveis)
+        for registro in sensiveis:
+            self.assertEqual(registro['parametros'], consultas_lentas.PARAMETROS_OMITIDOS)
+            self.assertIsNone(registro['explain'])
+
+    def test_impressao_digital_ignora_valores(self):
+        """Teste se execuções com valores e listas diferentes têm a mesma impressão digital"""
+        digital_a, _ = consultas_lentas.impressao_digital('SELECT * FROM t WHERE id IN (%s, %s) AND x = 1')
+        digital_b, _ = consultas_lentas.impressao_digital("SELECT * FROM t WHERE id IN (%s) AND x = 'a'")
+        self.assertEqual(digital_a, digital_b)
+
+    def test_comando_agrega_piores_consultas(self):
+        """Teste se o comando agrupa por impressão digital e ordena pelo tempo total"""
+        arquivo = self.arquivo.with_name('gravadas.jsonl')
+        configuracao = override_settings(CONSULTAS_LENTAS_ARQUIVO=arquivo, CONSULTAS_LENTAS_LIMITE_MS=0)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        for duracao, sql in [(5, 'SELECT 1 FROM a WHERE id = 1'), (7, 'SELECT 1 FROM a WHERE id = 2'),
+                             (9, 'SELECT 1 FROM b')]:
+            consultas_lentas.gravar({
+                'horario': '2026-01-01T00:00:00', 'duracao_ms': duracao,
+                'impressao_digital': consultas_lentas.impressao_digital(sql)[0],
+                'endpoint': 'ProdutoViewSet.list', 'sql': sql, 'parametros': '()',
+                'pilha': [], 'explain': 'SCAN a',
+            })
+
+        saida = StringIO()
+        call_command('consultas_lentas', '--explain', stdout=saida)
+        texto = saida.getvalue()
+        self.assertIn('2 consulta(s) distinta(s)', texto)
+        self.assertIn('2x, total 12.0 ms', texto)
+        self.assertLess(texto.index('FROM a'), texto.index('FROM b'))
+        self.assertIn('SCAN a', texto)
+
+
+class GerarDadosSinteticosTest(TestCase):
+    """Testes do gerador de dados sintéticos"""
+
+    def gerar(self, *args):
+        saida = StringIO()
+        call_command(
+            'gerar_dados_sinteticos', '2', '--ingredientes', '20', '--produtos', '4',
+            '--anos', '1', '--analises-por-mes', '2', '--data-final', '2026-01-01',
+            '--tamanho-lote', '50', *args, stdout=saida,
+        )
+        return saida.getvalue()
+
+    def test_gera_conjunto_completo(self):
+        """Teste se os comerciantes recebem catálogo, componentes e histórico"""
+        saida = self.gerar()
+        self.assertIn('registros gerados', saida)
+
+        usuarios = get_user_model().objects.filter(username__startswith='sintetico_')
+        self.assertEqual(usuarios.count(), 2)
+        for usuario in usuarios:
+            self.assertTrue(usuario.check_password('Sintetico#2026'))
+            self.assertTrue(10 <= usuario.ingredientes.count() <= 30)
+            total = TotalDespesasFixas.objects.get(usuario=usuario)
+            self.assertEqual(total.quantidade_total, usuario.despesas_fixas.count())
+
+        for produto in Produto.objects.filter(usuario__in=usuarios):
+            componentes = produto.produto_ingredientes.count()
+            self.assertTrue(5 <= componentes <= produto.usuario.ingredientes.count())
+            self.assertEqual(produto.analises_financeiras.count(), 12 * 2)
+
+        analises = AnaliseFinanceira.objects.filter(produto__usuario__in=usuarios)
+        datas = analises.values_list('created_at', flat=True)
+        self.assertLess(min(datas).date().isoformat(), '2025-02-01')
+        self.assertLess(max(datas).date().isoformat(), '2026-01-02')
+        analise = analises.first()
+        self.assertEqual(
+            analise.custo_total_producao,
+            analise.custo_ingredientes + analise.custo_despesas_fixas + analise.custo_despesas_variaveis
+        )
+
+    def test_mesma_semente_gera_mesmos_dados(self):
+        """Teste se a geração é determinística e se --remover refaz o conjunto"""
+        def catalogo():
+            return list(
+                Ingrediente.objects.filter(usuario__username__startswith='sintetico_')
+                .order_by('usuario__username', 'nome')
+                .values_list('usuario__username', 'nome', 'preco_por_unidade', 'created_at')
+            )
+
+        self.gerar()
+        primeiro = catalogo()
+        with self.assertRaises(CommandError):
+            self.gerar()
+
+        self.gerar('--remover')
+        self.assertEqual(catalogo(), primeiro)
+
+        self.gerar('--remover', '--semente', '7')
+        self.assertNotEqual(catalogo(), primeiro)
+
+
+class BenchmarkEndpointsTest(TestCase):
+    """Testes do benchmark dos endpoints"""
+
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio = Path(diretorio.name)
+
+    def executar(self, *args):
+        call_command(
+            'benchmark_endpoints', '--tamanhos', 'pequeno', '--repeticoes', '2',
+            '--aquecimento', '1', *args, stdout=StringIO(), stderr=StringIO(),
+        )
+
+    def test_grava_resultado_e_desfaz_dados(self):
+        """Teste se o resultado traz as medidas de cada cenário e os dados são desfeitos"""
+        saida = self.diretorio / 'resultado.json'
+        self.executar('--saida', str(saida))
+
+        resultado = json.loads(saida.read_text())['tamanhos']['pequeno']
+        self.assertEqual(set(resultado), {cenario.nome for cenario in benchmark.CENARIOS})
+        for nome, medidas in resultado.items():
+            self.assertEqual(medidas['status'], 200, nome)
+            self.assertLessEqual(medidas['p50_ms'], medidas['p99_ms'])
+            self.assertGreater(medidas['memoria_pico_kb'], 0)
+        self.assertGreater(resultado['produtos.calcular']['consultas'], 0)
+        # Sem o cache de respostas, as views são medidas a cada requisição
+        for nome in ('produtos.stats', 'produtos.calcular', 'ingredientes.stats', 'despesas_fixas.estatisticas'):
+            self.assertLess(resultado[f'{nome}.cache']['consultas'], resultado[nome]['consultas'], nome)
+        self.assertFalse(get_user_model().objects.filter(username__startswith='benchmark_').exists())
+
+    def test_falha_com_regressao(self):
+        """Teste se consultas acima do orçamento ou latência acima da tolerância falham"""
+        baseline = self.diretorio / 'baseline.json'
+        self.executar('--baseline', str(baseline), '--atualizar-baseline')
+        relatorio = json.loads(baseline.read_text())
+        self.assertEqual(benchmark.comparar(relatorio, relatorio), [])
+
+        relatorio['tamanhos']['pequeno']['produtos.calcular']['consultas'] -= 1
+        baseline.write_text(json.dumps(relatorio))
+        with self.assertRaisesMessage(CommandError, 'regressão'):
+            self.executar('--baseline', str(baseline), '--tolerancia', '100000')
+
+        medidas = {'status': 200, 'consultas': 1, 'p95_ms': 10, 'memoria_pico_kb': 10}
+        base = {'tamanhos': {'pequeno': {'x': medidas}}}
+        atual = {'tamanhos': {'pequeno': {'x': {**medidas, 'p95_ms': 13}}}}
+        self.assertEqual(benchmark.comparar(atual, base, tolerancia=0.5), [])
+        self.assertEqual(len(benchmark.comparar(atual, base, tolerancia=0.25)), 1)
+
+
+class RespostasEmCacheTest(TestCase):
+    """Testes do cache de respostas com o backend em arquivos"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        self.autorizacao = f'Bearer {RefreshToken.for_user(self.usuario).access_token}'
+
+    def test_backend_em_arquivos(self):
+        """Teste se as respostas podem ficar em arquivos e são invalidadas nas escritas"""
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'respostas': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': diretorio.name,
+            },
+        }
+        with override_settings(CACHES=caches):
+            response = self.client.get('/api/despesas-fixas/total/', HTTP_AUTHORIZATION=self.autorizacao)
+            self.assertEqual(response.data['quantidade_despesas'], 0)
+            self.assertTrue(any(Path(diretorio.name).iterdir()))
+
+            response = self.client.post(
+                '/api/despesas-fixas/', {'nome': 'Aluguel', 'valor': '1500.00'},
+                content_type='application/json', HTTP_AUTHORIZATION=self.autorizacao,
+            )
+            self.assertEqual(response.status_code, 201)
+            response = self.client.get('/api/despesas-fixas/total/', HTTP_AUTHORIZATION=self.autorizacao)
+            self.assertEqual(response.data['quantidade_despesas'], 1)
+
+    @override_settings(CACHE_RESPOSTAS_HABILITADO=False)
+    def test_desabilitado(self):
+        """Teste se, desabilitado, o endpoint responde sem ETag"""
+        response = self.client.get('/api/ingredientes/stats/', HTTP_AUTHORIZATION=self.autorizacao)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class JSONRapidoTest(SimpleTestCase):
+    """Testes do renderer e do parser JSON com o orjson"""
+
+    DADOS = {
+        'id': 1,
+        'preco': Decimal('12.50'),
+        'custo': Decimal('0.1000000000000000055511151231257827'),
+        'criado': datetime.datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'local': datetime.datetime(2026, 3, 1, 9, 30, 15, tzinfo=datetime.timezone(datetime.timedelta(hours=-3))),
+        'data': datetime.date(2026, 3, 1),
+        'hora': datetime.time(8, 15, 0, 500000),
+        'duracao': datetime.timedelta(hours=1, seconds=30),
+        'codigo': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'rotulo': gettext_lazy('Produto'),
+        'texto': 'Pão de mel "especial"\n\t/ \x01 \u2028\u2029 😀',
+        'numeros': (1, 2.5, -0.0, 0.001, 1234567.891, True, None),
+        2: 'chave inteira',
+        'lista': [{'margem': Decimal('45.00')}],
+    }
+
+    def setUp(self):
+        if not ORJSON_DISPONIVEL:
+            self.skipTest('orjson não instalado')
+
+    def test_mesmos_bytes_do_drf(self):
+        """Teste se a saída é a mesma do JSONRenderer do DRF"""
+        self.assertEqual(JSONRendererRapido().render(self.DADOS), JSONRenderer().render(self.DADOS))
+        self.assertIn(b'\\u2028', JSONRendererRapido().render(self.DADOS))
+        self.assertEqual(JSONRendererRapido().render(None), b'')
+
+    def test_floats_pequenos_e_grandes(self):
+        """Teste se floats que o json da biblioteca padrão escreve em notação científica saem iguais"""
+        dados = {
+            'custo_total': float(Decimal('0.001') * Decimal('0.01')),
+            'custos': [float(Decimal('0.003') * Decimal('0.02')), 1e-7, -0.00005, 1e16, -2.5e21, 0.0001],
+            'nome': 'Bolo 3e5',
+        }
+        self.assertEqual(JSONRendererRapido().render(dados), JSONRenderer().render(dados))
+        self.assertIn(b'"custo_total":1e-05', JSONRendererRapido().render(dados))
+
+    def test_casos_recusados_usam_o_drf(self):
+        """Teste se indentação e inteiros grandes passam pelo renderer do DRF"""
+        dados = {'grande': 2 ** 70, 'lista': [1, 2]}
+        self.assertEqual(JSONRendererRapido().render(dados), JSONRenderer().render(dados))
+        self.assertEqual(
+            JSONRendererRapido().render(dados, 'application/json; indent=4'),
+            JSONRenderer().render(dados, 'application/json; indent=4'),
+        )
+        with self.assertRaises(TypeError):
+            JSONRendererRapido().render({'objeto': object()})
+
+    def test_parser(self):
+        """Teste se o parser retorna os mesmos dados e erros do JSONParser do DRF"""
+        corpo = JSONRenderer().render({k: v for k, v in self.DADOS.items() if k != 2})
+        self.assertEqual(JSONParserRapido().parse(BytesIO(corpo)), JSONParser().parse(BytesIO(corpo)))
+        self.assertEqual(JSONParserRapido().parse(BytesIO(b'"\\ud800"')), '\ud800')
+
+        for invalido in (b'{"nome": ', b'{"valor": NaN}'):
+            with self.assertRaises(ParseError) as rapido:
+                JSONParserRapido().parse(BytesIO(invalido))
+            with self.assertRaises(ParseError) as drf:
+                JSONParser().parse(BytesIO(invalido))
+            self.assertEqual(str(rapido.exception), str(drf.exception))
+
+    def test_pagina_de_analises(self):
+        """Teste se a página de análises do benchmark sai idêntica e mais rápida"""
+        resultado = benchmark.medir_json(linhas=200, repeticoes=3)
+        self.assertTrue(resultado['identico'])
+        self.assertEqual(set(resultado['renderizacao_ms']), {'drf', 'rapido'})
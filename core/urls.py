@@ -22,38 +22,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-# Configuração do schema do Swagger
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Impostômetro API",
-        default_version='v1',
-        description="""
-        API para gerenciamento de despesas, ingredientes, produtos e análise financeira.
-        
-        ## Funcionalidades principais:
-        - **Usuários**: Gerenciamento de usuários e autenticação
-        - **Despesas Fixas**: Controle de despesas fixas mensais
-        - **Despesas Variáveis**: Controle de despesas variáveis
-        - **Ingredientes**: Cadastro e gerenciamento de ingredientes
-        - **Produtos**: Cadastro e gerenciamento de produtos
-        - **Análise Financeira**: Relatórios e análises financeiras
-        
-        ## Autenticação:
-        Esta API utiliza autenticação JWT (JSON Web Token). Para acessar os endpoints protegidos:
-        1. Faça login através do endpoint `/api/auth/login/`
-        2. Use o token retornado no header Authorization: `Bearer {seu_token}`
-        """,
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contato@impostometro.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from core import metricas, perfilamento, schema
 
 urlpatterns = [
     # Admin
@@ -66,23 +35,45 @@ urlpatterns = [
     path('', include('ingredientes.urls')),
     path('', include('produtos.urls')),
     path('', include('analisefinanceira.urls')),
+    path('', include('importacao.urls')),
+    path('', include('exportacao.urls')),
     
     # JWT Authentication endpoints (alternativa aos endpoints customizados)
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+
+    # Métricas do processo para o Prometheus (ver core/metricas.py)
+    path('internal/metrics/', metricas.metricas, name='metricas'),
+
+    # Perfis de requisições marcadas por staff (ver core/perfilamento.py)
+    path('internal/perfis/<str:identificador>/', perfilamento.perfil, name='perfil'),
 ]
 
-# URLs do Swagger - apenas em desenvolvimento
-if settings.DEBUG:
+# Documentação da API (DOCUMENTACAO_API; por padrão, apenas em desenvolvimento).
+# O schema é servido a partir do artefato gerado por `gerar_schema` (ver
+# core/schema.py); o drf_yasg só é importado quando a documentação está ativa.
+if settings.DOCUMENTACAO_API:
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    # As telas carregam o schema de /api/schema/ (SPEC_URL) e não o geram
+    schema_view = get_schema_view(
+        schema.informacoes(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
     urlpatterns += [
+        # Schema JSON/YAML
+        re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema.schema, name='schema-json'),
+
         # Swagger UI
-        re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
         re_path(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-        
+
         # ReDoc UI (alternativa ao Swagger UI)
         re_path(r'^redoc/$', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-        
+
         # Schema JSON (para download)
-        path('api/schema/', schema_view.without_ui(cache_timeout=0), name='schema'),
+        path('api/schema/', schema.schema, name='schema'),
     ]
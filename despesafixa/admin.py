@@ -1,9 +1,12 @@
 from django.contrib import admin
-from .models import DespesaFixa
+
+from core.admin import AcoesEmLoteMixin, FiltroAutocomplete, ListagemGrandeMixin
+from core.bulk import alterar_ativa
+from .models import DespesaFixa, TotalDespesasFixas
 
 
 @admin.register(DespesaFixa)
-class DespesaFixaAdmin(admin.ModelAdmin):
+class DespesaFixaAdmin(AcoesEmLoteMixin, ListagemGrandeMixin, admin.ModelAdmin):
     """
     Configuração do admin para o modelo DespesaFixa.
     """
@@ -12,7 +15,7 @@ class DespesaFixaAdmin(admin.ModelAdmin):
         'created_at', 'updated_at'
     ]
     list_filter = [
-        'ativa', 'created_at', 'updated_at', 'usuario'
+        'ativa', 'created_at', 'updated_at', ('usuario', FiltroAutocomplete)
     ]
     search_fields = [
         'nome', 'descricao', 'usuario__username', 
@@ -22,6 +25,7 @@ class DespesaFixaAdmin(admin.ModelAdmin):
         'created_at', 'updated_at', 'valor_formatado', 'status_text'
     ]
     ordering = ['-created_at']
+    autocomplete_fields = ['usuario']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -37,10 +41,32 @@ class DespesaFixaAdmin(admin.ModelAdmin):
         }),
     )
     
+    actions = ['ativar_despesas', 'desativar_despesas']
+
     def get_queryset(self, request):
         """Otimiza as consultas incluindo o usuário relacionado"""
         return super().get_queryset(request).select_related('usuario')
     
+    def ativar_despesas(self, request, queryset):
+        """Ativa as despesas selecionadas"""
+        alteradas = self.executar_em_lote(
+            request, queryset, alterar_ativa, True, descricao='Ativação de despesas'
+        )
+        if alteradas is not None:
+            self.message_user(request, f'{alteradas} despesa(s) foram ativadas com sucesso.')
+    ativar_despesas.short_description = 'Ativar despesas selecionadas'
+    ativar_despesas.allowed_permissions = ('change',)
+
+    def desativar_despesas(self, request, queryset):
+        """Desativa as despesas selecionadas"""
+        alteradas = self.executar_em_lote(
+            request, queryset, alterar_ativa, False, descricao='Desativação de despesas'
+        )
+        if alteradas is not None:
+            self.message_user(request, f'{alteradas} despesa(s) foram desativadas com sucesso.')
+    desativar_despesas.short_description = 'Desativar despesas selecionadas'
+    desativar_despesas.allowed_permissions = ('change',)
+    
     def has_change_permission(self, request, obj=None):
         """Permite edição apenas pelo próprio usuário ou superusuário"""
         if obj is not None and not request.user.is_superuser:
@@ -52,3 +78,23 @@ class DespesaFixaAdmin(admin.ModelAdmin):
         if obj is not None and not request.user.is_superuser:
             return obj.usuario == request.user
         return True
+
+
+@admin.register(TotalDespesasFixas)
+class TotalDespesasFixasAdmin(admin.ModelAdmin):
+    """
+    Consulta dos totais de despesas fixas por usuário.
+    Os totais são mantidos automaticamente e não podem ser editados.
+    """
+    list_display = [
+        'usuario', 'quantidade_ativas', 'valor_ativas',
+        'quantidade_inativas', 'valor_inativas', 'updated_at'
+    ]
+    search_fields = ['usuario__username', 'usuario__nome_comercial']
+    list_select_related = ['usuario']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
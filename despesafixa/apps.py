@@ -5,3 +5,9 @@ class DespesafixaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'despesafixa'
     verbose_name = 'Despesas Fixas'
+
+    def ready(self):
+        """
+        Registra os signals que mantêm os totais de despesas fixas.
+        """
+        from . import signals  # noqa: F401
@@ -59,6 +59,7 @@ class DespesaFixaFilter(django_filters.FilterSet):
             'nome': ['exact', 'icontains'],
             'descricao': ['icontains'],
             'valor': ['exact', 'gte', 'lte'],
+            'recorrencia': ['exact'],
         }
 
     def filter_search(self, queryset, name, value):
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from despesafixa.models import DespesaFixa, TotalDespesasFixas
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula os totais de despesas fixas de todos os usuários a partir das '
+        'despesas e aponta divergências em relação aos totais mantidos incrementalmente'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corrigir', action='store_true',
+            help='Grava os valores recalculados nos totais divergentes'
+        )
+
+    def handle(self, *args, **options):
+        zerados = {campo: 0 for campo in TotalDespesasFixas.CAMPOS}
+        calculados = {
+            linha.pop('usuario'): linha
+            for linha in DespesaFixa.objects.order_by().values('usuario').annotate(
+                **TotalDespesasFixas.agregacoes()
+            )
+        }
+        gravados = {
+            totais.pk: totais for totais in TotalDespesasFixas.objects.iterator()
+        }
+
+        divergentes = []
+        for usuario_id in sorted(calculados.keys() | gravados.keys()):
+            esperado = calculados.get(usuario_id, zerados)
+            totais = gravados.get(usuario_id)
+            if totais is None:
+                # Totais ainda não criados: serão calculados no primeiro acesso
+                continue
+            diferencas = {
+                campo: (getattr(totais, campo), esperado[campo])
+                for campo in TotalDespesasFixas.CAMPOS
+                if Decimal(getattr(totais, campo)) != Decimal(esperado[campo])
+            }
+            if diferencas:
+                divergentes.append(usuario_id)
+                detalhes = ', '.join(
+                    f'{campo}: {atual} (esperado {correto})'
+                    for campo, (atual, correto) in diferencas.items()
+                )
+                self.stdout.write(f'Usuário {usuario_id}: {detalhes}')
+
+        if not divergentes:
+            self.stdout.write(self.style.SUCCESS(
+                f'Totais de {len(gravados)} usuário(s) conferidos, nenhuma divergência.'
+            ))
+            return
+
+        if not options['corrigir']:
+            raise CommandError(
+                f'{len(divergentes)} usuário(s) com totais divergentes. '
+                'Execute com --corrigir para recalculá-los.'
+            )
+
+        for usuario_id in divergentes:
+            TotalDespesasFixas.recalcular(usuario_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Totais de {len(divergentes)} usuário(s) corrigidos.'
+        ))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:53
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def calcular_totais(apps, schema_editor):
+    DespesaFixa = apps.get_model('despesafixa', 'DespesaFixa')
+    TotalDespesasFixas = apps.get_model('despesafixa', 'TotalDespesasFixas')
+    totais = (
+        DespesaFixa.objects.order_by()
+        .values('usuario_id')
+        .annotate(
+            quantidade_ativas=Count('id', filter=Q(ativa=True)),
+            quantidade_inativas=Count('id', filter=Q(ativa=False)),
+            valor_ativas=Sum('valor', filter=Q(ativa=True), default=Decimal('0.00')),
+            valor_inativas=Sum('valor', filter=Q(ativa=False), default=Decimal('0.00')),
+        )
+    )
+    TotalDespesasFixas.objects.bulk_create(
+        [TotalDespesasFixas(**linha) for linha in totais], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('despesafixa', '0001_initial'),
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TotalDespesasFixas',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='totais_despesas_fixas', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+                ('quantidade_ativas', models.PositiveIntegerField(default=0, verbose_name='Despesas Ativas')),
+                ('quantidade_inativas', models.PositiveIntegerField(default=0, verbose_name='Despesas Inativas')),
+                ('valor_ativas', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Valor das Despesas Ativas')),
+                ('valor_inativas', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Valor das Despesas Inativas')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Total de Despesas Fixas',
+                'verbose_name_plural': 'Totais de Despesas Fixas',
+            },
+        ),
+        migrations.RunPython(calcular_totais, migrations.RunPython.noop),
+    ]
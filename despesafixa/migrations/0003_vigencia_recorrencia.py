@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('despesafixa', '0002_totaldespesasfixas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='despesafixa',
+            name='data_fim',
+            field=models.DateField(blank=True, help_text='Último dia em que a despesa é cobrada (opcional)', null=True, verbose_name='Fim da Vigência'),
+        ),
+        migrations.AddField(
+            model_name='despesafixa',
+            name='data_inicio',
+            field=models.DateField(blank=True, help_text='Primeiro dia em que a despesa é cobrada (opcional)', null=True, verbose_name='Início da Vigência'),
+        ),
+        migrations.AddField(
+            model_name='despesafixa',
+            name='recorrencia',
+            field=models.CharField(choices=[('mensal', 'Mensal'), ('bimestral', 'Bimestral'), ('trimestral', 'Trimestral'), ('semestral', 'Semestral'), ('anual', 'Anual'), ('unica', 'Única')], default='mensal', help_text='Frequência com que o valor é cobrado', max_length=20, verbose_name='Recorrência'),
+        ),
+        migrations.AlterField(
+            model_name='despesafixa',
+            name='valor',
+            field=models.DecimalField(decimal_places=2, help_text='Valor da despesa fixa em reais a cada ciclo da recorrência', max_digits=10, verbose_name='Valor'),
+        ),
+        migrations.AddIndex(
+            model_name='despesafixa',
+            index=models.Index(fields=['usuario', 'data_inicio', 'data_fim'], name='despesafixa_vigencia_idx'),
+        ),
+    ]
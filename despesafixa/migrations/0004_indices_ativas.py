@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('despesafixa', '0003_vigencia_recorrencia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='despesafixa',
+            index=models.Index(fields=['usuario', 'ativa'], name='despesafixa_usuario_ativa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='despesafixa',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['usuario', '-created_at'], name='despesafixa_ativas_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='despesafixa',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['usuario', 'nome'], name='despesafixa_ativas_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='despesafixa',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['usuario', 'valor'], name='despesafixa_ativas_valor_idx'),
+        ),
+    ]
@@ -1,16 +1,41 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from decimal import Decimal
+from core.formatacao import formatar_real
 
 User = get_user_model()
 
 
+def validar_vigencia(recorrencia, data_inicio, data_fim):
+    """Erros de vigência e recorrência de uma despesa fixa, por campo"""
+    erros = {}
+    if data_inicio and data_fim and data_fim < data_inicio:
+        erros['data_fim'] = 'A data de fim não pode ser anterior à data de início.'
+    if recorrencia == 'unica' and not data_inicio:
+        erros['data_inicio'] = 'Informe a data de início de uma despesa única.'
+    return erros
+
+
 class DespesaFixa(models.Model):
     """
     Modelo para despesas fixas dos usuários.
-    Representa gastos fixos mensais que impactam no custo dos produtos.
+    Representa gastos fixos recorrentes que impactam no custo dos produtos.
+    O valor é cobrado a cada ciclo da recorrência, dentro da vigência
+    (ver recorrencia.py).
     """
+    RECORRENCIA_CHOICES = [
+        ('mensal', 'Mensal'),
+        ('bimestral', 'Bimestral'),
+        ('trimestral', 'Trimestral'),
+        ('semestral', 'Semestral'),
+        ('anual', 'Anual'),
+        ('unica', 'Única'),
+    ]
+
     usuario = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -27,7 +52,26 @@ class DespesaFixa(models.Model):
         max_digits=10,
         decimal_places=2,
         verbose_name="Valor",
-        help_text="Valor mensal da despesa fixa em reais"
+        help_text="Valor da despesa fixa em reais a cada ciclo da recorrência"
+    )
+    recorrencia = models.CharField(
+        max_length=20,
+        choices=RECORRENCIA_CHOICES,
+        default='mensal',
+        verbose_name="Recorrência",
+        help_text="Frequência com que o valor é cobrado"
+    )
+    data_inicio = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name="Início da Vigência",
+        help_text="Primeiro dia em que a despesa é cobrada (opcional)"
+    )
+    data_fim = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name="Fim da Vigência",
+        help_text="Último dia em que a despesa é cobrada (opcional)"
     )
     descricao = models.TextField(
         blank=True,
@@ -53,23 +97,196 @@ class DespesaFixa(models.Model):
         verbose_name = "Despesa Fixa"
         verbose_name_plural = "Despesas Fixas"
         ordering = ['-created_at']
-        unique_together = ['usuario', 'nome']
+        constraints = [
+            # Nome único por usuário, sem diferenciar maiúsculas de minúsculas
+            models.UniqueConstraint(
+                'usuario', Lower('nome'),
+                name='despesafixa_nome_unico_por_usuario',
+                violation_error_message='Você já possui uma despesa fixa com este nome.'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['usuario', 'ativa'], name='despesafixa_usuario_ativa_idx'),
+            # Listagem de ativas (ver DespesaFixaViewSet.ativas), uma por ordenação aceita
+            models.Index(
+                fields=['usuario', '-created_at'], condition=Q(ativa=True),
+                name='despesafixa_ativas_criacao_idx'
+            ),
+            models.Index(
+                fields=['usuario', 'nome'], condition=Q(ativa=True),
+                name='despesafixa_ativas_nome_idx'
+            ),
+            models.Index(
+                fields=['usuario', 'valor'], condition=Q(ativa=True),
+                name='despesafixa_ativas_valor_idx'
+            ),
+            # Consulta por intervalo das despesas vigentes em um período
+            models.Index(
+                fields=['usuario', 'data_inicio', 'data_fim'],
+                name='despesafixa_vigencia_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nome} - R$ {self.valor} ({self.usuario.username})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.guardar_estado_original()
+        return instance
+
+    def guardar_estado_original(self):
+        """
+        Guarda usuário, status e valor como estão no banco, para que os
+        totais possam ser ajustados pela diferença ao salvar (ver signals.py).
+        """
+        campos = self.__dict__
+        if 'usuario_id' in campos and 'ativa' in campos and 'valor' in campos:
+            self._estado_original = (self.usuario_id, self.ativa, self.valor)
+        else:
+            self._estado_original = None
+
     def clean(self):
         """Validações customizadas"""
         super().clean()
         if self.valor and self.valor < 0:
             raise ValidationError({'valor': 'O valor da despesa não pode ser negativo.'})
+        erros = validar_vigencia(self.recorrencia, self.data_inicio, self.data_fim)
+        if erros:
+            raise ValidationError(erros)
 
     @property
     def valor_formatado(self):
         """Retorna o valor formatado em reais"""
-        return f"R$ {self.valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        return formatar_real(self.valor)
 
     @property
     def status_text(self):
         """Retorna o status da despesa em texto"""
         return "Ativa" if self.ativa else "Inativa"
+
+
+class TotalDespesasFixas(models.Model):
+    """
+    Totais das despesas fixas de um usuário (quantidade e soma dos valores
+    das despesas ativas e inativas).
+
+    Mantido incrementalmente a cada criação, alteração e remoção de despesa
+    (ver signals.py), para que os endpoints de total e estatísticas sejam uma
+    consulta pela chave primária. O comando verificar_totais_despesas_fixas
+    recalcula os totais e aponta divergências.
+    """
+    usuario = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='totais_despesas_fixas',
+        verbose_name="Usuário"
+    )
+    quantidade_ativas = models.PositiveIntegerField(default=0, verbose_name="Despesas Ativas")
+    quantidade_inativas = models.PositiveIntegerField(default=0, verbose_name="Despesas Inativas")
+    valor_ativas = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor das Despesas Ativas"
+    )
+    valor_inativas = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor das Despesas Inativas"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    CAMPOS = ('quantidade_ativas', 'quantidade_inativas', 'valor_ativas', 'valor_inativas')
+
+    class Meta:
+        verbose_name = "Total de Despesas Fixas"
+        verbose_name_plural = "Totais de Despesas Fixas"
+
+    def __str__(self):
+        return f"Totais de despesas fixas - {self.usuario_id}"
+
+    @property
+    def quantidade_total(self):
+        return self.quantidade_ativas + self.quantidade_inativas
+
+    @property
+    def valor_total(self):
+        return self.valor_ativas + self.valor_inativas
+
+    @staticmethod
+    def agregacoes():
+        """Agregações condicionais que calculam os totais a partir das despesas"""
+        return {
+            'quantidade_ativas': Count('id', filter=Q(ativa=True)),
+            'quantidade_inativas': Count('id', filter=Q(ativa=False)),
+            'valor_ativas': Sum('valor', filter=Q(ativa=True), default=Decimal('0.00')),
+            'valor_inativas': Sum('valor', filter=Q(ativa=False), default=Decimal('0.00')),
+        }
+
+    @classmethod
+    def calcular(cls, usuario_id):
+        """Calcula os totais do zero, em uma consulta"""
+        return DespesaFixa.objects.filter(usuario_id=usuario_id).order_by().aggregate(
+            **cls.agregacoes()
+        )
+
+    @classmethod
+    def recalcular(cls, usuario_id):
+        """Recalcula e grava os totais do usuário"""
+        valores = cls.calcular(usuario_id)
+        if cls.objects.filter(pk=usuario_id).update(updated_at=timezone.now(), **valores):
+            return cls(usuario_id=usuario_id, **valores)
+        try:
+            with transaction.atomic():
+                return cls.objects.create(usuario_id=usuario_id, **valores)
+        except IntegrityError:
+            # Criado por outra requisição entre o UPDATE e o INSERT
+            cls.objects.filter(pk=usuario_id).update(updated_at=timezone.now(), **valores)
+            return cls(usuario_id=usuario_id, **valores)
+
+    @classmethod
+    def obter(cls, usuario_id):
+        """Retorna os totais do usuário, calculando-os no primeiro acesso"""
+        try:
+            return cls.objects.get(pk=usuario_id)
+        except cls.DoesNotExist:
+            return cls.recalcular(usuario_id)
+
+    @classmethod
+    def aplicar_diferenca(cls, usuario_id, ativa, quantidade, valor):
+        """
+        Soma quantidade e valor aos totais de ativas ou inativas do usuário
+        com uma única atualização (F()), sem ler a linha antes.
+
+        Se os totais do usuário ainda não existem, nada é feito: eles serão
+        calculados do zero no primeiro acesso (ver obter).
+
+        Uma diferença que levaria a quantidade abaixo de zero (ex.: o
+        post_delete de um DELETE repetido, que não removeu nenhuma linha)
+        não é aplicada; os totais são recalculados.
+        """
+        campo = 'quantidade_ativas' if ativa else 'quantidade_inativas'
+        if ativa:
+            alteracoes = {
+                'quantidade_ativas': F('quantidade_ativas') + quantidade,
+                'valor_ativas': F('valor_ativas') + valor,
+            }
+        else:
+            alteracoes = {
+                'quantidade_inativas': F('quantidade_inativas') + quantidade,
+                'valor_inativas': F('valor_inativas') + valor,
+            }
+        consulta = cls.objects.filter(pk=usuario_id)
+        if quantidade >= 0:
+            consulta.update(updated_at=timezone.now(), **alteracoes)
+        elif not consulta.filter(**{f'{campo}__gte': -quantidade}).update(
+            updated_at=timezone.now(), **alteracoes
+        ) and consulta.exists():
+            cls.recalcular(usuario_id)
@@ -0,0 +1,124 @@
+"""
+Custo das despesas fixas em um intervalo de datas qualquer.
+
+Cada despesa tem uma recorrência (mensal, trimestral, anual...) e uma
+vigência opcional (data_inicio/data_fim). O valor de cada ciclo da
+recorrência é apropriado por igual entre os dias do ciclo, então o custo de
+uma janela é a diferença de uma função acumulada:
+
+    custo([a, b)) = acumulado(b) - acumulado(a)
+
+onde acumulado(d) = valor x ciclos completos até d + fração do ciclo atual.
+Isso é calculado em tempo constante por despesa, sem percorrer as datas.
+Os ciclos contam a partir de data_inicio ou, sem ela, do calendário
+(meses, trimestres, semestres e anos civis). A recorrência 'unica' é um
+lançamento no dia data_inicio.
+
+As despesas de um usuário que se sobrepõem à janela são lidas em uma única
+consulta por intervalo, atendida pelo índice (usuario, data_inicio, data_fim).
+"""
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DespesaFixa
+
+
+# Duração de cada recorrência em meses
+MESES_POR_RECORRENCIA = {
+    'mensal': 1,
+    'bimestral': 2,
+    'trimestral': 3,
+    'semestral': 6,
+    'anual': 12,
+}
+
+# Início dos ciclos das despesas sem data de início (calendário civil)
+ANCORA_CALENDARIO = date(2000, 1, 1)
+
+# Limites dos períodos consultados: a última data aceita deixa espaço para o
+# fim do ciclo que contém o dia seguinte (até um ano depois) antes de date.max
+DATA_MAXIMA = date(date.max.year - 2, 12, 31)
+PERIODO_MAXIMO_DIAS = 5 * 366
+
+
+def somar_meses(data, meses):
+    """Soma meses a uma data, limitando o dia ao último dia do mês"""
+    indice = data.year * 12 + data.month - 1 + meses
+    ano, mes = divmod(indice, 12)
+    mes += 1
+    return date(ano, mes, min(data.day, calendar.monthrange(ano, mes)[1]))
+
+
+def _acumulado(valor, meses, ancora, data):
+    """Custo apropriado desde a âncora até o dia anterior a `data`"""
+    ciclo = ((data.year - ancora.year) * 12 + data.month - ancora.month) // meses
+    inicio = somar_meses(ancora, ciclo * meses)
+    if inicio > data:
+        ciclo -= 1
+        inicio = somar_meses(ancora, ciclo * meses)
+    fim = somar_meses(ancora, (ciclo + 1) * meses)
+    return valor * ciclo + valor * (data - inicio).days / (fim - inicio).days
+
+
+def custo_no_intervalo(valor, recorrencia, data_inicio, data_fim, inicio, fim):
+    """
+    Custo de uma despesa na janela [inicio, fim), considerando a vigência
+    [data_inicio, data_fim] (limites opcionais e inclusivos).
+    """
+    if recorrencia == 'unica':
+        if data_inicio is not None and inicio <= data_inicio < fim:
+            return Decimal(valor)
+        return Decimal('0')
+
+    de = max(inicio, data_inicio) if data_inicio else inicio
+    ate = min(fim, data_fim + timedelta(days=1)) if data_fim else fim
+    if ate <= de:
+        return Decimal('0')
+
+    valor = Decimal(valor)
+    meses = MESES_POR_RECORRENCIA[recorrencia]
+    ancora = data_inicio or ANCORA_CALENDARIO
+    return _acumulado(valor, meses, ancora, ate) - _acumulado(valor, meses, ancora, de)
+
+
+def filtro_vigencia(inicio, fim, prefixo=''):
+    """Condição das despesas vigentes em algum dia da janela [inicio, fim)"""
+    return (
+        (Q(**{f'{prefixo}data_inicio__isnull': True}) | Q(**{f'{prefixo}data_inicio__lt': fim}))
+        & (Q(**{f'{prefixo}data_fim__isnull': True}) | Q(**{f'{prefixo}data_fim__gte': inicio}))
+    )
+
+
+def custos_no_periodo(usuario_id, inicio, fim):
+    """
+    Custo de cada despesa fixa ativa do usuário na janela [inicio, fim),
+    em uma consulta. Despesas sem custo na janela ficam de fora.
+    """
+    despesas = (
+        DespesaFixa.objects
+        .filter(filtro_vigencia(inicio, fim), usuario_id=usuario_id, ativa=True)
+        .order_by('nome')
+        .values_list('id', 'nome', 'valor', 'recorrencia', 'data_inicio', 'data_fim')
+    )
+    custos = []
+    for despesa_id, nome, valor, recorrencia, data_inicio, data_fim in despesas:
+        custo = custo_no_intervalo(valor, recorrencia, data_inicio, data_fim, inicio, fim)
+        if custo:
+            custos.append({
+                'id': despesa_id,
+                'nome': nome,
+                'recorrencia': recorrencia,
+                'valor': valor,
+                'custo': custo,
+            })
+    return custos
+
+
+def janela(dias, inicio=None):
+    """Janela [inicio, inicio + dias) a partir de hoje, se não informado"""
+    inicio = inicio or timezone.localdate()
+    return inicio, inicio + timedelta(days=dias)
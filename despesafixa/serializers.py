@@ -1,9 +1,31 @@
 from rest_framework import serializers
 from decimal import Decimal
-from .models import DespesaFixa
+from core.bulk import BulkCreateListSerializer, BulkUpdateListSerializer
+from core.integridade import UnicidadeNoBancoMixin
+from .models import DespesaFixa, validar_vigencia
 
 
-class DespesaFixaSerializer(serializers.ModelSerializer):
+MENSAGEM_NOME_DUPLICADO = 'Você já possui uma despesa fixa com este nome.'
+
+
+def validar_vigencia_serializer(serializer, attrs):
+    """
+    Valida vigência e recorrência com os valores enviados, completados pelos
+    da despesa em atualizações parciais.
+    """
+    def valor(campo, padrao=None):
+        if campo in attrs:
+            return attrs[campo]
+        return getattr(serializer.instance, campo, padrao)
+
+    erros = validar_vigencia(
+        valor('recorrencia', 'mensal'), valor('data_inicio'), valor('data_fim')
+    )
+    if erros:
+        raise serializers.ValidationError(erros)
+
+
+class DespesaFixaSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo DespesaFixa.
     Usado para listagem e detalhes de despesas fixas.
@@ -12,11 +34,13 @@ class DespesaFixaSerializer(serializers.ModelSerializer):
     status_text = serializers.ReadOnlyField()
     usuario_nome = serializers.CharField(source='usuario.username', read_only=True)
 
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = DespesaFixa
         fields = [
-            'id', 'usuario', 'nome', 'valor', 'descricao', 'ativa',
-            'created_at', 'updated_at', 'valor_formatado', 'status_text',
+            'id', 'usuario', 'nome', 'valor', 'recorrencia', 'data_inicio',
+            'data_fim', 'descricao', 'ativa', 'created_at', 'updated_at', 'valor_formatado', 'status_text',
             'usuario_nome'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -43,39 +67,21 @@ class DespesaFixaSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         """Validações que envolvem múltiplos campos"""
-        # Verifica se já existe uma despesa com o mesmo nome para o usuário
-        nome = attrs.get('nome')
-        usuario = attrs.get('usuario')
-        
-        if nome and usuario:
-            # Se estamos criando uma nova despesa
-            if not self.instance:
-                if DespesaFixa.objects.filter(usuario=usuario, nome__iexact=nome).exists():
-                    raise serializers.ValidationError({
-                        'nome': 'Você já possui uma despesa fixa com este nome.'
-                    })
-            # Se estamos atualizando uma despesa existente
-            else:
-                if DespesaFixa.objects.filter(
-                    usuario=usuario, 
-                    nome__iexact=nome
-                ).exclude(pk=self.instance.pk).exists():
-                    raise serializers.ValidationError({
-                        'nome': 'Você já possui uma despesa fixa com este nome.'
-                    })
-        
+        validar_vigencia_serializer(self, attrs)
         return attrs
 
 
-class DespesaFixaCreateSerializer(serializers.ModelSerializer):
+class DespesaFixaCreateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer específico para criação de despesas fixas.
     Remove campos desnecessários e define validações específicas.
     """
     
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = DespesaFixa
-        fields = ['nome', 'valor', 'descricao', 'ativa']
+        fields = ['nome', 'valor', 'recorrencia', 'data_inicio', 'data_fim', 'descricao', 'ativa']
 
     def validate_valor(self, value):
         """Valida o valor da despesa"""
@@ -100,6 +106,11 @@ class DespesaFixaCreateSerializer(serializers.ModelSerializer):
         
         return value.strip()
 
+    def validate(self, attrs):
+        """Valida a vigência da despesa"""
+        validar_vigencia_serializer(self, attrs)
+        return attrs
+
     def create(self, validated_data):
         """Cria uma nova despesa fixa associando ao usuário autenticado"""
         user = self.context['request'].user
@@ -107,15 +118,17 @@ class DespesaFixaCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class DespesaFixaUpdateSerializer(serializers.ModelSerializer):
+class DespesaFixaUpdateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer específico para atualização de despesas fixas.
     Permite atualização parcial dos campos.
     """
     
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = DespesaFixa
-        fields = ['nome', 'valor', 'descricao', 'ativa']
+        fields = ['nome', 'valor', 'recorrencia', 'data_inicio', 'data_fim', 'descricao', 'ativa']
 
     def validate_valor(self, value):
         """Valida o valor da despesa"""
@@ -140,6 +153,11 @@ class DespesaFixaUpdateSerializer(serializers.ModelSerializer):
         
         return value
 
+    def validate(self, attrs):
+        """Valida a vigência da despesa"""
+        validar_vigencia_serializer(self, attrs)
+        return attrs
+
 
 class DespesaFixaListSerializer(serializers.ModelSerializer):
     """
@@ -152,6 +170,30 @@ class DespesaFixaListSerializer(serializers.ModelSerializer):
     class Meta:
         model = DespesaFixa
         fields = [
-            'id', 'nome', 'valor', 'valor_formatado', 
-            'ativa', 'status_text', 'created_at'
+            'id', 'nome', 'valor', 'valor_formatado', 'recorrencia',
+            'data_inicio', 'data_fim', 'ativa', 'status_text', 'created_at'
         ]
+
+
+class DespesaFixaBulkCreateSerializer(DespesaFixaCreateSerializer):
+    """
+    Serializer para criação de despesas fixas em lote.
+    A unicidade dos nomes é verificada para o lote inteiro pelo ListSerializer.
+    """
+    mensagem_nome_duplicado = MENSAGEM_NOME_DUPLICADO
+
+    class Meta(DespesaFixaCreateSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
+
+class DespesaFixaBulkUpdateSerializer(DespesaFixaUpdateSerializer):
+    """
+    Serializer para atualização parcial de despesas fixas em lote.
+    Cada item identifica a despesa pelo campo id.
+    """
+    id = serializers.IntegerField()
+    mensagem_nome_duplicado = MENSAGEM_NOME_DUPLICADO
+
+    class Meta(DespesaFixaUpdateSerializer.Meta):
+        fields = ['id'] + DespesaFixaUpdateSerializer.Meta.fields
+        list_serializer_class = BulkUpdateListSerializer
@@ -0,0 +1,63 @@
+"""
+Manutenção incremental dos totais de despesas fixas por usuário.
+
+Cada save ou delete ajusta TotalDespesasFixas pela diferença entre o estado
+anterior da despesa (guardado ao carregá-la do banco) e o novo estado. As
+views leem a despesa com SELECT ... FOR UPDATE antes de alterá-la, para
+que esse estado seja o gravado; uma diferença que levaria uma quantidade
+abaixo de zero recalcula os totais (ver TotalDespesasFixas.aplicar_diferenca).
+Operações em lote e importações, que não disparam post_save, recalculam os
+totais dos usuários afetados. Toda alteração também invalida as respostas
+em cache dos totais e estatísticas (ver core/respostas.py).
+"""
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar
+from core.respostas import DESPESAS_FIXAS
+from core.signals import dados_alterados
+from .models import DespesaFixa, TotalDespesasFixas
+
+
+def _estado(despesa):
+    return despesa.usuario_id, despesa.ativa, Decimal(str(despesa.valor))
+
+
+@receiver(post_save, sender=DespesaFixa)
+def atualizar_totais_ao_salvar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    novo = _estado(instance)
+    original = None if created else getattr(instance, '_estado_original', None)
+
+    if not created and original is None:
+        # Estado anterior desconhecido (instância não carregada do banco)
+        TotalDespesasFixas.recalcular(instance.usuario_id)
+    elif original is None:
+        TotalDespesasFixas.aplicar_diferenca(novo[0], novo[1], 1, novo[2])
+    elif original[:2] == novo[:2]:
+        if original[2] != novo[2]:
+            TotalDespesasFixas.aplicar_diferenca(novo[0], novo[1], 0, novo[2] - original[2])
+    else:
+        TotalDespesasFixas.aplicar_diferenca(original[0], original[1], -1, -original[2])
+        TotalDespesasFixas.aplicar_diferenca(novo[0], novo[1], 1, novo[2])
+
+    instance.guardar_estado_original()
+    invalidar(DESPESAS_FIXAS, novo[0], *(original[:1] if original else ()))
+
+
+@receiver(post_delete, sender=DespesaFixa)
+def atualizar_totais_ao_remover(sender, instance, **kwargs):
+    usuario_id, ativa, valor = getattr(instance, '_estado_original', None) or _estado(instance)
+    TotalDespesasFixas.aplicar_diferenca(usuario_id, ativa, -1, -valor)
+    invalidar(DESPESAS_FIXAS, usuario_id)
+
+
+@receiver(dados_alterados, sender=DespesaFixa)
+def recalcular_totais_em_lote(sender, usuario_ids, **kwargs):
+    for usuario_id in set(usuario_ids):
+        TotalDespesasFixas.recalcular(usuario_id)
+    invalidar(DESPESAS_FIXAS, *usuario_ids)
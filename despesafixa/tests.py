@@ -1,8 +1,20 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock, skipUnless
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
 from django.core.exceptions import ValidationError
+from rest_framework.test import APITestCase
+from rest_framework import status
+from datetime import date
 from decimal import Decimal
-from .models import DespesaFixa
+from .models import DespesaFixa, TotalDespesasFixas
+from .recorrencia import custo_no_intervalo, custos_no_periodo
+from .views import DespesaFixaViewSet
 
 User = get_user_model()
 
@@ -145,3 +157,416 @@ class DespesaFixaViewTest(TestCase):
         self.assertEqual(other_user_despesas.count(), 1)
         self.assertEqual(user_despesas.first().nome, 'Aluguel')
         self.assertEqual(other_user_despesas.first().nome, 'Energia')
+
+
+class DespesaFixaBulkAPITest(APITestCase):
+    """Testes para as operações em lote de DespesaFixa"""
+
+    def setUp(self):
+        """Configuração inicial para os testes"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Teste Comercial'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_uma_consulta_de_unicidade(self):
+        """Teste se o lote é validado e gravado com número fixo de consultas"""
+        data = [
+            {'nome': f'Despesa {i:03d}', 'valor': '10.00'}
+            for i in range(50)
+        ]
+        TotalDespesasFixas.obter(self.user.pk)
+
+        # consulta de unicidade + INSERT único (bulk_create) + recálculo dos
+        # totais (agregação + UPDATE), entre SAVEPOINT e RELEASE
+        with self.assertNumQueries(6):
+            response = self.client.post('/api/despesas-fixas/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 50)
+        self.assertEqual(response.data[0]['nome'], 'Despesa 000')
+        self.assertEqual(response.data[-1]['nome'], 'Despesa 049')
+
+    def test_bulk_update_renomeia_para_nome_existente(self):
+        """Teste se a atualização em lote respeita a unicidade do nome"""
+        aluguel = DespesaFixa.objects.create(usuario=self.user, nome='Aluguel', valor=Decimal('1500.00'))
+        DespesaFixa.objects.create(usuario=self.user, nome='Energia', valor=Decimal('200.00'))
+
+        response = self.client.patch('/api/despesas-fixas/bulk/', [
+            {'id': aluguel.id, 'nome': 'energia'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('nome', response.data[0])
+
+    def test_bulk_update_troca_status(self):
+        """Teste se a atualização em lote altera os campos e o updated_at"""
+        aluguel = DespesaFixa.objects.create(usuario=self.user, nome='Aluguel', valor=Decimal('1500.00'))
+        atualizado_em = aluguel.updated_at
+
+        response = self.client.patch('/api/despesas-fixas/bulk/', [
+            {'id': aluguel.id, 'ativa': False, 'valor': '1600.00'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        aluguel.refresh_from_db()
+        self.assertFalse(aluguel.ativa)
+        self.assertEqual(aluguel.valor, Decimal('1600.00'))
+        self.assertGreater(aluguel.updated_at, atualizado_em)
+
+
+class TotalDespesasFixasTest(APITestCase):
+    """Testes para os totais de despesas fixas mantidos por usuário"""
+
+    def setUp(self):
+        """Configuração inicial para os testes"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Teste Comercial'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _totais(self):
+        totais = TotalDespesasFixas.objects.get(pk=self.user.pk)
+        return (
+            totais.quantidade_ativas, totais.valor_ativas,
+            totais.quantidade_inativas, totais.valor_inativas,
+        )
+
+    def test_totais_acompanham_alteracoes(self):
+        """Teste se criação, edição, troca de status e remoção ajustam os totais"""
+        TotalDespesasFixas.obter(self.user.pk)
+        response = self.client.post(
+            '/api/despesas-fixas/', {'nome': 'Aluguel', 'valor': '1500.00'}, format='json'
+        )
+        aluguel_id = response.data['id']
+        self.client.post('/api/despesas-fixas/', {'nome': 'Energia', 'valor': '200.00'}, format='json')
+        self.assertEqual(self._totais(), (2, Decimal('1700.00'), 0, Decimal('0.00')))
+
+        self.client.patch(f'/api/despesas-fixas/{aluguel_id}/', {'valor': '1600.00'}, format='json')
+        self.assertEqual(self._totais(), (2, Decimal('1800.00'), 0, Decimal('0.00')))
+
+        self.client.post(f'/api/despesas-fixas/{aluguel_id}/toggle_status/')
+        self.assertEqual(self._totais(), (1, Decimal('200.00'), 1, Decimal('1600.00')))
+
+        self.client.delete(f'/api/despesas-fixas/{aluguel_id}/')
+        self.assertEqual(self._totais(), (1, Decimal('200.00'), 0, Decimal('0.00')))
+
+    def test_remocao_repetida_nao_desconta_duas_vezes(self):
+        """Teste se o post_delete de um DELETE repetido (0 linhas) não leva os totais abaixo de zero"""
+        despesa = DespesaFixa.objects.create(usuario=self.user, nome='Aluguel', valor=Decimal('1500.00'))
+        TotalDespesasFixas.obter(self.user.pk)
+        # Duas requisições que leram a mesma despesa antes de qualquer remoção
+        primeira = DespesaFixa.objects.get(pk=despesa.pk)
+        segunda = DespesaFixa.objects.get(pk=despesa.pk)
+
+        primeira.delete()
+        segunda.delete()
+
+        self.assertEqual(self._totais(), (0, Decimal('0.00'), 0, Decimal('0.00')))
+
+    def test_escritas_leem_a_despesa_com_bloqueio(self):
+        """Teste se edição, troca de status e remoção leem a despesa com select_for_update"""
+        for acao, bloqueia in (
+            ('retrieve', False), ('update', True), ('partial_update', True),
+            ('toggle_status', True), ('destroy', True),
+        ):
+            view = DespesaFixaViewSet(action=acao, request=mock.Mock(user=self.user))
+            self.assertEqual(view.get_queryset().query.select_for_update, bloqueia, acao)
+
+    def test_nome_duplicado_retorna_erro_de_validacao(self):
+        """Teste se criar ou renomear para um nome existente retorna 400, sem alterar os totais"""
+        TotalDespesasFixas.obter(self.user.pk)
+        self.client.post('/api/despesas-fixas/', {'nome': 'Aluguel', 'valor': '1500.00'}, format='json')
+        response = self.client.post(
+            '/api/despesas-fixas/', {'nome': 'Aluguel', 'valor': '10.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['nome'], ['Você já possui uma despesa fixa com este nome.'])
+
+        energia = self.client.post(
+            '/api/despesas-fixas/', {'nome': 'Energia', 'valor': '200.00'}, format='json'
+        ).data
+        response = self.client.patch(
+            f'/api/despesas-fixas/{energia["id"]}/', {'nome': 'Aluguel'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._totais(), (2, Decimal('1700.00'), 0, Decimal('0.00')))
+
+    def test_total_e_estatisticas_por_chave_primaria(self):
+        """Teste se os endpoints leem apenas a linha de totais do usuário"""
+        DespesaFixa.objects.create(usuario=self.user, nome='Aluguel', valor=Decimal('1500.00'))
+        DespesaFixa.objects.create(usuario=self.user, nome='Internet', valor=Decimal('100.00'), ativa=False)
+        TotalDespesasFixas.obter(self.user.pk)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/despesas-fixas/total/')
+        self.assertEqual(response.data['total_despesas_fixas'], Decimal('1500.00'))
+        self.assertEqual(response.data['total_formatado'], 'R$ 1.500,00')
+        self.assertEqual(response.data['quantidade_despesas'], 1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/despesas-fixas/estatisticas/')
+        self.assertEqual(response.data['total']['quantidade'], 2)
+        self.assertEqual(response.data['inativas']['valor'], Decimal('100.00'))
+
+    def test_comando_verifica_e_corrige_divergencias(self):
+        """Teste se o comando de verificação aponta e corrige divergências"""
+        DespesaFixa.objects.create(usuario=self.user, nome='Aluguel', valor=Decimal('1500.00'))
+        TotalDespesasFixas.obter(self.user.pk)
+        TotalDespesasFixas.objects.filter(pk=self.user.pk).update(valor_ativas=Decimal('1.00'))
+
+        with self.assertRaises(CommandError):
+            call_command('verificar_totais_despesas_fixas', stdout=StringIO())
+
+        call_command('verificar_totais_despesas_fixas', corrigir=True, stdout=StringIO())
+        self.assertEqual(self._totais(), (1, Decimal('1500.00'), 0, Decimal('0.00')))
+
+
+class RecorrenciaDespesaFixaTest(APITestCase):
+    """Testes para a vigência, a recorrência e o custo das despesas em um período"""
+
+    def setUp(self):
+        """Configuração inicial para os testes"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Teste Comercial'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_custo_no_intervalo(self):
+        """Teste do custo exato de cada recorrência em janelas arbitrárias"""
+        valor = Decimal('1200.00')
+        # Mensal sem vigência: fevereiro inteiro custa o valor cheio
+        self.assertEqual(
+            custo_no_intervalo(valor, 'mensal', None, None, date(2026, 2, 1), date(2026, 3, 1)),
+            valor
+        )
+        # Anual iniciada em 1º de julho: um ano a partir do início custa o valor cheio
+        self.assertEqual(
+            custo_no_intervalo(valor, 'anual', date(2026, 7, 1), None, date(2026, 1, 1), date(2027, 7, 1)),
+            valor
+        )
+        # Trimestral encerrada no meio do primeiro ciclo (jan-mar: 90 dias)
+        self.assertEqual(
+            custo_no_intervalo(
+                Decimal('900.00'), 'trimestral', date(2026, 1, 1), date(2026, 1, 30),
+                date(2026, 1, 1), date(2026, 12, 31)
+            ),
+            Decimal('300')
+        )
+        # Única: conta apenas se a data cair na janela
+        self.assertEqual(
+            custo_no_intervalo(valor, 'unica', date(2026, 5, 10), None, date(2026, 5, 1), date(2026, 6, 1)),
+            valor
+        )
+        self.assertEqual(
+            custo_no_intervalo(valor, 'unica', date(2026, 6, 1), None, date(2026, 5, 1), date(2026, 6, 1)),
+            Decimal('0')
+        )
+
+    def test_custos_no_periodo_em_uma_consulta(self):
+        """Teste se as despesas vigentes no período são lidas em uma consulta"""
+        DespesaFixa.objects.create(usuario=self.user, nome='Aluguel', valor=Decimal('1500.00'))
+        DespesaFixa.objects.create(
+            usuario=self.user, nome='Alvará', valor=Decimal('365.00'), recorrencia='anual'
+        )
+        DespesaFixa.objects.create(
+            usuario=self.user, nome='Antigo', valor=Decimal('800.00'), data_fim=date(2025, 12, 31)
+        )
+        DespesaFixa.objects.create(
+            usuario=self.user, nome='Inativa', valor=Decimal('50.00'), ativa=False
+        )
+
+        with self.assertNumQueries(1):
+            custos = custos_no_periodo(self.user.pk, date(2026, 1, 1), date(2027, 1, 1))
+
+        self.assertEqual(
+            {despesa['nome']: despesa['custo'] for despesa in custos},
+            {'Aluguel': Decimal('18000.00'), 'Alvará': Decimal('365.00')}
+        )
+
+    def test_validacao_da_vigencia(self):
+        """Teste se a API recusa vigências inválidas"""
+        response = self.client.post('/api/despesas-fixas/', {
+            'nome': 'Taxa', 'valor': '100.00',
+            'data_inicio': '2026-05-01', 'data_fim': '2026-04-01'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('data_fim', response.data)
+
+        response = self.client.post('/api/despesas-fixas/', {
+            'nome': 'Reforma', 'valor': '100.00', 'recorrencia': 'unica'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('data_inicio', response.data)
+
+    def test_endpoint_custo_periodo(self):
+        """Teste do endpoint de custo das despesas em um período"""
+        DespesaFixa.objects.create(
+            usuario=self.user, nome='IPTU', valor=Decimal('900.00'), recorrencia='trimestral'
+        )
+
+        response = self.client.get('/api/despesas-fixas/custo_periodo/?inicio=2026-01-01&fim=2026-03-31')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['dias'], 90)
+        self.assertEqual(response.data['total'], Decimal('900.00'))
+        self.assertEqual(response.data['despesas'][0]['recorrencia'], 'trimestral')
+
+        response = self.client.get('/api/despesas-fixas/custo_periodo/?inicio=2026-03-01&fim=2026-02-01')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_custo_periodo_limites(self):
+        """Teste se datas no limite do calendário e períodos longos são recusados"""
+        DespesaFixa.objects.create(
+            usuario=self.user, nome='Seguro', valor=Decimal('1200.00'), recorrencia='anual'
+        )
+        for parametros in (
+            'inicio=9999-12-01&fim=9999-12-31',
+            'inicio=9999-12-31',
+            'inicio=2000-01-01&fim=2026-12-31',
+        ):
+            response = self.client.get(f'/api/despesas-fixas/custo_periodo/?{parametros}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, parametros)
+
+        response = self.client.get('/api/despesas-fixas/custo_periodo/?inicio=9997-01-01&fim=9997-12-31')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], Decimal('1200.00'))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plano de consulta no formato do SQLite')
+class DespesaFixaAtivasIndicesTest(APITestCase):
+    """Testes para a listagem de ativas e os índices que a atendem"""
+
+    def setUp(self):
+        """Configuração inicial para os testes"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Teste Comercial'
+        )
+        self.client.force_authenticate(user=self.user)
+        for indice in range(5):
+            DespesaFixa.objects.create(
+                usuario=self.user, nome=f'Despesa {indice}', valor=Decimal(100 + indice),
+                ativa=indice % 2 == 0
+            )
+
+    def _plano_da_listagem(self, url):
+        """Executa a requisição e retorna o plano da consulta que lista as despesas"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = next(c['sql'] for c in consultas.captured_queries if 'ORDER BY' in c['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plano = ' '.join(linha[-1] for linha in cursor.fetchall())
+        return response, plano
+
+    def test_ordenacoes_aceitas_usam_indices_parciais(self):
+        """Teste se cada ordenação aceita em ativas é atendida por um índice, sem ordenar em memória"""
+        casos = {
+            '': 'despesafixa_ativas_criacao_idx',
+            '?ordering=-created_at': 'despesafixa_ativas_criacao_idx',
+            '?ordering=nome': 'despesafixa_ativas_nome_idx',
+            '?ordering=-valor': 'despesafixa_ativas_valor_idx',
+        }
+        for parametros, indice in casos.items():
+            with self.subTest(parametros=parametros):
+                response, plano = self._plano_da_listagem(f'/api/despesas-fixas/ativas/{parametros}')
+                self.assertIn(indice, plano)
+                self.assertNotIn('TEMP B-TREE', plano)
+                self.assertEqual(response.data['count'], 3)
+
+    def test_ordenacao_fora_da_lista_e_ignorada(self):
+        """Teste se ordenações não permitidas não chegam ao banco nem geram erro"""
+        for ordenacao in ('updated_at', 'usuario__username', 'campo_inexistente'):
+            with self.subTest(ordenacao=ordenacao):
+                response, plano = self._plano_da_listagem(
+                    f'/api/despesas-fixas/ativas/?ordering={ordenacao}'
+                )
+                self.assertIn('despesafixa_ativas_criacao_idx', plano)
+
+        response = self.client.get('/api/despesas-fixas/ativas/?search=Despesa 2')
+        self.assertEqual([item['nome'] for item in response.data['results']], ['Despesa 2'])
+
+
+class DespesaFixaAdminTest(TestCase):
+    """Testes das ações em lote do admin de despesas fixas"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='adminpass123',
+            nome_comercial='Administração'
+        )
+        self.client.force_login(self.admin)
+        self.despesas = [
+            DespesaFixa.objects.create(usuario=self.user, nome=f'Despesa {indice}', valor=Decimal('100.00'))
+            for indice in range(3)
+        ]
+        TotalDespesasFixas.obter(self.user.pk)
+
+    def executar(self, acao, despesas):
+        return self.client.post('/admin/despesafixa/despesafixa/', {
+            'action': acao, '_selected_action': [despesa.pk for despesa in despesas],
+        }, follow=True)
+
+    def test_desativar_em_lote_atualiza_totais(self):
+        """Teste se a desativação grava em lote e mantém os totais corretos"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.executar('desativar_despesas', self.despesas[:2])
+        self.assertContains(response, '2 despesa(s) foram desativadas com sucesso.')
+        self.assertEqual(
+            sum(consulta['sql'].startswith('UPDATE "despesafixa_despesafixa"') for consulta in consultas),
+            1
+        )
+
+        totais = TotalDespesasFixas.objects.get(pk=self.user.pk)
+        self.assertEqual(totais.quantidade_ativas, 1)
+        self.assertEqual(totais.valor_inativas, Decimal('200.00'))
+
+        response = self.executar('ativar_despesas', self.despesas)
+        self.assertContains(response, '2 despesa(s) foram ativadas com sucesso.')
+        self.assertEqual(TotalDespesasFixas.objects.get(pk=self.user.pk).quantidade_ativas, 3)
+
+    @override_settings(ADMIN_ACAO_LIMITE_SINCRONO=2, TAREFAS_MODO='imediato')
+    def test_selecao_grande_vai_para_segundo_plano(self):
+        """Teste se seleções acima do limite são entregues a uma tarefa"""
+        response = self.executar('desativar_despesas', self.despesas)
+        self.assertContains(response, '3 registro(s) em processamento em segundo plano.')
+        self.assertFalse(DespesaFixa.objects.filter(ativa=True).exists())
+        self.assertEqual(TotalDespesasFixas.objects.get(pk=self.user.pk).quantidade_inativas, 3)
+
+    def test_staff_altera_apenas_as_proprias_despesas(self):
+        """Teste se um staff que não é superusuário não altera despesas de outros usuários"""
+        staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='testpass123',
+            nome_comercial='Loja Staff', is_staff=True
+        )
+        staff.user_permissions.add(*Permission.objects.filter(
+            codename__in=['view_despesafixa', 'change_despesafixa']
+        ))
+        propria = DespesaFixa.objects.create(usuario=staff, nome='Aluguel', valor=Decimal('100.00'))
+        self.client.force_login(staff)
+
+        response = self.executar('desativar_despesas', [propria, self.despesas[0]])
+        self.assertContains(response, '1 registro(s) selecionado(s) pertencem a outros usuários.')
+        self.assertEqual(DespesaFixa.objects.filter(ativa=False).count(), 0)
+
+        response = self.executar('desativar_despesas', [propria])
+        self.assertContains(response, '1 despesa(s) foram desativadas com sucesso.')
+        propria.refresh_from_db()
+        self.assertFalse(propria.ativa)
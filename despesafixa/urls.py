@@ -23,3 +23,6 @@ urlpatterns = [
 # POST   /api/despesas-fixas/{id}/toggle-status/ -> toggle_status (ação customizada)
 # GET    /api/despesas-fixas/total/              -> total (ação customizada)
 # GET    /api/despesas-fixas/estatisticas/       -> estatisticas (ação customizada)
+# POST   /api/despesas-fixas/bulk/               -> bulk (criação em lote)
+# PATCH  /api/despesas-fixas/bulk/               -> bulk (atualização em lote)
+# DELETE /api/despesas-fixas/bulk/               -> bulk (remoção em lote)
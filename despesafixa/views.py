@@ -2,19 +2,30 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Q
-from .models import DespesaFixa
+from rest_framework.filters import SearchFilter
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from decimal import Decimal
+from core.bulk import BulkModelViewSetMixin
+from core.filtros import OrdenacaoPorAcao
+from core.formatacao import formatar_real
+from core.respostas import DESPESAS_FIXAS, resposta_versionada
+from .models import DespesaFixa, TotalDespesasFixas
+from .recorrencia import DATA_MAXIMA, PERIODO_MAXIMO_DIAS, custos_no_periodo, somar_meses
 from .filters import DespesaFixaFilter
 from .serializers import (
     DespesaFixaSerializer,
     DespesaFixaCreateSerializer,
     DespesaFixaUpdateSerializer,
-    DespesaFixaListSerializer
+    DespesaFixaListSerializer,
+    DespesaFixaBulkCreateSerializer,
+    DespesaFixaBulkUpdateSerializer
 )
 
 
-class DespesaFixaViewSet(viewsets.ModelViewSet):
+class DespesaFixaViewSet(BulkModelViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento completo de despesas fixas.
     
@@ -30,20 +41,39 @@ class DespesaFixaViewSet(viewsets.ModelViewSet):
     - GET /despesas-fixas/ativas/ - Lista apenas despesas fixas ativas
     - POST /despesas-fixas/{id}/toggle-status/ - Ativa/desativa uma despesa fixa
     - GET /despesas-fixas/total/ - Calcula o total das despesas fixas ativas
+    - GET /despesas-fixas/custo-periodo/ - Custo das despesas em um período
+    - POST/PATCH/DELETE /despesas-fixas/bulk/ - Operações em lote
     """
     serializer_class = DespesaFixaSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrdenacaoPorAcao]
     filterset_class = DespesaFixaFilter
     search_fields = ['nome', 'descricao']
     ordering_fields = ['nome', 'valor', 'created_at', 'updated_at']
+    # Em ativas, apenas as ordenações cobertas pelos índices parciais do modelo
+    ordering_fields_por_acao = {
+        'ativas': ['nome', 'valor', 'created_at'],
+    }
     ordering = ['-created_at']
+    bulk_create_serializer_class = DespesaFixaBulkCreateSerializer
+    bulk_update_serializer_class = DespesaFixaBulkUpdateSerializer
+    bulk_response_serializer_class = DespesaFixaSerializer
+    # Ações que alteram os totais pela diferença em relação ao estado lido
+    # (ver signals.py): a despesa é lida com SELECT ... FOR UPDATE, dentro da
+    # transação da escrita, para que duas requisições simultâneas não
+    # apliquem a mesma diferença duas vezes
+    acoes_com_bloqueio = {'update', 'partial_update', 'toggle_status', 'destroy'}
 
     def get_queryset(self):
         """
         Retorna apenas as despesas fixas do usuário autenticado.
         """
-        return DespesaFixa.objects.filter(usuario=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            return DespesaFixa.objects.none()
+        queryset = DespesaFixa.objects.filter(usuario=self.request.user)
+        if self.action in self.acoes_com_bloqueio:
+            queryset = queryset.select_for_update()
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -85,35 +115,34 @@ class DespesaFixaViewSet(viewsets.ModelViewSet):
         Atualiza uma despesa fixa.
         """
         partial = kwargs.pop('partial', False)
-        instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=partial)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        with transaction.atomic():
+            instance = self.get_object()
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
         
         # Retorna a resposta com o serializer completo
         response_serializer = DespesaFixaSerializer(serializer.instance)
         return Response(response_serializer.data)
 
+    def destroy(self, request, *args, **kwargs):
+        """
+        Remove uma despesa fixa.
+        """
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
     def ativas(self, request):
         """
         Lista apenas as despesas fixas ativas do usuário.
         
         GET /api/despesas-fixas/ativas/
+
+        Aceita os mesmos filtros, a mesma busca e a mesma paginação da
+        listagem; a ordenação é limitada a nome, valor e created_at.
         """
-        queryset = self.get_queryset().filter(ativa=True)
-        
-        # Aplicar filtros de busca se fornecidos
-        search = request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(nome__icontains=search) | Q(descricao__icontains=search)
-            )
-        
-        # Ordenação
-        ordering = request.query_params.get('ordering', '-created_at')
-        if ordering:
-            queryset = queryset.order_by(ordering)
+        queryset = self.filter_queryset(self.get_queryset().filter(ativa=True))
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -130,9 +159,10 @@ class DespesaFixaViewSet(viewsets.ModelViewSet):
         
         POST /api/despesas-fixas/{id}/toggle-status/
         """
-        despesa = self.get_object()
-        despesa.ativa = not despesa.ativa
-        despesa.save()
+        with transaction.atomic():
+            despesa = self.get_object()
+            despesa.ativa = not despesa.ativa
+            despesa.save()
         
         serializer = DespesaFixaSerializer(despesa)
         return Response({
@@ -141,50 +171,104 @@ class DespesaFixaViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @resposta_versionada(DESPESAS_FIXAS)
     def total(self, request):
         """
         Calcula o total das despesas fixas ativas do usuário.
         
         GET /api/despesas-fixas/total/
+
+        A resposta traz uma ETag e fica em cache até a próxima alteração
+        nas despesas fixas (ver core/respostas.py).
         """
-        queryset = self.get_queryset().filter(ativa=True)
-        total = sum(despesa.valor for despesa in queryset)
+        totais = TotalDespesasFixas.obter(request.user.pk)
         
         return Response({
-            'total_despesas_fixas': total,
-            'total_formatado': f"R$ {total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-            'quantidade_despesas': queryset.count()
+            'total_despesas_fixas': totais.valor_ativas,
+            'total_formatado': formatar_real(totais.valor_ativas),
+            'quantidade_despesas': totais.quantidade_ativas
         })
 
     @action(detail=False, methods=['get'])
+    @resposta_versionada(DESPESAS_FIXAS)
     def estatisticas(self, request):
         """
         Retorna estatísticas das despesas fixas do usuário.
         
         GET /api/despesas-fixas/estatisticas/
+
+        A resposta traz uma ETag e fica em cache até a próxima alteração
+        nas despesas fixas (ver core/respostas.py).
         """
-        queryset = self.get_queryset()
-        ativas = queryset.filter(ativa=True)
-        inativas = queryset.filter(ativa=False)
-        
-        total_ativas = sum(despesa.valor for despesa in ativas)
-        total_inativas = sum(despesa.valor for despesa in inativas)
-        total_geral = total_ativas + total_inativas
+        totais = TotalDespesasFixas.obter(request.user.pk)
         
         return Response({
             'total': {
-                'quantidade': queryset.count(),
-                'valor': total_geral,
-                'valor_formatado': f"R$ {total_geral:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+                'quantidade': totais.quantidade_total,
+                'valor': totais.valor_total,
+                'valor_formatado': formatar_real(totais.valor_total)
             },
             'ativas': {
-                'quantidade': ativas.count(),
-                'valor': total_ativas,
-                'valor_formatado': f"R$ {total_ativas:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+                'quantidade': totais.quantidade_ativas,
+                'valor': totais.valor_ativas,
+                'valor_formatado': formatar_real(totais.valor_ativas)
             },
             'inativas': {
-                'quantidade': inativas.count(),
-                'valor': total_inativas,
-                'valor_formatado': f"R$ {total_inativas:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+                'quantidade': totais.quantidade_inativas,
+                'valor': totais.valor_inativas,
+                'valor_formatado': formatar_real(totais.valor_inativas)
             }
         })
+
+    @action(detail=False, methods=['get'])
+    def custo_periodo(self, request):
+        """
+        Calcula o custo das despesas fixas ativas em um período, considerando
+        a recorrência e a vigência de cada despesa.
+
+        GET /api/despesas-fixas/custo-periodo/?inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+
+        As duas datas são inclusivas; sem elas, usa o mês atual. O período
+        pode ter até PERIODO_MAXIMO_DIAS dias.
+        """
+        hoje = timezone.localdate()
+        try:
+            inicio = parse_date(request.query_params.get('inicio') or '') or hoje.replace(day=1)
+            fim = parse_date(request.query_params.get('fim') or '') or (
+                somar_meses(inicio.replace(day=1), 1) - timedelta(days=1)
+            )
+        except ValueError:
+            return Response({
+                'error': 'Data inválida. Use o formato AAAA-MM-DD.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if fim < inicio:
+            return Response({
+                'error': 'A data de fim não pode ser anterior à data de início.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if fim > DATA_MAXIMA:
+            return Response({
+                'error': f'A data de fim não pode ser posterior a {DATA_MAXIMA.isoformat()}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if (fim - inicio).days + 1 > PERIODO_MAXIMO_DIAS:
+            return Response({
+                'error': f'O período pode ter no máximo {PERIODO_MAXIMO_DIAS} dias.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        despesas = custos_no_periodo(request.user.pk, inicio, fim + timedelta(days=1))
+        total = sum((despesa['custo'] for despesa in despesas), Decimal('0'))
+        centavos = Decimal('0.01')
+
+        return Response({
+            'inicio': inicio,
+            'fim': fim,
+            'dias': (fim - inicio).days + 1,
+            'total': total.quantize(centavos),
+            'total_formatado': formatar_real(total.quantize(centavos)),
+            'despesas': [
+                dict(despesa, custo=despesa['custo'].quantize(centavos))
+                for despesa in despesas
+            ]
+        })
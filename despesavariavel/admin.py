@@ -1,17 +1,23 @@
 from django.contrib import admin
+
+from core.admin import AcoesEmLoteMixin, FiltroAutocomplete, ListagemGrandeMixin
+from core.bulk import alterar_ativa
 from .models import DespesaVariavel
 
 
 @admin.register(DespesaVariavel)
-class DespesaVariavelAdmin(admin.ModelAdmin):
+class DespesaVariavelAdmin(AcoesEmLoteMixin, ListagemGrandeMixin, admin.ModelAdmin):
     """
     Configuração do admin para DespesaVariavel.
     """
     list_display = ['nome', 'usuario', 'valor_por_unidade', 'unidade_medida', 'ativa', 'created_at']
-    list_filter = ['ativa', 'unidade_medida', 'created_at', 'updated_at']
+    list_filter = [
+        'ativa', 'unidade_medida', 'created_at', 'updated_at', ('usuario', FiltroAutocomplete)
+    ]
     search_fields = ['nome', 'usuario__username', 'usuario__email', 'descricao', 'unidade_medida']
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
+    autocomplete_fields = ['usuario']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -29,10 +35,32 @@ class DespesaVariavelAdmin(admin.ModelAdmin):
         }),
     )
     
+    actions = ['ativar_despesas', 'desativar_despesas']
+
     def get_queryset(self, request):
         """Otimiza consultas incluindo dados do usuário"""
         return super().get_queryset(request).select_related('usuario')
     
+    def ativar_despesas(self, request, queryset):
+        """Ativa as despesas selecionadas"""
+        alteradas = self.executar_em_lote(
+            request, queryset, alterar_ativa, True, descricao='Ativação de despesas'
+        )
+        if alteradas is not None:
+            self.message_user(request, f'{alteradas} despesa(s) foram ativadas com sucesso.')
+    ativar_despesas.short_description = 'Ativar despesas selecionadas'
+    ativar_despesas.allowed_permissions = ('change',)
+
+    def desativar_despesas(self, request, queryset):
+        """Desativa as despesas selecionadas"""
+        alteradas = self.executar_em_lote(
+            request, queryset, alterar_ativa, False, descricao='Desativação de despesas'
+        )
+        if alteradas is not None:
+            self.message_user(request, f'{alteradas} despesa(s) foram desativadas com sucesso.')
+    desativar_despesas.short_description = 'Desativar despesas selecionadas'
+    desativar_despesas.allowed_permissions = ('change',)
+    
     def has_change_permission(self, request, obj=None):
         """Permite edição apenas para superusuários ou proprietários"""
         if request.user.is_superuser:
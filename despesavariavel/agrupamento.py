@@ -0,0 +1,78 @@
+"""
+Agrupamento das despesas variáveis ativas por unidade de medida.
+
+As linhas são lidas com values_list ordenado por unidade e nome e agrupadas
+com itertools.groupby à medida que chegam do banco, sem instanciar os
+modelos. Com paginação, as linhas de cada grupo são numeradas no próprio
+banco (ROW_NUMBER() OVER (PARTITION BY unidade_medida)) e apenas a página
+pedida de cada grupo é lida.
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from core.formatacao import formatar_real
+from .models import DespesaVariavel
+
+
+CAMPOS = ('unidade_medida', 'id', 'nome', 'valor_por_unidade', 'descricao')
+
+
+def agrupar_por_unidade(usuario, unidade=None, limite=None, pagina=1):
+    """
+    Retorna as despesas ativas agrupadas por unidade de medida.
+
+    Com limite, cada grupo traz no máximo `limite` despesas da página
+    informada; total_por_unidade indica quantas despesas cada grupo tem.
+    """
+    queryset = DespesaVariavel.objects.filter(usuario=usuario, ativa=True)
+    if unidade:
+        queryset = queryset.filter(unidade_medida=unidade)
+
+    linhas = queryset
+    if limite:
+        inicio = (pagina - 1) * limite
+        linhas = linhas.annotate(
+            posicao=Window(
+                RowNumber(),
+                partition_by=F('unidade_medida'),
+                order_by=[F('nome').asc(), F('id').asc()],
+            )
+        ).filter(posicao__gt=inicio, posicao__lte=inicio + limite)
+    linhas = linhas.order_by('unidade_medida', 'nome', 'id').values_list(*CAMPOS)
+
+    unidades = {}
+    for unidade_medida, itens in groupby(linhas.iterator(), key=itemgetter(0)):
+        unidades[unidade_medida] = [
+            {
+                'id': pk,
+                'nome': nome,
+                'valor_por_unidade': valor,
+                'valor_formatado': formatar_real(valor),
+                'descricao': descricao,
+            }
+            for _, pk, nome, valor, descricao in itens
+        ]
+
+    if limite:
+        total_por_unidade = dict(
+            queryset.order_by('unidade_medida')
+            .values_list('unidade_medida')
+            .annotate(total=Count('id'))
+        )
+        # Grupos sem despesas na página pedida aparecem vazios
+        unidades = {u: unidades.get(u, []) for u in total_por_unidade}
+    else:
+        total_por_unidade = {u: len(itens) for u, itens in unidades.items()}
+
+    dados = {
+        'unidades_medida': unidades,
+        'total_unidades': len(unidades),
+        'total_por_unidade': total_por_unidade,
+    }
+    if limite:
+        dados['pagina'] = pagina
+        dados['limite'] = limite
+    return dados
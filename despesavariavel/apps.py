@@ -11,4 +11,4 @@ class DespesavariavelConfig(AppConfig):
         Método executado quando o app é carregado.
         Usado para registrar signals ou outras configurações.
         """
-        pass
+        from . import signals  # noqa: F401
@@ -0,0 +1,117 @@
+"""
+Estatísticas das despesas variáveis de um usuário.
+
+O cálculo usa um número fixo de consultas, independentemente da quantidade
+de despesas: uma agregação condicional com os totais, uma consulta agrupada
+por unidade de medida e uma lista ordenada dos valores para os quantis.
+O resultado fica em cache por usuário e é invalidado a cada escrita
+(ver signals.py).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Avg, Count, Max, Min, Q
+
+from core.cache import obter_ou_calcular
+from .models import DespesaVariavel
+
+
+RECURSO_CACHE = 'despesas_variaveis'
+
+# Quantis calculados sobre os valores por unidade das despesas ativas
+QUANTIS = (
+    ('p25', Decimal('0.25')),
+    ('mediana', Decimal('0.5')),
+    ('p75', Decimal('0.75')),
+    ('p90', Decimal('0.9')),
+)
+
+CENTAVOS = Decimal('0.01')
+
+# As despesas com valor zero não entram nas médias, mínimos e máximos
+FILTRO_VALORES = Q(ativa=True) & ~Q(valor_por_unidade=0)
+
+
+def _arredondar(valor):
+    if valor is None:
+        return Decimal('0')
+    return Decimal(valor).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def calcular_quantil(valores_ordenados, fracao):
+    """
+    Quantil com interpolação linear entre os vizinhos mais próximos
+    (o mesmo método 'inclusive' de statistics.quantiles).
+    """
+    if not valores_ordenados:
+        return Decimal('0')
+    posicao = (len(valores_ordenados) - 1) * fracao
+    indice = int(posicao)
+    inferior = valores_ordenados[indice]
+    if indice + 1 >= len(valores_ordenados):
+        return inferior
+    superior = valores_ordenados[indice + 1]
+    return inferior + (superior - inferior) * (posicao - indice)
+
+
+def calcular_estatisticas(usuario):
+    """Calcula as estatísticas em três consultas"""
+    queryset = DespesaVariavel.objects.filter(usuario=usuario).order_by()
+
+    totais = queryset.aggregate(
+        total_despesas=Count('id'),
+        despesas_ativas=Count('id', filter=Q(ativa=True)),
+        unidades_medida_diferentes=Count('unidade_medida', distinct=True),
+        valor_medio_por_unidade=Avg('valor_por_unidade', filter=FILTRO_VALORES),
+        valor_minimo=Min('valor_por_unidade', filter=FILTRO_VALORES),
+        valor_maximo=Max('valor_por_unidade', filter=FILTRO_VALORES),
+    )
+
+    unidades = [
+        {
+            'unidade': linha['unidade_medida'],
+            'quantidade': linha['quantidade'],
+            'valor_medio': _arredondar(linha['valor_medio']),
+            'valor_minimo': linha['valor_minimo'] or Decimal('0'),
+            'valor_maximo': linha['valor_maximo'] or Decimal('0'),
+        }
+        for linha in queryset.filter(ativa=True)
+        .values('unidade_medida')
+        .annotate(
+            quantidade=Count('id'),
+            valor_medio=Avg('valor_por_unidade'),
+            valor_minimo=Min('valor_por_unidade'),
+            valor_maximo=Max('valor_por_unidade'),
+        )
+        .order_by('-quantidade', 'unidade_medida')
+    ]
+
+    valores = list(
+        queryset.filter(FILTRO_VALORES)
+        .order_by('valor_por_unidade')
+        .values_list('valor_por_unidade', flat=True)
+    )
+
+    return {
+        'total_despesas': totais['total_despesas'],
+        'despesas_ativas': totais['despesas_ativas'],
+        'despesas_inativas': totais['total_despesas'] - totais['despesas_ativas'],
+        'unidades_medida_diferentes': totais['unidades_medida_diferentes'],
+        'valor_medio_por_unidade': _arredondar(totais['valor_medio_por_unidade']),
+        'valor_minimo': totais['valor_minimo'] or Decimal('0'),
+        'valor_maximo': totais['valor_maximo'] or Decimal('0'),
+        'quantis': {
+            nome: _arredondar(calcular_quantil(valores, fracao)) for nome, fracao in QUANTIS
+        },
+        'unidades_mais_utilizadas': [
+            {'unidade': item['unidade'], 'quantidade': item['quantidade']}
+            for item in unidades[:5]
+        ],
+        'unidades': unidades,
+    }
+
+
+def obter_estatisticas(usuario):
+    """Retorna as estatísticas do cache ou as calcula"""
+    return obter_ou_calcular(
+        RECURSO_CACHE, usuario.pk, lambda: calcular_estatisticas(usuario), 'estatisticas'
+    )
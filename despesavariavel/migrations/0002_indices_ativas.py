@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('despesavariavel', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='despesavariavel',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['usuario', '-created_at'], name='despvar_ativas_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='despesavariavel',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['usuario', 'nome'], name='despvar_ativas_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='despesavariavel',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['usuario', 'valor_por_unidade'], name='despvar_ativas_valor_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:12
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migracoes import renomear_nomes_repetidos
+
+
+def renomear_repetidos(apps, schema_editor):
+    renomear_nomes_repetidos(apps.get_model('despesavariavel', 'DespesaVariavel'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('despesavariavel', '0002_indices_ativas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='despesavariavel',
+            name='unique_despesa_variavel_por_usuario',
+        ),
+        migrations.RunPython(renomear_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='despesavariavel',
+            constraint=models.UniqueConstraint(models.F('usuario'), django.db.models.functions.text.Lower('nome'), name='despesavariavel_nome_unico_por_usuario', violation_error_message='Já existe uma despesa variável com este nome para este usuário.'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from decimal import Decimal
+from core.formatacao import formatar_real
 
 User = get_user_model()
 
@@ -62,11 +65,26 @@ class DespesaVariavel(models.Model):
             models.Index(fields=['usuario', 'ativa']),
             models.Index(fields=['nome']),
             models.Index(fields=['created_at']),
+            # Listagem de ativas (ver DespesaVariavelViewSet.ativas), uma por ordenação aceita
+            models.Index(
+                fields=['usuario', '-created_at'], condition=Q(ativa=True),
+                name='despvar_ativas_criacao_idx'
+            ),
+            models.Index(
+                fields=['usuario', 'nome'], condition=Q(ativa=True),
+                name='despvar_ativas_nome_idx'
+            ),
+            models.Index(
+                fields=['usuario', 'valor_por_unidade'], condition=Q(ativa=True),
+                name='despvar_ativas_valor_idx'
+            ),
         ]
         constraints = [
+            # Nome único por usuário, sem diferenciar maiúsculas de minúsculas
             models.UniqueConstraint(
-                fields=['usuario', 'nome'],
-                name='unique_despesa_variavel_por_usuario'
+                'usuario', Lower('nome'),
+                name='despesavariavel_nome_unico_por_usuario',
+                violation_error_message='Já existe uma despesa variável com este nome para este usuário.'
             )
         ]
 
@@ -74,7 +92,10 @@ class DespesaVariavel(models.Model):
         return f"{self.nome} - {self.usuario.username}"
 
     def clean(self):
-        """Validações personalizadas do modelo"""
+        """
+        Validações personalizadas do modelo, usadas pelo admin (full_clean).
+        A API valida nos serializers; a unicidade é garantida pelo banco.
+        """
         super().clean()
         
         if self.valor_por_unidade is not None and self.valor_por_unidade < 0:
@@ -97,17 +118,10 @@ class DespesaVariavel(models.Model):
                 'unidade_medida': 'A unidade de medida é obrigatória.'
             })
 
-    def save(self, *args, **kwargs):
-        """Override do save para executar validações"""
-        self.full_clean()
-        super().save(*args, **kwargs)
-
     @property
     def valor_formatado(self):
         """Retorna o valor formatado em real brasileiro"""
-        if self.valor_por_unidade:
-            return f"R$ {self.valor_por_unidade:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        return "R$ 0,00"
+        return formatar_real(self.valor_por_unidade)
 
     @property
     def status_text(self):
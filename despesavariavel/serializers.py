@@ -1,9 +1,14 @@
 from rest_framework import serializers
 from decimal import Decimal
+from core.bulk import BulkCreateListSerializer, BulkUpdateListSerializer
+from core.integridade import UnicidadeNoBancoMixin
 from .models import DespesaVariavel
 
 
-class DespesaVariavelSerializer(serializers.ModelSerializer):
+MENSAGEM_NOME_DUPLICADO = 'Já existe uma despesa variável com este nome para este usuário.'
+
+
+class DespesaVariavelSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo DespesaVariavel.
     Usado para listagem e detalhes de despesas variáveis.
@@ -13,6 +18,8 @@ class DespesaVariavelSerializer(serializers.ModelSerializer):
     info_completa = serializers.ReadOnlyField()
     usuario_nome = serializers.CharField(source='usuario.username', read_only=True)
 
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = DespesaVariavel
         fields = [
@@ -52,31 +59,14 @@ class DespesaVariavelSerializer(serializers.ModelSerializer):
         
         return value.strip()
 
-    def validate(self, attrs):
-        """Validações que envolvem múltiplos campos"""
-        # Verifica se já existe uma despesa com o mesmo nome para o usuário
-        nome = attrs.get('nome')
-        usuario = attrs.get('usuario')
-        
-        if nome and usuario:
-            # No caso de update, exclui o objeto atual da verificação
-            queryset = DespesaVariavel.objects.filter(usuario=usuario, nome=nome)
-            if self.instance:
-                queryset = queryset.exclude(id=self.instance.id)
-            
-            if queryset.exists():
-                raise serializers.ValidationError({
-                    'nome': 'Já existe uma despesa variável com este nome para este usuário.'
-                })
-        
-        return attrs
-
 
-class DespesaVariavelCreateSerializer(serializers.ModelSerializer):
+class DespesaVariavelCreateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer específico para criação de despesas variáveis.
     Remove campos desnecessários na criação.
     """
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = DespesaVariavel
         fields = [
@@ -119,11 +109,13 @@ class DespesaVariavelCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class DespesaVariavelUpdateSerializer(serializers.ModelSerializer):
+class DespesaVariavelUpdateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer específico para atualização de despesas variáveis.
     Permite atualizações parciais.
     """
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = DespesaVariavel
         fields = [
@@ -180,3 +172,27 @@ class DespesaVariavelListSerializer(serializers.ModelSerializer):
             'id', 'nome', 'valor_por_unidade', 'unidade_medida', 'ativa', 
             'created_at', 'valor_formatado', 'status_text', 'info_completa'
         ]
+
+
+class DespesaVariavelBulkCreateSerializer(DespesaVariavelCreateSerializer):
+    """
+    Serializer para criação de despesas variáveis em lote.
+    A unicidade dos nomes é verificada para o lote inteiro pelo ListSerializer.
+    """
+    mensagem_nome_duplicado = MENSAGEM_NOME_DUPLICADO
+
+    class Meta(DespesaVariavelCreateSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
+
+class DespesaVariavelBulkUpdateSerializer(DespesaVariavelUpdateSerializer):
+    """
+    Serializer para atualização parcial de despesas variáveis em lote.
+    Cada item identifica a despesa pelo campo id.
+    """
+    id = serializers.IntegerField()
+    mensagem_nome_duplicado = MENSAGEM_NOME_DUPLICADO
+
+    class Meta(DespesaVariavelUpdateSerializer.Meta):
+        fields = ['id'] + DespesaVariavelUpdateSerializer.Meta.fields
+        list_serializer_class = BulkUpdateListSerializer
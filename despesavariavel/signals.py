@@ -0,0 +1,20 @@
+"""
+Invalidação dos caches derivados das despesas variáveis.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar
+from core.signals import dados_alterados
+from .estatisticas import RECURSO_CACHE
+from .models import DespesaVariavel
+
+
+@receiver([post_save, post_delete], sender=DespesaVariavel)
+def invalidar_ao_salvar(sender, instance, **kwargs):
+    invalidar(RECURSO_CACHE, instance.usuario_id)
+
+
+@receiver(dados_alterados, sender=DespesaVariavel)
+def invalidar_em_lote(sender, usuario_ids, **kwargs):
+    invalidar(RECURSO_CACHE, *usuario_ids)
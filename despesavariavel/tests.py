@@ -1,5 +1,9 @@
+from unittest import skipUnless
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 from rest_framework import status
 from decimal import Decimal
@@ -60,6 +64,7 @@ class DespesaVariavelAPITest(APITestCase):
     """
     
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
@@ -83,6 +88,28 @@ class DespesaVariavelAPITest(APITestCase):
         self.assertEqual(DespesaVariavel.objects.count(), 1)
         self.assertEqual(DespesaVariavel.objects.first().usuario, self.user)
     
+    def test_create_despesa_variavel_nome_duplicado(self):
+        """Testa que um nome repetido retorna 400 com a mensagem de unicidade"""
+        self.client.force_authenticate(user=self.user)
+        self.client.post('/api/despesas-variaveis/', self.despesa_data, format='json')
+        response = self.client.post('/api/despesas-variaveis/', self.despesa_data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['nome'], ['Já existe uma despesa variável com este nome para este usuário.']
+        )
+        self.assertEqual(DespesaVariavel.objects.count(), 1)
+
+    def test_toggle_status_sem_consulta_de_unicidade(self):
+        """Testa que alternar o status não revalida o modelo (sem SELECT de unicidade)"""
+        despesa = DespesaVariavel.objects.create(usuario=self.user, **self.despesa_data)
+        self.client.force_authenticate(user=self.user)
+
+        # Busca da despesa, UPDATE e o usuário de usuario_nome na resposta
+        with self.assertNumQueries(3):
+            response = self.client.post(f'/api/despesas-variaveis/{despesa.id}/toggle_status/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_create_despesa_variavel_unauthenticated(self):
         """Testa criação de despesa variável sem autenticação"""
         response = self.client.post('/api/despesas-variaveis/', self.despesa_data, format='json')
@@ -100,3 +127,222 @@ class DespesaVariavelAPITest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
+
+    def test_bulk_create_despesas_variaveis(self):
+        """Testa criação de despesas variáveis em lote"""
+        self.client.force_authenticate(user=self.user)
+        data = [
+            {'nome': 'Embalagem', 'valor_por_unidade': '1.50', 'unidade_medida': 'unidade'},
+            {'nome': 'Combustível', 'valor_por_unidade': '5.50', 'unidade_medida': 'litro'},
+        ]
+        response = self.client.post('/api/despesas-variaveis/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['nome'] for item in response.data], ['Embalagem', 'Combustível'])
+        self.assertEqual(DespesaVariavel.objects.filter(usuario=self.user).count(), 2)
+
+    def test_bulk_create_despesas_variaveis_lote_invalido(self):
+        """Testa que nenhum registro é criado quando um item do lote é inválido"""
+        self.client.force_authenticate(user=self.user)
+        data = [
+            {'nome': 'Embalagem', 'valor_por_unidade': '1.50', 'unidade_medida': 'unidade'},
+            {'nome': 'Embalagem', 'valor_por_unidade': '2.00', 'unidade_medida': 'unidade'},
+            {'nome': 'Gás', 'valor_por_unidade': '-1.00', 'unidade_medida': 'kg'},
+        ]
+        response = self.client.post('/api/despesas-variaveis/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(DespesaVariavel.objects.count(), 0)
+
+    def test_bulk_delete_despesas_variaveis(self):
+        """Testa remoção de despesas variáveis em lote"""
+        despesa = DespesaVariavel.objects.create(usuario=self.user, **self.despesa_data)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.delete(
+            '/api/despesas-variaveis/bulk/', {'ids': [despesa.id]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['removidos'], 1)
+        self.assertFalse(DespesaVariavel.objects.exists())
+
+    def _criar_despesas_para_estatisticas(self):
+        dados = [
+            ('Embalagem', '1.00', 'unidade', True),
+            ('Etiqueta', '2.00', 'unidade', True),
+            ('Sacola', '3.00', 'unidade', True),
+            ('Gás', '4.00', 'kg', True),
+            ('Brinde', '0.00', 'unidade', True),
+            ('Frete', '10.00', 'km', False),
+        ]
+        DespesaVariavel.objects.bulk_create([
+            DespesaVariavel(
+                usuario=self.user, nome=nome, valor_por_unidade=Decimal(valor),
+                unidade_medida=unidade, ativa=ativa
+            )
+            for nome, valor, unidade, ativa in dados
+        ])
+
+    def test_estatisticas(self):
+        """Testa as estatísticas calculadas em número fixo de consultas"""
+        self._criar_despesas_para_estatisticas()
+        self.client.force_authenticate(user=self.user)
+
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/despesas-variaveis/estatisticas/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_despesas'], 6)
+        self.assertEqual(response.data['despesas_ativas'], 5)
+        self.assertEqual(response.data['despesas_inativas'], 1)
+        self.assertEqual(response.data['unidades_medida_diferentes'], 3)
+        self.assertEqual(response.data['valor_medio_por_unidade'], Decimal('2.50'))
+        self.assertEqual(response.data['valor_minimo'], Decimal('1.00'))
+        self.assertEqual(response.data['valor_maximo'], Decimal('4.00'))
+        self.assertEqual(response.data['quantis']['mediana'], Decimal('2.50'))
+        self.assertEqual(response.data['quantis']['p25'], Decimal('1.75'))
+        self.assertEqual(
+            response.data['unidades_mais_utilizadas'],
+            [{'unidade': 'unidade', 'quantidade': 4}, {'unidade': 'kg', 'quantidade': 1}]
+        )
+        self.assertEqual(response.data['unidades'][0]['valor_maximo'], Decimal('3.00'))
+
+        # A segunda leitura vem do cache
+        with self.assertNumQueries(0):
+            self.client.get('/api/despesas-variaveis/estatisticas/')
+
+    def test_estatisticas_invalidadas_apos_alteracao(self):
+        """Testa que o cache das estatísticas é descartado após escritas"""
+        self._criar_despesas_para_estatisticas()
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/despesas-variaveis/estatisticas/')
+
+        despesa = DespesaVariavel.objects.get(usuario=self.user, nome='Frete')
+        self.client.post(f'/api/despesas-variaveis/{despesa.id}/toggle_status/')
+        response = self.client.get('/api/despesas-variaveis/estatisticas/')
+        self.assertEqual(response.data['despesas_ativas'], 6)
+
+        self.client.post(
+            '/api/despesas-variaveis/bulk/',
+            [{'nome': 'Fita', 'valor_por_unidade': '0.50', 'unidade_medida': 'm'}],
+            format='json'
+        )
+        response = self.client.get('/api/despesas-variaveis/estatisticas/')
+        self.assertEqual(response.data['total_despesas'], 7)
+        self.assertEqual(response.data['valor_minimo'], Decimal('0.50'))
+
+    def test_por_unidade(self):
+        """Testa o agrupamento por unidade de medida"""
+        self._criar_despesas_para_estatisticas()
+        self.client.force_authenticate(user=self.user)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/despesas-variaveis/por_unidade/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_unidades'], 2)
+        self.assertEqual(
+            [item['nome'] for item in response.data['unidades_medida']['unidade']],
+            ['Brinde', 'Embalagem', 'Etiqueta', 'Sacola']
+        )
+        self.assertEqual(response.data['unidades_medida']['kg'][0]['valor_formatado'], 'R$ 4,00')
+        self.assertNotIn('km', response.data['unidades_medida'])
+
+    def test_por_unidade_paginado(self):
+        """Testa a paginação dentro de cada grupo"""
+        self._criar_despesas_para_estatisticas()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get('/api/despesas-variaveis/por_unidade/?limite=3&pagina=2')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['nome'] for item in response.data['unidades_medida']['unidade']], ['Sacola']
+        )
+        self.assertEqual(response.data['unidades_medida']['kg'], [])
+        self.assertEqual(response.data['total_por_unidade'], {'kg': 1, 'unidade': 4})
+
+        response = self.client.get('/api/despesas-variaveis/por_unidade/?limite=0')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_por_unidade_etag(self):
+        """Testa que o agrupamento não é retransmitido enquanto não muda"""
+        self._criar_despesas_para_estatisticas()
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get('/api/despesas-variaveis/por_unidade/')['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/despesas-variaveis/por_unidade/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        despesa = DespesaVariavel.objects.get(usuario=self.user, nome='Gás')
+        self.client.patch(
+            f'/api/despesas-variaveis/{despesa.id}/', {'unidade_medida': 'unidade'}, format='json'
+        )
+        response = self.client.get('/api/despesas-variaveis/por_unidade/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_unidades'], 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plano de consulta no formato do SQLite')
+class DespesaVariavelAtivasIndicesTest(APITestCase):
+    """
+    Tests para a listagem de ativas e os índices que a atendem.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Empresa Teste'
+        )
+        self.client.force_authenticate(user=self.user)
+        for indice in range(5):
+            DespesaVariavel.objects.create(
+                usuario=self.user, nome=f'Despesa {indice}', unidade_medida='un',
+                valor_por_unidade=Decimal(indice + 1), ativa=indice % 2 == 0
+            )
+
+    def _plano_da_listagem(self, url):
+        """Executa a requisição e retorna o plano da consulta que lista as despesas"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = next(c['sql'] for c in consultas.captured_queries if 'ORDER BY' in c['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plano = ' '.join(linha[-1] for linha in cursor.fetchall())
+        return response, plano
+
+    def test_ordenacoes_aceitas_usam_indices_parciais(self):
+        """
+        Test se cada ordenação aceita em ativas é atendida por um índice.
+        """
+        casos = {
+            '': 'despvar_ativas_criacao_idx',
+            '?ordering=nome': 'despvar_ativas_nome_idx',
+            '?ordering=-valor_por_unidade': 'despvar_ativas_valor_idx',
+        }
+        for parametros, indice in casos.items():
+            with self.subTest(parametros=parametros):
+                response, plano = self._plano_da_listagem(f'/api/despesas-variaveis/ativas/{parametros}')
+                self.assertIn(indice, plano)
+                self.assertNotIn('TEMP B-TREE', plano)
+                self.assertEqual(response.data['count'], 3)
+
+    def test_ordenacao_fora_da_lista_e_ignorada(self):
+        """
+        Test se ordenações não permitidas em ativas são ignoradas, sem erro.
+        """
+        response, plano = self._plano_da_listagem(
+            '/api/despesas-variaveis/ativas/?ordering=unidade_medida,usuario__email'
+        )
+        self.assertIn('despvar_ativas_criacao_idx', plano)
+
+        response = self.client.get('/api/despesas-variaveis/ativas/?unidade_medida=un&search=Despesa 4')
+        self.assertEqual([item['nome'] for item in response.data['results']], ['Despesa 4'])
@@ -23,3 +23,6 @@ urlpatterns = [
 # POST   /api/despesas-variaveis/{id}/toggle-status/     -> toggle_status (ação customizada)
 # GET    /api/despesas-variaveis/por-unidade/            -> por_unidade (ação customizada)
 # GET    /api/despesas-variaveis/estatisticas/           -> estatisticas (ação customizada)
+# POST   /api/despesas-variaveis/bulk/               -> bulk (criação em lote)
+# PATCH  /api/despesas-variaveis/bulk/               -> bulk (atualização em lote)
+# DELETE /api/despesas-variaveis/bulk/               -> bulk (remoção em lote)
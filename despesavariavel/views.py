@@ -2,19 +2,30 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import SearchFilter
 from django.db.models import Q, Sum
+from core.bulk import BulkModelViewSetMixin
+from core.filtros import OrdenacaoPorAcao
+from core.cache import etag_corresponde, etag_versionada, obter_ou_calcular
+from .agrupamento import agrupar_por_unidade
+from .estatisticas import RECURSO_CACHE, obter_estatisticas
 from .models import DespesaVariavel
 from .filters import DespesaVariavelFilter
 from .serializers import (
     DespesaVariavelSerializer,
     DespesaVariavelCreateSerializer,
     DespesaVariavelUpdateSerializer,
-    DespesaVariavelListSerializer
+    DespesaVariavelListSerializer,
+    DespesaVariavelBulkCreateSerializer,
+    DespesaVariavelBulkUpdateSerializer
 )
 
 
-class DespesaVariavelViewSet(viewsets.ModelViewSet):
+# Máximo de despesas por grupo em uma página de por_unidade
+LIMITE_MAXIMO_POR_UNIDADE = 500
+
+
+class DespesaVariavelViewSet(BulkModelViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento completo de despesas variáveis.
     
@@ -31,19 +42,29 @@ class DespesaVariavelViewSet(viewsets.ModelViewSet):
     - POST /despesas-variaveis/{id}/toggle-status/ - Ativa/desativa uma despesa variável
     - GET /despesas-variaveis/por-unidade/ - Lista despesas agrupadas por unidade de medida
     - GET /despesas-variaveis/estatisticas/ - Retorna estatísticas das despesas variáveis
+    - POST/PATCH/DELETE /despesas-variaveis/bulk/ - Operações em lote
     """
     serializer_class = DespesaVariavelSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrdenacaoPorAcao]
     filterset_class = DespesaVariavelFilter
     search_fields = ['nome', 'descricao', 'unidade_medida']
     ordering_fields = ['nome', 'valor_por_unidade', 'unidade_medida', 'created_at', 'updated_at']
+    # Em ativas, apenas as ordenações cobertas pelos índices parciais do modelo
+    ordering_fields_por_acao = {
+        'ativas': ['nome', 'valor_por_unidade', 'created_at'],
+    }
     ordering = ['-created_at']
+    bulk_create_serializer_class = DespesaVariavelBulkCreateSerializer
+    bulk_update_serializer_class = DespesaVariavelBulkUpdateSerializer
+    bulk_response_serializer_class = DespesaVariavelSerializer
 
     def get_queryset(self):
         """
         Retorna apenas as despesas variáveis do usuário autenticado.
         """
+        if getattr(self, 'swagger_fake_view', False):
+            return DespesaVariavel.objects.none()
         return DespesaVariavel.objects.filter(usuario=self.request.user)
 
     def get_serializer_class(self):
@@ -74,13 +95,19 @@ class DespesaVariavelViewSet(viewsets.ModelViewSet):
     def ativas(self, request):
         """
         Retorna apenas as despesas variáveis ativas do usuário.
+
+        Aceita os mesmos filtros, a mesma busca e a mesma paginação da
+        listagem; a ordenação é limitada a nome, valor_por_unidade e created_at.
         """
-        despesas_ativas = self.get_queryset().filter(ativa=True)
-        serializer = DespesaVariavelListSerializer(despesas_ativas, many=True)
-        return Response({
-            'count': despesas_ativas.count(),
-            'results': serializer.data
-        })
+        queryset = self.filter_queryset(self.get_queryset().filter(ativa=True))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = DespesaVariavelListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = DespesaVariavelListSerializer(queryset, many=True)
+        return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def toggle_status(self, request, pk=None):
@@ -101,83 +128,65 @@ class DespesaVariavelViewSet(viewsets.ModelViewSet):
     def por_unidade(self, request):
         """
         Retorna despesas variáveis agrupadas por unidade de medida.
+
+        Parâmetros opcionais:
+        - unidade: retorna apenas o grupo da unidade informada
+        - limite: máximo de despesas por grupo (paginação dentro dos grupos)
+        - pagina: página de cada grupo, a partir de 1 (requer limite)
+
+        A resposta traz uma ETag; com If-None-Match igual à ETag atual,
+        retorna 304 sem recalcular o agrupamento.
         """
-        queryset = self.get_queryset().filter(ativa=True)
-        
-        # Agrupa por unidade de medida
-        unidades = {}
-        for despesa in queryset:
-            unidade = despesa.unidade_medida
-            if unidade not in unidades:
-                unidades[unidade] = []
-            unidades[unidade].append({
-                'id': despesa.id,
-                'nome': despesa.nome,
-                'valor_por_unidade': despesa.valor_por_unidade,
-                'valor_formatado': despesa.valor_formatado,
-                'descricao': despesa.descricao
-            })
-        
-        return Response({
-            'unidades_medida': unidades,
-            'total_unidades': len(unidades)
-        })
+        try:
+            parametros = self._parametros_por_unidade(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        partes = ('por_unidade', parametros['unidade'], parametros['limite'], parametros['pagina'])
+        etag = etag_versionada(RECURSO_CACHE, request.user.pk, *partes)
+        cabecalhos = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag_corresponde(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+
+        dados = obter_ou_calcular(
+            RECURSO_CACHE, request.user.pk,
+            lambda: agrupar_por_unidade(request.user, **parametros),
+            *partes
+        )
+        return Response(dados, headers=cabecalhos)
+
+    def _parametros_por_unidade(self, query_params):
+        """Valida os parâmetros de filtro e paginação de por_unidade"""
+        parametros = {
+            'unidade': query_params.get('unidade', '').strip() or None,
+            'limite': None,
+            'pagina': 1,
+        }
+        for nome, maximo in (('limite', LIMITE_MAXIMO_POR_UNIDADE), ('pagina', None)):
+            valor = query_params.get(nome)
+            if valor in (None, ''):
+                continue
+            try:
+                valor = int(valor)
+            except ValueError:
+                raise ValueError(f'O parâmetro "{nome}" deve ser um número inteiro.')
+            if valor < 1 or (maximo and valor > maximo):
+                raise ValueError(
+                    f'O parâmetro "{nome}" deve estar entre 1 e {maximo}.' if maximo
+                    else f'O parâmetro "{nome}" deve ser maior que zero.'
+                )
+            parametros[nome] = valor
+        if parametros['pagina'] > 1 and not parametros['limite']:
+            raise ValueError('O parâmetro "pagina" requer o parâmetro "limite".')
+        return parametros
 
     @action(detail=False, methods=['get'])
     def estatisticas(self, request):
         """
         Retorna estatísticas das despesas variáveis do usuário.
+        O resultado fica em cache até a próxima alteração nas despesas.
         """
-        queryset = self.get_queryset()
-        ativas = queryset.filter(ativa=True)
-        inativas = queryset.filter(ativa=False)
-        
-        # Estatísticas básicas
-        stats = {
-            'total_despesas': queryset.count(),
-            'despesas_ativas': ativas.count(),
-            'despesas_inativas': inativas.count(),
-            'unidades_medida_diferentes': queryset.values('unidade_medida').distinct().count(),
-        }
-        
-        # Valor médio por unidade (apenas ativas)
-        if ativas.exists():
-            valores = [d.valor_por_unidade for d in ativas if d.valor_por_unidade]
-            if valores:
-                stats['valor_medio_por_unidade'] = sum(valores) / len(valores)
-                stats['valor_minimo'] = min(valores)
-                stats['valor_maximo'] = max(valores)
-            else:
-                stats['valor_medio_por_unidade'] = 0
-                stats['valor_minimo'] = 0
-                stats['valor_maximo'] = 0
-        else:
-            stats['valor_medio_por_unidade'] = 0
-            stats['valor_minimo'] = 0
-            stats['valor_maximo'] = 0
-        
-        # Unidades de medida mais utilizadas
-        unidades_stats = {}
-        for despesa in ativas:
-            unidade = despesa.unidade_medida
-            if unidade in unidades_stats:
-                unidades_stats[unidade] += 1
-            else:
-                unidades_stats[unidade] = 1
-        
-        # Ordena por quantidade de uso
-        unidades_ordenadas = sorted(
-            unidades_stats.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )
-        
-        stats['unidades_mais_utilizadas'] = [
-            {'unidade': unidade, 'quantidade': qtd} 
-            for unidade, qtd in unidades_ordenadas[:5]
-        ]
-        
-        return Response(stats)
+        return Response(obter_estatisticas(request.user))
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class ExportacaoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'exportacao'
+    verbose_name = 'Exportação de Dados'
@@ -0,0 +1,153 @@
+"""
+Exportação de todos os dados de um usuário em JSON Lines ou CSV compactado.
+
+Cada entidade é lida com values_list(...).iterator(chunk_size=...), que usa
+cursores do lado do servidor quando o banco suporta, e as linhas são
+convertidas e enviadas aos poucos. A memória usada não depende da
+quantidade de registros exportados.
+"""
+import csv
+import io
+import zipfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+
+from analisefinanceira.models import AnaliseFinanceira
+from despesafixa.models import DespesaFixa
+from despesavariavel.models import DespesaVariavel
+from ingredientes.models import Ingrediente
+from produtos.models import Produto, ProdutoIngrediente, ProdutoDespesaFixa, ProdutoDespesaVariavel
+
+User = get_user_model()
+
+
+# (nome, função que retorna o queryset do usuário, campos exportados)
+ENTIDADES = (
+    ('usuario', lambda usuario: User.objects.filter(pk=usuario.pk), [
+        'id', 'username', 'email', 'first_name', 'last_name', 'nome_comercial',
+        'telefone', 'cnpj', 'endereco', 'date_joined', 'created_at', 'updated_at',
+    ]),
+    ('despesas_fixas', lambda usuario: DespesaFixa.objects.filter(usuario=usuario), [
+        'id', 'nome', 'valor', 'recorrencia', 'data_inicio', 'data_fim', 'descricao', 'ativa',
+        'created_at', 'updated_at',
+    ]),
+    ('despesas_variaveis', lambda usuario: DespesaVariavel.objects.filter(usuario=usuario), [
+        'id', 'nome', 'valor_por_unidade', 'unidade_medida', 'descricao', 'ativa',
+        'created_at', 'updated_at',
+    ]),
+    ('ingredientes', lambda usuario: Ingrediente.objects.filter(usuario=usuario), [
+        'id', 'nome', 'preco_por_unidade', 'unidade_medida', 'fornecedor',
+        'created_at', 'updated_at',
+    ]),
+    ('produtos', lambda usuario: Produto.objects.filter(usuario=usuario), [
+        'id', 'nome', 'descricao', 'tempo_preparo', 'margem_lucro', 'periodo_analise',
+        'producao_diaria', 'created_at', 'updated_at',
+    ]),
+    ('produto_ingredientes', lambda usuario: ProdutoIngrediente.objects.filter(produto__usuario=usuario), [
+        'id', 'produto_id', 'ingrediente_id', 'quantidade', 'created_at',
+    ]),
+    ('produto_despesas_fixas', lambda usuario: ProdutoDespesaFixa.objects.filter(produto__usuario=usuario), [
+        'id', 'produto_id', 'despesa_fixa_id', 'created_at',
+    ]),
+    ('produto_despesas_variaveis', lambda usuario: ProdutoDespesaVariavel.objects.filter(produto__usuario=usuario), [
+        'id', 'produto_id', 'despesa_variavel_id', 'quantidade', 'created_at',
+    ]),
+    ('analises_financeiras', lambda usuario: AnaliseFinanceira.objects.filter(produto__usuario=usuario), [
+        'id', 'produto_id', 'custo_ingredientes', 'custo_despesas_fixas',
+        'custo_despesas_variaveis', 'custo_total_producao', 'preco_venda_sugerido',
+        'faturamento_previsto', 'lucro_previsto', 'created_at',
+    ]),
+)
+
+
+def _tamanho_chunk():
+    return getattr(settings, 'EXPORTACAO_CHUNK_SIZE', 2000)
+
+
+def _linhas(usuario, queryset_do_usuario, campos):
+    """Itera as tuplas de valores de uma entidade, em ordem de id"""
+    return (
+        queryset_do_usuario(usuario)
+        .order_by('pk')
+        .values_list(*campos)
+        .iterator(chunk_size=_tamanho_chunk())
+    )
+
+
+def gerar_jsonl(usuario):
+    """
+    Gera o export em JSON Lines: um objeto por linha, com a chave "tipo"
+    indicando a entidade. Decimais são exportados como texto.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    chunk = _tamanho_chunk()
+
+    for nome, queryset_do_usuario, campos in ENTIDADES:
+        partes = []
+        for valores in _linhas(usuario, queryset_do_usuario, campos):
+            registro = {'tipo': nome}
+            registro.update(zip(campos, valores))
+            partes.append(encoder.encode(registro))
+            if len(partes) >= chunk:
+                yield ('\n'.join(partes) + '\n').encode('utf-8')
+                partes = []
+        if partes:
+            yield ('\n'.join(partes) + '\n').encode('utf-8')
+
+
+class _BufferStreaming(io.RawIOBase):
+    """
+    Destino não posicionável para o zipfile: acumula os bytes escritos até
+    que sejam consumidos pelo gerador da resposta.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def esvaziar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def gerar_csv_zip(usuario):
+    """
+    Gera o export em um arquivo ZIP com um CSV por entidade.
+    O ZIP é escrito em modo streaming (sem posicionamento), então cada
+    bloco é enviado assim que é compactado.
+    """
+    buffer = _BufferStreaming()
+    chunk = _tamanho_chunk()
+
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for nome, queryset_do_usuario, campos in ENTIDADES:
+            with arquivo_zip.open(f'{nome}.csv', mode='w', force_zip64=True) as destino:
+                texto = io.TextIOWrapper(destino, encoding='utf-8', newline='')
+                escritor = csv.writer(texto)
+                escritor.writerow(campos)
+                for indice, valores in enumerate(_linhas(usuario, queryset_do_usuario, campos), start=1):
+                    escritor.writerow(valores)
+                    if indice % chunk == 0:
+                        texto.flush()
+                        yield buffer.esvaziar()
+                texto.flush()
+                texto.detach()
+            yield buffer.esvaziar()
+
+    yield buffer.esvaziar()
+
+
+FORMATOS = {
+    'jsonl': (gerar_jsonl, 'application/x-ndjson', 'jsonl'),
+    'csv': (gerar_csv_zip, 'application/zip', 'zip'),
+}
+
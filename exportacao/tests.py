@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import zipfile
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from despesafixa.models import DespesaFixa
+from ingredientes.models import Ingrediente
+from produtos.models import Produto, ProdutoIngrediente
+
+User = get_user_model()
+
+
+class ExportacaoAPITest(APITestCase):
+    """
+    Testes para o endpoint de exportação.
+    """
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Teste Comercial'
+        )
+        outro = User.objects.create_user(
+            username='outro',
+            email='outro@example.com',
+            password='testpass123',
+            nome_comercial='Outro Comercial'
+        )
+        DespesaFixa.objects.create(usuario=self.user, nome='Aluguel', valor=Decimal('1500.00'))
+        DespesaFixa.objects.create(usuario=outro, nome='Energia', valor=Decimal('200.00'))
+        farinha = Ingrediente.objects.create(
+            usuario=self.user, nome='Farinha',
+            preco_por_unidade=Decimal('5.50'), unidade_medida='kg'
+        )
+        bolo = Produto.objects.create(
+            usuario=self.user, nome='Bolo', tempo_preparo=60,
+            margem_lucro=Decimal('30.00'), periodo_analise=30
+        )
+        ProdutoIngrediente.objects.create(produto=bolo, ingrediente=farinha, quantidade=Decimal('0.500'))
+        self.client.force_authenticate(user=self.user)
+
+    def test_exportacao_jsonl(self):
+        """Testa a exportação em JSON Lines apenas com os dados do usuário."""
+        response = self.client.get('/api/export/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        linhas = [
+            json.loads(linha)
+            for linha in b''.join(response.streaming_content).decode('utf-8').splitlines()
+        ]
+        por_tipo = {}
+        for linha in linhas:
+            por_tipo.setdefault(linha['tipo'], []).append(linha)
+
+        self.assertEqual(len(por_tipo['usuario']), 1)
+        self.assertNotIn('password', por_tipo['usuario'][0])
+        self.assertEqual([d['nome'] for d in por_tipo['despesas_fixas']], ['Aluguel'])
+        self.assertEqual(por_tipo['ingredientes'][0]['preco_por_unidade'], '5.50')
+        self.assertEqual(por_tipo['produto_ingredientes'][0]['quantidade'], '0.500')
+
+    @override_settings(EXPORTACAO_CHUNK_SIZE=1)
+    def test_exportacao_csv_zip(self):
+        """Testa a exportação em ZIP com um CSV por entidade, em blocos de um registro."""
+        response = self.client.get('/api/export/', {'formato': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        arquivo_zip = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('analises_financeiras.csv', arquivo_zip.namelist())
+        with arquivo_zip.open('despesas_fixas.csv') as arquivo:
+            linhas = list(csv.DictReader(io.TextIOWrapper(arquivo, encoding='utf-8')))
+        self.assertEqual(len(linhas), 1)
+        self.assertEqual(linhas[0]['nome'], 'Aluguel')
+        self.assertEqual(linhas[0]['valor'], '1500.00')
+
+    def test_formato_invalido(self):
+        """Testa um formato de exportação inválido."""
+        response = self.client.get('/api/export/', {'formato': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
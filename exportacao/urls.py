@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+# URLs do app exportacao
+urlpatterns = [
+    path('api/export/', views.ExportacaoView.as_view(), name='exportacao'),
+]
+
+# GET    /api/export/?formato=jsonl    -> exportação em JSON Lines (padrão)
+# GET    /api/export/?formato=csv      -> exportação em ZIP com um CSV por entidade
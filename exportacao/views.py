@@ -0,0 +1,34 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .exportador import FORMATOS
+
+
+class ExportacaoView(APIView):
+    """
+    Exporta todos os dados do usuário autenticado.
+
+    GET /api/export/?formato=jsonl  - JSON Lines (padrão)
+    GET /api/export/?formato=csv    - ZIP com um CSV por entidade
+
+    A resposta é enviada em streaming, sem montar o arquivo em memória.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        formato = request.query_params.get('formato', 'jsonl')
+        if formato not in FORMATOS:
+            return Response(
+                {'error': 'Formato inválido. Use "jsonl" ou "csv".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        gerador, content_type, extensao = FORMATOS[formato]
+        nome_arquivo = f"impostometro-{request.user.username}-{timezone.localdate():%Y%m%d}.{extensao}"
+
+        response = StreamingHttpResponse(gerador(request.user), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        response['Cache-Control'] = 'no-store'
+        return response
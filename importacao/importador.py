@@ -0,0 +1,294 @@
+"""
+Pipeline de importação do catálogo completo de um comerciante.
+
+As linhas produzidas pelos leitores são acumuladas por tipo e gravadas em
+lotes com bulk_create, reaproveitando os serializers de criação em lote
+(uma consulta de unicidade por lote). As receitas são resolvidas por meio de
+mapas nome -> id de produtos e ingredientes mantidos em memória.
+
+A importação inteira roda em uma única transação: se houver qualquer erro,
+ou se for uma simulação (dry-run), nada é gravado.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from core.signals import dados_alterados
+from despesafixa.models import DespesaFixa
+from despesafixa.serializers import DespesaFixaBulkCreateSerializer
+from despesavariavel.models import DespesaVariavel
+from despesavariavel.serializers import DespesaVariavelBulkCreateSerializer
+from ingredientes.models import Ingrediente
+from ingredientes.serializers import IngredienteBulkCreateSerializer
+from produtos.models import Produto, ProdutoIngrediente
+from produtos.serializers import ProdutoBulkCreateSerializer
+from .leitores import TIPOS
+
+
+MODELOS_POR_TIPO = {
+    'ingredientes': Ingrediente,
+    'despesas_fixas': DespesaFixa,
+    'despesas_variaveis': DespesaVariavel,
+    'produtos': Produto,
+    'receitas': ProdutoIngrediente,
+}
+
+SERIALIZERS_POR_TIPO = {
+    'ingredientes': IngredienteBulkCreateSerializer,
+    'despesas_fixas': DespesaFixaBulkCreateSerializer,
+    'despesas_variaveis': DespesaVariavelBulkCreateSerializer,
+    'produtos': ProdutoBulkCreateSerializer,
+}
+
+# Campos numéricos e booleanos de cada tipo, convertidos a partir do
+# formato usual das planilhas (1.234,56 / sim / não)
+CAMPOS_DECIMAIS = {
+    'ingredientes': {'preco_por_unidade'},
+    'despesas_fixas': {'valor'},
+    'despesas_variaveis': {'valor_por_unidade'},
+    'produtos': {'margem_lucro'},
+    'receitas': {'quantidade'},
+}
+CAMPOS_BOOLEANOS = {'ativa'}
+
+VALORES_VERDADEIROS = {'sim', 's', 'ativa', 'ativo'}
+VALORES_FALSOS = {'nao', 'não', 'n', 'inativa', 'inativo'}
+
+# Número máximo de erros detalhados no resultado
+LIMITE_ERROS_DETALHADOS = 100
+
+
+def normalizar_decimal(valor):
+    """Aceita números no formato brasileiro (1.234,56) ou internacional (1234.56)"""
+    if isinstance(valor, (int, float, Decimal)):
+        return str(valor)
+    valor = str(valor).replace('R$', '').replace(' ', '')
+    if ',' in valor:
+        valor = valor.replace('.', '').replace(',', '.')
+    return valor
+
+
+def normalizar_booleano(valor):
+    """Aceita sim/não além dos valores já reconhecidos pelo BooleanField"""
+    texto = str(valor).strip().lower()
+    if texto in VALORES_VERDADEIROS:
+        return True
+    if texto in VALORES_FALSOS:
+        return False
+    return valor
+
+
+class ResultadoImportacao:
+    """
+    Acumula o progresso e o resultado de uma importação.
+    """
+
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.importado = False
+        self.linhas_lidas = 0
+        self.criados = {tipo: 0 for tipo in TIPOS}
+        self.total_erros = 0
+        self.erros = []
+
+    @property
+    def sucesso(self):
+        return self.total_erros == 0
+
+    def adicionar_erro(self, tipo, linha, erros):
+        self.total_erros += 1
+        if len(self.erros) < LIMITE_ERROS_DETALHADOS:
+            self.erros.append({'tipo': tipo, 'linha': linha, 'erros': erros})
+
+    def como_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'importado': self.importado,
+            'linhas_lidas': self.linhas_lidas,
+            'criados': self.criados,
+            'total_criados': sum(self.criados.values()),
+            'total_erros': self.total_erros,
+            'erros': self.erros,
+        }
+
+
+class ImportadorCatalogo:
+    """
+    Importa ingredientes, despesas fixas, despesas variáveis, produtos e
+    receitas (ingredientes de cada produto) de um usuário.
+
+    Uso:
+        linhas = ler_planilha(arquivo, 'catalogo.xlsx')
+        resultado = ImportadorCatalogo(usuario, dry_run=True).importar(linhas)
+
+    O parâmetro progresso, se informado, é chamado com o ResultadoImportacao
+    após a gravação de cada lote.
+    """
+
+    def __init__(self, usuario, dry_run=False, tamanho_lote=None, progresso=None):
+        self.usuario = usuario
+        self.dry_run = dry_run
+        self.tamanho_lote = tamanho_lote or getattr(settings, 'IMPORTACAO_TAMANHO_LOTE', 1000)
+        self.progresso = progresso
+        self.resultado = ResultadoImportacao(dry_run)
+        self._pendentes = {tipo: [] for tipo in TIPOS}
+        self._mapas = {}
+        self._campo_quantidade = serializers.DecimalField(
+            max_digits=10, decimal_places=3,
+            min_value=Decimal('0.001'), max_value=Decimal('999999.999')
+        )
+
+    def importar(self, linhas):
+        """Consome as linhas (tipo, numero_linha, dados) e grava em lotes"""
+        with transaction.atomic():
+            for tipo, numero, dados in linhas:
+                self.resultado.linhas_lidas += 1
+                if tipo not in self._pendentes:
+                    self.resultado.adicionar_erro(
+                        tipo, numero, {'tipo': ['Tipo de registro desconhecido.']}
+                    )
+                    continue
+
+                self._pendentes[tipo].append((numero, dados))
+                if len(self._pendentes[tipo]) >= self.tamanho_lote:
+                    self._gravar(tipo)
+
+            for tipo in TIPOS:
+                self._gravar(tipo)
+
+            self.resultado.importado = not self.dry_run and self.resultado.sucesso
+            if not self.resultado.importado:
+                transaction.set_rollback(True)
+            else:
+                for tipo, criados in self.resultado.criados.items():
+                    if criados:
+                        dados_alterados.send(
+                            sender=MODELOS_POR_TIPO[tipo], usuario_ids=[self.usuario.pk]
+                        )
+
+        return self.resultado
+
+    def _gravar(self, tipo):
+        """Grava as linhas pendentes de um tipo"""
+        pendentes = self._pendentes[tipo]
+        if not pendentes:
+            return
+        self._pendentes[tipo] = []
+
+        if tipo == 'receitas':
+            # As receitas podem referenciar produtos e ingredientes ainda pendentes
+            self._gravar('ingredientes')
+            self._gravar('produtos')
+            self._gravar_receitas(pendentes)
+        else:
+            self._gravar_registros(tipo, pendentes)
+
+        if self.progresso:
+            self.progresso(self.resultado)
+
+    def _preparar(self, tipo, dados):
+        """Mantém apenas as colunas do tipo e converte números e booleanos"""
+        campos = SERIALIZERS_POR_TIPO[tipo].Meta.fields
+        decimais = CAMPOS_DECIMAIS.get(tipo, set())
+        preparado = {}
+        for campo in campos:
+            if campo not in dados:
+                continue
+            valor = dados[campo]
+            if campo in decimais:
+                valor = normalizar_decimal(valor)
+            elif campo in CAMPOS_BOOLEANOS:
+                valor = normalizar_booleano(valor)
+            preparado[campo] = valor
+        return preparado
+
+    def _gravar_registros(self, tipo, pendentes):
+        serializer_class = SERIALIZERS_POR_TIPO[tipo]
+        contexto = {'usuario': self.usuario}
+        numeros = [numero for numero, _ in pendentes]
+        dados = [self._preparar(tipo, linha) for _, linha in pendentes]
+
+        serializer = serializer_class(data=dados, many=True, context=contexto)
+        while not serializer.is_valid():
+            # Registra os erros e valida novamente apenas as linhas válidas
+            # (a unicidade só é verificada quando todos os campos são válidos),
+            # para que as referências a elas nas receitas não gerem erros em cascata
+            validos = []
+            for numero, linha, erros in zip(numeros, dados, serializer.errors):
+                if erros:
+                    self.resultado.adicionar_erro(tipo, numero, erros)
+                else:
+                    validos.append((numero, linha))
+            if not validos:
+                return
+            numeros = [numero for numero, _ in validos]
+            dados = [linha for _, linha in validos]
+            serializer = serializer_class(data=dados, many=True, context=contexto)
+
+        objetos = serializer.save(usuario=self.usuario)
+        self.resultado.criados[tipo] += len(objetos)
+
+        if tipo in self._mapas:
+            self._mapas[tipo].update((obj.nome.lower(), obj.pk) for obj in objetos)
+
+    def _mapa(self, tipo):
+        """Mapa nome (minúsculo) -> id dos produtos ou ingredientes do usuário"""
+        if tipo not in self._mapas:
+            model = Produto if tipo == 'produtos' else Ingrediente
+            self._mapas[tipo] = {
+                nome.lower(): pk
+                for pk, nome in model.objects.filter(usuario=self.usuario).values_list('pk', 'nome').iterator()
+            }
+        return self._mapas[tipo]
+
+    def _gravar_receitas(self, pendentes):
+        produtos = self._mapa('produtos')
+        ingredientes = self._mapa('ingredientes')
+
+        candidatos = []
+        for numero, dados in pendentes:
+            erros = {}
+            produto_id = produtos.get(str(dados.get('produto', '')).strip().lower())
+            if produto_id is None:
+                erros['produto'] = ['Produto não encontrado.']
+            ingrediente_id = ingredientes.get(str(dados.get('ingrediente', '')).strip().lower())
+            if ingrediente_id is None:
+                erros['ingrediente'] = ['Ingrediente não encontrado.']
+            try:
+                quantidade = self._campo_quantidade.run_validation(
+                    normalizar_decimal(dados['quantidade']) if 'quantidade' in dados else serializers.empty
+                )
+            except serializers.ValidationError as e:
+                erros['quantidade'] = e.detail
+
+            if erros:
+                self.resultado.adicionar_erro('receitas', numero, erros)
+            else:
+                candidatos.append((numero, produto_id, ingrediente_id, quantidade))
+
+        if not candidatos:
+            return
+
+        existentes = set(
+            ProdutoIngrediente.objects.filter(
+                produto_id__in={produto_id for _, produto_id, _, _ in candidatos}
+            ).values_list('produto_id', 'ingrediente_id')
+        )
+
+        objetos = []
+        for numero, produto_id, ingrediente_id, quantidade in candidatos:
+            par = (produto_id, ingrediente_id)
+            if par in existentes:
+                self.resultado.adicionar_erro('receitas', numero, {
+                    'ingrediente': ['Este ingrediente já faz parte da receita do produto.']
+                })
+                continue
+            existentes.add(par)
+            objetos.append(ProdutoIngrediente(
+                produto_id=produto_id, ingrediente_id=ingrediente_id, quantidade=quantidade
+            ))
+
+        ProdutoIngrediente.objects.bulk_create(objetos)
+        self.resultado.criados['receitas'] += len(objetos)
@@ -0,0 +1,154 @@
+"""
+Leitores de planilhas para a importação de catálogo.
+
+Os arquivos são lidos linha a linha, sem carregar o conteúdo inteiro em
+memória: CSV com o módulo csv da biblioteca padrão e XLSX com o openpyxl em
+modo somente leitura. Cada leitor produz tuplas (tipo, numero_linha, dados).
+"""
+import csv
+import io
+import itertools
+import unicodedata
+
+
+# Tipos aceitos, na ordem em que precisam ser gravados
+# (receitas referenciam produtos e ingredientes pelo nome)
+TIPOS = ('ingredientes', 'despesas_fixas', 'despesas_variaveis', 'produtos', 'receitas')
+
+SINONIMOS_TIPO = {
+    'ingrediente': 'ingredientes',
+    'despesa_fixa': 'despesas_fixas',
+    'despesa_variavel': 'despesas_variaveis',
+    'produto': 'produtos',
+    'receita': 'receitas',
+}
+
+DELIMITADORES_CSV = (';', ',', '\t')
+
+
+class ErroLeitura(Exception):
+    """Erro de formato do arquivo importado"""
+
+
+def normalizar_nome(valor):
+    """
+    Normaliza nomes de colunas, planilhas e tipos:
+    'Despesas Variáveis' -> 'despesas_variaveis'
+    """
+    texto = unicodedata.normalize('NFKD', str(valor or '').strip().lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return '_'.join(texto.replace('-', ' ').split())
+
+
+def normalizar_tipo(valor):
+    """Converte o nome de uma planilha ou o valor da coluna tipo em um dos TIPOS"""
+    tipo = normalizar_nome(valor)
+    tipo = SINONIMOS_TIPO.get(tipo, tipo)
+    return tipo if tipo in TIPOS else None
+
+
+def _montar_linha(cabecalho, valores):
+    """Monta o dicionário da linha, descartando células vazias"""
+    dados = {}
+    for coluna, valor in zip(cabecalho, valores):
+        if not coluna or valor is None:
+            continue
+        if isinstance(valor, str):
+            valor = valor.strip()
+            if not valor:
+                continue
+        dados[coluna] = valor
+    return dados
+
+
+def ler_csv(arquivo, tipo=None):
+    """
+    Lê um arquivo CSV (UTF-8, separado por ';', ',' ou tabulação).
+
+    Sem o parâmetro tipo, o arquivo deve ter a coluna 'tipo' indicando o
+    tipo de registro de cada linha; com ele, todas as linhas são do tipo
+    informado.
+    """
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    numero = 1
+    try:
+        primeira_linha = texto.readline()
+        if not primeira_linha.strip():
+            raise ErroLeitura('O arquivo está vazio.')
+
+        delimitador = max(DELIMITADORES_CSV, key=primeira_linha.count)
+        leitor = csv.reader(itertools.chain([primeira_linha], texto), delimiter=delimitador)
+        cabecalho = [normalizar_nome(coluna) for coluna in next(leitor)]
+
+        if tipo is None and 'tipo' not in cabecalho:
+            raise ErroLeitura(
+                'O arquivo CSV deve ter a coluna "tipo" ou o tipo de registro deve ser informado.'
+            )
+
+        for valores in leitor:
+            numero = leitor.line_num
+            if not any(valor.strip() for valor in valores):
+                continue
+            dados = _montar_linha(cabecalho, valores)
+            tipo_informado = dados.pop('tipo', None)
+            yield tipo or normalizar_tipo(tipo_informado) or tipo_informado, numero, dados
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ErroLeitura(f'Erro ao ler o arquivo CSV (linha {numero}): {e}')
+    finally:
+        texto.detach()
+
+
+def ler_xlsx(arquivo, tipo=None):
+    """
+    Lê uma pasta de trabalho XLSX com uma planilha por tipo de registro
+    (ingredientes, despesas_fixas, despesas_variaveis, produtos, receitas).
+
+    As planilhas são lidas na ordem de TIPOS, independentemente da ordem na
+    pasta de trabalho. Com o parâmetro tipo, apenas a primeira planilha é lida.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErroLeitura(
+            'A importação de arquivos XLSX requer o pacote openpyxl (pip install openpyxl).'
+        )
+
+    try:
+        livro = load_workbook(arquivo, read_only=True, data_only=True)
+    except Exception as e:
+        raise ErroLeitura(f'Não foi possível abrir o arquivo XLSX: {e}')
+
+    try:
+        if tipo is not None:
+            planilhas = [(tipo, livro.worksheets[0])]
+        else:
+            por_tipo = {}
+            for planilha in livro.worksheets:
+                tipo_planilha = normalizar_tipo(planilha.title)
+                if tipo_planilha and tipo_planilha not in por_tipo:
+                    por_tipo[tipo_planilha] = planilha
+            if not por_tipo:
+                raise ErroLeitura(
+                    'Nenhuma planilha reconhecida. Use os nomes: ' + ', '.join(TIPOS) + '.'
+                )
+            planilhas = [(t, por_tipo[t]) for t in TIPOS if t in por_tipo]
+
+        for tipo_planilha, planilha in planilhas:
+            linhas = planilha.iter_rows(values_only=True)
+            cabecalho = [normalizar_nome(coluna) for coluna in next(linhas, ())]
+            for numero, valores in enumerate(linhas, start=2):
+                dados = _montar_linha(cabecalho, valores)
+                if dados:
+                    yield tipo_planilha, numero, dados
+    finally:
+        livro.close()
+
+
+def ler_planilha(arquivo, nome_arquivo, tipo=None):
+    """Escolhe o leitor pela extensão do arquivo"""
+    extensao = str(nome_arquivo).rsplit('.', 1)[-1].lower()
+    if extensao == 'csv':
+        return ler_csv(arquivo, tipo)
+    if extensao == 'xlsx':
+        return ler_xlsx(arquivo, tipo)
+    raise ErroLeitura('Formato de arquivo não suportado. Envie um arquivo .csv ou .xlsx.')
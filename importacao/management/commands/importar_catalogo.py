@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from importacao.importador import ImportadorCatalogo
+from importacao.leitores import TIPOS, ErroLeitura, ler_planilha
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Importa o catálogo de um usuário a partir de uma planilha CSV ou XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho da planilha (.csv ou .xlsx)')
+        parser.add_argument('--usuario', required=True, help='Username ou id do usuário')
+        parser.add_argument('--tipo', choices=TIPOS, help='Tipo de registro de todas as linhas')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas valida, sem gravar')
+        parser.add_argument('--tamanho-lote', type=int, help='Registros gravados por lote')
+
+    def handle(self, *args, **options):
+        usuario = self._obter_usuario(options['usuario'])
+
+        def progresso(resultado):
+            self.stdout.write(
+                f"{resultado.linhas_lidas} linhas lidas, "
+                f"{sum(resultado.criados.values())} registros gravados, "
+                f"{resultado.total_erros} erros"
+            )
+
+        importador = ImportadorCatalogo(
+            usuario,
+            dry_run=options['dry_run'],
+            tamanho_lote=options['tamanho_lote'],
+            progresso=progresso if options['verbosity'] > 0 else None,
+        )
+
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = importador.importar(
+                    ler_planilha(arquivo, options['arquivo'], options['tipo'])
+                )
+        except (OSError, ErroLeitura) as e:
+            raise CommandError(str(e))
+
+        for erro in resultado.erros:
+            self.stderr.write(f"[{erro['tipo']}] linha {erro['linha']}: {erro['erros']}")
+
+        if not resultado.sucesso:
+            raise CommandError(
+                f'{resultado.total_erros} erro(s) encontrado(s). Nenhum registro foi gravado.'
+            )
+
+        resumo = ', '.join(f'{tipo}: {total}' for tipo, total in resultado.criados.items())
+        if resultado.dry_run:
+            self.stdout.write(self.style.SUCCESS(f'Simulação concluída sem erros ({resumo}).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Importação concluída ({resumo}).'))
+
+    def _obter_usuario(self, identificador):
+        filtro = {'pk': identificador} if identificador.isdigit() else {'username': identificador}
+        try:
+            return User.objects.get(**filtro)
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário "{identificador}" não encontrado.')
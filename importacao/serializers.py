@@ -0,0 +1,27 @@
+from rest_framework import serializers
+from .leitores import TIPOS
+
+
+class ImportacaoSerializer(serializers.Serializer):
+    """
+    Serializer para o envio de uma planilha de importação.
+    """
+    arquivo = serializers.FileField(
+        help_text="Planilha CSV ou XLSX com o catálogo"
+    )
+    tipo = serializers.ChoiceField(
+        choices=TIPOS,
+        required=False,
+        help_text="Tipo de registro de todas as linhas (para CSV sem a coluna tipo)"
+    )
+    dry_run = serializers.BooleanField(
+        default=False,
+        help_text="Apenas valida o arquivo, sem gravar nada"
+    )
+
+    def validate_arquivo(self, value):
+        """Valida a extensão do arquivo"""
+        extensao = value.name.rsplit('.', 1)[-1].lower()
+        if extensao not in ('csv', 'xlsx'):
+            raise serializers.ValidationError("Envie um arquivo .csv ou .xlsx.")
+        return value
@@ -0,0 +1,189 @@
+import io
+import unittest
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+from rest_framework import status
+from despesafixa.models import DespesaFixa
+from ingredientes.models import Ingrediente
+from produtos.models import Produto, ProdutoIngrediente
+from .importador import ImportadorCatalogo
+from .leitores import ler_csv, ler_xlsx
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+User = get_user_model()
+
+
+CATALOGO_CSV = """tipo;nome;preco_por_unidade;unidade_medida;valor;produto;ingrediente;quantidade;tempo_preparo;margem_lucro;periodo_analise;ativa
+ingrediente;Farinha;5,50;KG;;;;;;;;
+ingrediente;Açúcar;4,20;kg;;;;;;;;
+despesa_fixa;Aluguel;;;1.500,00;;;;;;;sim
+produto;Bolo;;;;;;;60;30;30;
+receita;;;;;Bolo;farinha;0,5;;;;
+receita;;;;;Bolo;Açúcar;0,3;;;;
+"""
+
+
+class ImportadorCatalogoTest(TestCase):
+    """
+    Testes para o pipeline de importação de catálogo.
+    """
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Teste Comercial'
+        )
+
+    def _importar(self, conteudo, **kwargs):
+        arquivo = io.BytesIO(conteudo.encode('utf-8'))
+        return ImportadorCatalogo(self.user, **kwargs).importar(ler_csv(arquivo))
+
+    def test_importa_catalogo_completo(self):
+        """Testa a importação de todos os tipos com referências entre eles."""
+        resultado = self._importar(CATALOGO_CSV)
+
+        self.assertTrue(resultado.sucesso, resultado.erros)
+        self.assertTrue(resultado.importado)
+        self.assertEqual(resultado.linhas_lidas, 6)
+        self.assertEqual(resultado.criados['ingredientes'], 2)
+        self.assertEqual(resultado.criados['receitas'], 2)
+
+        farinha = Ingrediente.objects.get(usuario=self.user, nome='Farinha')
+        self.assertEqual(farinha.preco_por_unidade, Decimal('5.50'))
+        self.assertEqual(farinha.unidade_medida, 'kg')
+        self.assertEqual(DespesaFixa.objects.get(usuario=self.user).valor, Decimal('1500.00'))
+
+        bolo = Produto.objects.get(usuario=self.user, nome='Bolo')
+        self.assertEqual(
+            ProdutoIngrediente.objects.get(produto=bolo, ingrediente=farinha).quantidade,
+            Decimal('0.500')
+        )
+
+    def test_dry_run_nao_grava(self):
+        """Testa que a simulação valida tudo sem gravar nada."""
+        resultado = self._importar(CATALOGO_CSV, dry_run=True)
+
+        self.assertTrue(resultado.sucesso)
+        self.assertFalse(resultado.importado)
+        self.assertEqual(resultado.criados['receitas'], 2)
+        self.assertFalse(Ingrediente.objects.exists())
+        self.assertFalse(Produto.objects.exists())
+
+    def test_erros_cancelam_importacao(self):
+        """Testa que erros são reportados por linha e nada é gravado."""
+        Ingrediente.objects.create(
+            usuario=self.user, nome='Farinha',
+            preco_por_unidade=Decimal('5.00'), unidade_medida='kg'
+        )
+        conteudo = (
+            "tipo,nome,preco_por_unidade,unidade_medida,produto,ingrediente,quantidade\n"
+            "ingrediente,FARINHA,5.50,kg,,,\n"
+            "ingrediente,Leite,-1,l,,,\n"
+            "ingrediente,Ovos,0.80,un,,,\n"
+            "receita,,,,Bolo,Ovos,2\n"
+        )
+        resultado = self._importar(conteudo)
+
+        self.assertFalse(resultado.sucesso)
+        self.assertFalse(resultado.importado)
+        self.assertEqual(resultado.total_erros, 3)
+        self.assertEqual(sorted(erro['linha'] for erro in resultado.erros), [2, 3, 5])
+        self.assertIn('produto', resultado.erros[-1]['erros'])
+        self.assertEqual(Ingrediente.objects.count(), 1)
+
+    def test_importacao_em_varios_lotes(self):
+        """Testa a gravação em lotes com referências a lotes anteriores."""
+        linhas = ["tipo,nome,preco_por_unidade,unidade_medida,produto,ingrediente,quantidade,tempo_preparo,margem_lucro,periodo_analise"]
+        linhas += [f"ingrediente,Ingrediente {i},1.00,kg,,,,,," for i in range(25)]
+        linhas += ["produto,Bolo,,,,,,30,20,30"]
+        linhas += [f"receita,,,,Bolo,Ingrediente {i},1,,," for i in range(25)]
+        progresso = []
+
+        resultado = self._importar('\n'.join(linhas), tamanho_lote=10, progresso=progresso.append)
+
+        self.assertTrue(resultado.sucesso, resultado.erros)
+        self.assertEqual(Ingrediente.objects.filter(usuario=self.user).count(), 25)
+        self.assertEqual(ProdutoIngrediente.objects.filter(produto__usuario=self.user).count(), 25)
+        self.assertGreater(len(progresso), 3)
+
+    @unittest.skipUnless(openpyxl, 'openpyxl não instalado')
+    def test_importa_xlsx(self):
+        """Testa a leitura de uma pasta de trabalho com uma planilha por tipo."""
+        livro = openpyxl.Workbook()
+        receitas = livro.active
+        receitas.title = 'Receitas'
+        receitas.append(['Produto', 'Ingrediente', 'Quantidade'])
+        receitas.append(['Pão', 'Farinha', 1.5])
+        produtos = livro.create_sheet('Produtos')
+        produtos.append(['Nome', 'Tempo Preparo', 'Margem Lucro', 'Período Análise'])
+        produtos.append(['Pão', 120, 25, 30])
+        ingredientes = livro.create_sheet('Ingredientes')
+        ingredientes.append(['Nome', 'Preço por Unidade', 'Unidade Medida'])
+        ingredientes.append(['Farinha', 5.5, 'kg'])
+        arquivo = io.BytesIO()
+        livro.save(arquivo)
+        arquivo.seek(0)
+
+        resultado = ImportadorCatalogo(self.user).importar(ler_xlsx(arquivo))
+
+        self.assertTrue(resultado.sucesso, resultado.erros)
+        self.assertEqual(
+            ProdutoIngrediente.objects.get(produto__nome='Pão').quantidade, Decimal('1.500')
+        )
+
+
+class ImportacaoAPITest(APITestCase):
+    """
+    Testes para o endpoint de importação.
+    """
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Teste Comercial'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_importacao_via_api(self):
+        """Testa o envio de uma planilha CSV."""
+        arquivo = SimpleUploadedFile('catalogo.csv', CATALOGO_CSV.encode('utf-8'), content_type='text/csv')
+
+        response = self.client.post('/api/importacao/', {'arquivo': arquivo}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total_criados'], 6)
+        self.assertEqual(Produto.objects.filter(usuario=self.user).count(), 1)
+
+    def test_importacao_via_api_dry_run(self):
+        """Testa a simulação via API."""
+        arquivo = SimpleUploadedFile('catalogo.csv', CATALOGO_CSV.encode('utf-8'), content_type='text/csv')
+
+        response = self.client.post(
+            '/api/importacao/', {'arquivo': arquivo, 'dry_run': True}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['importado'])
+        self.assertFalse(Ingrediente.objects.exists())
+
+    def test_formato_nao_suportado(self):
+        """Testa o envio de um arquivo com extensão inválida."""
+        arquivo = SimpleUploadedFile('catalogo.txt', b'nome\nFarinha\n')
+
+        response = self.client.post('/api/importacao/', {'arquivo': arquivo}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('arquivo', response.data)
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+# URLs do app importacao
+urlpatterns = [
+    path('api/importacao/', views.ImportacaoCatalogoView.as_view(), name='importacao-catalogo'),
+]
+
+# POST   /api/importacao/    -> importação do catálogo a partir de planilha CSV/XLSX
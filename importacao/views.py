@@ -0,0 +1,44 @@
+from rest_framework import status, permissions
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .importador import ImportadorCatalogo
+from .leitores import ErroLeitura, ler_planilha
+from .serializers import ImportacaoSerializer
+
+
+class ImportacaoCatalogoView(APIView):
+    """
+    Importa o catálogo do usuário autenticado a partir de uma planilha.
+
+    POST /api/importacao/ (multipart/form-data)
+    - arquivo: planilha .csv ou .xlsx
+    - tipo: tipo de registro de todas as linhas (opcional)
+    - dry_run: apenas valida o arquivo, sem gravar (opcional)
+
+    Retorna 201 quando o catálogo foi importado, 200 na simulação sem erros
+    e 400 quando há erros (nesse caso nada é gravado).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        serializer = ImportacaoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        arquivo = serializer.validated_data['arquivo']
+        dry_run = serializer.validated_data['dry_run']
+
+        try:
+            linhas = ler_planilha(arquivo, arquivo.name, serializer.validated_data.get('tipo'))
+            resultado = ImportadorCatalogo(request.user, dry_run=dry_run).importar(linhas)
+        except ErroLeitura as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not resultado.sucesso:
+            status_code = status.HTTP_400_BAD_REQUEST
+        elif resultado.importado:
+            status_code = status.HTTP_201_CREATED
+        else:
+            status_code = status.HTTP_200_OK
+
+        return Response(resultado.como_dict(), status=status_code)
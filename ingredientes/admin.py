@@ -1,9 +1,30 @@
-from django.contrib import admin
+from decimal import Decimal
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.exceptions import ValidationError
+from django.template.response import TemplateResponse
+
+from core.admin import AcoesEmLoteMixin, FiltroAutocomplete, ListagemGrandeMixin
+from . import reajuste
 from .models import Ingrediente
 
 
+class ReajustePrecoForm(forms.Form):
+    """Percentual da ação de reajuste de preços"""
+    percentual = forms.DecimalField(
+        label='Reajuste (%)',
+        max_digits=7,
+        decimal_places=2,
+        min_value=Decimal('-99.99'),
+        max_value=Decimal('1000'),
+        help_text='Ex.: 10 para aumentar 10%, -5 para reduzir 5%.'
+    )
+
+
 @admin.register(Ingrediente)
-class IngredienteAdmin(admin.ModelAdmin):
+class IngredienteAdmin(AcoesEmLoteMixin, ListagemGrandeMixin, admin.ModelAdmin):
     """
     Configuração do admin para o modelo Ingrediente.
     """
@@ -12,13 +33,14 @@ class IngredienteAdmin(admin.ModelAdmin):
         'fornecedor', 'created_at'
     ]
     list_filter = [
-        'unidade_medida', 'fornecedor', 'created_at', 'usuario'
+        'unidade_medida', 'fornecedor', 'created_at', ('usuario', FiltroAutocomplete)
     ]
     search_fields = [
         'nome', 'fornecedor', 'usuario__username', 'usuario__nome_comercial'
     ]
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
+    autocomplete_fields = ['usuario']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -34,12 +56,52 @@ class IngredienteAdmin(admin.ModelAdmin):
         }),
     )
     
+    actions = ['reajustar_precos']
+
     def get_queryset(self, request):
         """
         Customiza o queryset para otimizar consultas.
         """
         return super().get_queryset(request).select_related('usuario')
     
+    def reajustar_precos(self, request, queryset):
+        """
+        Aplica um reajuste percentual ao preço dos ingredientes selecionados.
+        A primeira chamada exibe o formulário do percentual; o envio dele
+        (com a mesma seleção) aplica o reajuste.
+        """
+        form = ReajustePrecoForm(request.POST if 'aplicar' in request.POST else None)
+        if form.is_valid():
+            try:
+                alterados = self.executar_em_lote(
+                    request, queryset, reajuste.reajustar_precos, form.cleaned_data['percentual'],
+                    descricao='Reajuste de preços de ingredientes', validar=reajuste.validar_reajuste
+                )
+            except ValidationError as erro:
+                self.message_user(request, ' '.join(erro.messages), messages.ERROR)
+                return None
+            if alterados is not None:
+                self.message_user(
+                    request, f'{alterados} ingrediente(s) tiveram o preço reajustado com sucesso.'
+                )
+            return None
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Reajustar preços',
+            'opts': self.model._meta,
+            'form': form,
+            'quantidade': queryset.count(),
+            'selecionados': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(
+            request, 'admin/ingredientes/ingrediente/reajustar_precos.html', context
+        )
+    reajustar_precos.short_description = 'Reajustar preço dos ingredientes selecionados'
+    reajustar_precos.allowed_permissions = ('change',)
+    
     def has_change_permission(self, request, obj=None):
         """
         Permite que usuários editem apenas seus próprios ingredientes.
@@ -5,3 +5,9 @@ class IngredientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ingredientes'
     verbose_name = 'Ingredientes'
+
+    def ready(self):
+        """
+        Registra os signals que invalidam as respostas em cache.
+        """
+        from . import signals  # noqa: F401
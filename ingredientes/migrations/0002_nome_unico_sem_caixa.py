@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:12
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migracoes import renomear_nomes_repetidos
+
+
+def renomear_repetidos(apps, schema_editor):
+    renomear_nomes_repetidos(apps.get_model('ingredientes', 'Ingrediente'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredientes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='ingrediente',
+            unique_together=set(),
+        ),
+        migrations.RunPython(renomear_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingrediente',
+            constraint=models.UniqueConstraint(models.F('usuario'), django.db.models.functions.text.Lower('nome'), name='ingrediente_nome_unico_por_usuario', violation_error_message='Você já possui um ingrediente com este nome.'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from decimal import Decimal
@@ -54,13 +55,23 @@ class Ingrediente(models.Model):
         verbose_name = "Ingrediente"
         verbose_name_plural = "Ingredientes"
         ordering = ['-created_at']
-        unique_together = ['usuario', 'nome']  # Evita ingredientes duplicados para o mesmo usuário
+        constraints = [
+            # Evita ingredientes duplicados para o mesmo usuário, sem diferenciar maiúsculas de minúsculas
+            models.UniqueConstraint(
+                'usuario', Lower('nome'),
+                name='ingrediente_nome_unico_por_usuario',
+                violation_error_message='Você já possui um ingrediente com este nome.'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nome} - R$ {self.preco_por_unidade}/{self.unidade_medida}"
 
     def clean(self):
-        """Validações customizadas"""
+        """
+        Validações customizadas, usadas pelo admin (full_clean).
+        A API valida nos serializers; a unicidade é garantida pelo banco.
+        """
         super().clean()
         
         if self.preco_por_unidade is not None and self.preco_por_unidade < 0:
@@ -69,13 +80,19 @@ class Ingrediente(models.Model):
         if self.preco_por_unidade is not None and self.preco_por_unidade > Decimal('999999.99'):
             raise ValidationError({'preco_por_unidade': 'O preço não pode ser superior a R$ 999.999,99.'})
         
-        # Padroniza a unidade de medida para minúsculas
+        self.normalizar_unidade_medida()
+
+    def normalizar_unidade_medida(self):
+        """Padroniza a unidade de medida para minúsculas"""
         if self.unidade_medida:
             self.unidade_medida = self.unidade_medida.lower().strip()
 
     def save(self, *args, **kwargs):
-        """Override do método save para executar validações"""
-        self.clean()
+        """
+        Padroniza a unidade de medida antes de gravar. As validações não são
+        repetidas aqui: a API já as executou no serializer.
+        """
+        self.normalizar_unidade_medida()
         super().save(*args, **kwargs)
 
     @property
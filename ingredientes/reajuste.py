@@ -0,0 +1,53 @@
+"""
+Reajuste percentual dos preços de ingredientes em lote.
+"""
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Max
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from core.signals import dados_alterados
+from .models import Ingrediente
+
+
+PRECO_MAXIMO = Decimal('999999.99')
+
+
+def validar_reajuste(ingredientes, percentual):
+    """
+    Levanta ValidationError se o reajuste zerar os preços ou levar algum
+    deles acima de R$ 999.999,99; senão, retorna o fator do reajuste.
+    """
+    fator = 1 + Decimal(percentual) / 100
+    if fator <= 0:
+        raise ValidationError('O reajuste deve ser maior que -100%.')
+
+    maior_preco = ingredientes.order_by().aggregate(maior=Max('preco_por_unidade'))['maior']
+    if maior_preco is not None and maior_preco * fator > PRECO_MAXIMO:
+        raise ValidationError('O reajuste levaria preços acima de R$ 999.999,99.')
+    return fator
+
+
+def reajustar_precos(ingredientes, percentual):
+    """
+    Aplica o reajuste (ex.: 10 para +10%, -5 para -5%) ao preço dos
+    ingredientes do queryset em um único UPDATE, arredondando para centavos.
+    Retorna a quantidade de ingredientes alterados.
+
+    Levanta ValidationError, sem alterar nada, nos casos de validar_reajuste().
+    """
+    ingredientes = ingredientes.order_by()
+    with transaction.atomic():
+        fator = validar_reajuste(ingredientes, percentual)
+        usuario_ids = list(ingredientes.values_list('usuario_id', flat=True).distinct())
+        alterados = ingredientes.update(
+            preco_por_unidade=Round(F('preco_por_unidade') * fator, 2),
+            updated_at=timezone.now(),
+        )
+        if alterados:
+            # update() não dispara post_save
+            dados_alterados.send(sender=Ingrediente, usuario_ids=usuario_ids)
+    return alterados
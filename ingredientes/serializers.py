@@ -1,10 +1,15 @@
 from rest_framework import serializers
 from django.core.exceptions import ValidationError
 from decimal import Decimal
+from core.bulk import BulkCreateListSerializer, BulkUpdateListSerializer
+from core.integridade import UnicidadeNoBancoMixin
 from .models import Ingrediente
 
 
-class IngredienteSerializer(serializers.ModelSerializer):
+MENSAGEM_NOME_DUPLICADO = 'Você já possui um ingrediente com este nome.'
+
+
+class IngredienteSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Ingrediente.
     Usado para listagem e detalhes de ingredientes.
@@ -13,6 +18,8 @@ class IngredienteSerializer(serializers.ModelSerializer):
     custo_formatado = serializers.ReadOnlyField()
     info_completa = serializers.ReadOnlyField()
 
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = Ingrediente
         fields = [
@@ -49,39 +56,15 @@ class IngredienteSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("O nome deve ter pelo menos 2 caracteres.")
         return value
 
-    def validate(self, attrs):
-        """Validação geral do serializer"""
-        # Verificar se já existe um ingrediente com o mesmo nome para o usuário
-        if self.instance is None:  # Criação
-            usuario = attrs.get('usuario') or (self.context.get('request') and self.context['request'].user)
-            nome = attrs.get('nome', '').strip()
-            
-            if usuario and nome:
-                if Ingrediente.objects.filter(usuario=usuario, nome__iexact=nome).exists():
-                    raise serializers.ValidationError({
-                        'nome': 'Você já possui um ingrediente com este nome.'
-                    })
-        else:  # Atualização
-            nome = attrs.get('nome', self.instance.nome).strip()
-            
-            if nome and nome.lower() != self.instance.nome.lower():
-                if Ingrediente.objects.filter(
-                    usuario=self.instance.usuario, 
-                    nome__iexact=nome
-                ).exclude(id=self.instance.id).exists():
-                    raise serializers.ValidationError({
-                        'nome': 'Você já possui um ingrediente com este nome.'
-                    })
-        
-        return attrs
-
-
-class IngredienteCreateSerializer(serializers.ModelSerializer):
+
+class IngredienteCreateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer para criação de ingredientes.
     Remove campos desnecessários e adiciona validações específicas.
     """
     
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = Ingrediente
         fields = [
@@ -128,12 +111,14 @@ class IngredienteCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class IngredienteUpdateSerializer(serializers.ModelSerializer):
+class IngredienteUpdateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer para atualização de ingredientes.
     Permite atualização parcial dos campos.
     """
     
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = Ingrediente
         fields = [
@@ -181,3 +166,27 @@ class IngredienteListSerializer(serializers.ModelSerializer):
             'id', 'nome', 'preco_por_unidade', 'unidade_medida',
             'fornecedor', 'custo_formatado', 'created_at'
         ]
+
+
+class IngredienteBulkCreateSerializer(IngredienteCreateSerializer):
+    """
+    Serializer para criação de ingredientes em lote.
+    A unicidade dos nomes é verificada para o lote inteiro pelo ListSerializer.
+    """
+    mensagem_nome_duplicado = MENSAGEM_NOME_DUPLICADO
+
+    class Meta(IngredienteCreateSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
+
+class IngredienteBulkUpdateSerializer(IngredienteUpdateSerializer):
+    """
+    Serializer para atualização parcial de ingredientes em lote.
+    Cada item identifica o ingrediente pelo campo id.
+    """
+    id = serializers.IntegerField()
+    mensagem_nome_duplicado = MENSAGEM_NOME_DUPLICADO
+
+    class Meta(IngredienteUpdateSerializer.Meta):
+        fields = ['id'] + IngredienteUpdateSerializer.Meta.fields
+        list_serializer_class = BulkUpdateListSerializer
@@ -0,0 +1,20 @@
+"""
+Invalidação das respostas em cache dos ingredientes (ver core/respostas.py).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar
+from core.respostas import INGREDIENTES
+from core.signals import dados_alterados
+from .models import Ingrediente
+
+
+@receiver([post_save, post_delete], sender=Ingrediente)
+def invalidar_ao_salvar(sender, instance, **kwargs):
+    invalidar(INGREDIENTES, instance.usuario_id)
+
+
+@receiver(dados_alterados, sender=Ingrediente)
+def invalidar_em_lote(sender, usuario_ids, **kwargs):
+    invalidar(INGREDIENTES, *usuario_ids)
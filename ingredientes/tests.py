@@ -1,5 +1,8 @@
-from django.test import TestCase
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
 from django.core.exceptions import ValidationError
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -131,6 +134,37 @@ class IngredienteAPITest(APITestCase):
         self.assertEqual(ingrediente.usuario, self.user)
         self.assertEqual(ingrediente.nome, 'Farinha de Trigo')
     
+    def test_create_ingrediente_nome_duplicado_api(self):
+        """Testa que um nome repetido retorna 400 com a mensagem de unicidade."""
+        data = {'nome': 'Farinha', 'preco_por_unidade': '5.50', 'unidade_medida': 'kg'}
+        self.client.post('/api/ingredientes/', data, format='json')
+        response = self.client.post('/api/ingredientes/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['nome'], ['Você já possui um ingrediente com este nome.'])
+        self.assertEqual(Ingrediente.objects.count(), 1)
+
+    def test_nome_unico_sem_diferenciar_caixa_api(self):
+        """Testa que nomes que diferem só na caixa são recusados pela restrição do banco."""
+        self.client.post('/api/ingredientes/', {
+            'nome': 'Farinha', 'preco_por_unidade': '5.50', 'unidade_medida': 'kg'
+        }, format='json')
+        outro = self.client.post('/api/ingredientes/', {
+            'nome': 'Açúcar', 'preco_por_unidade': '4.20', 'unidade_medida': 'kg'
+        }, format='json').data
+
+        response = self.client.post('/api/ingredientes/', {
+            'nome': 'FARINHA', 'preco_por_unidade': '6.00', 'unidade_medida': 'kg'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['nome'], ['Você já possui um ingrediente com este nome.'])
+
+        response = self.client.patch(
+            f'/api/ingredientes/{outro["id"]}/', {'nome': 'farinha'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ingrediente.objects.filter(nome__iexact='farinha').count(), 1)
+
     def test_list_ingredientes_api(self):
         """Testa a listagem de ingredientes via API."""
         Ingrediente.objects.create(
@@ -214,6 +248,107 @@ class IngredienteAPITest(APITestCase):
         self.assertEqual(response.data['precos']['medio'], 4.0)
 
 
+    def test_bulk_create_ingredientes_api(self):
+        """Testa a criação de ingredientes em lote preservando a ordem de entrada."""
+        data = [
+            {'nome': 'Farinha', 'preco_por_unidade': '5.50', 'unidade_medida': 'KG'},
+            {'nome': 'Açúcar', 'preco_por_unidade': '4.20', 'unidade_medida': 'kg'},
+            {'nome': 'Ovos', 'preco_por_unidade': '0.80', 'unidade_medida': 'un'},
+        ]
+
+        response = self.client.post('/api/ingredientes/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['nome'] for item in response.data], ['Farinha', 'Açúcar', 'Ovos'])
+        self.assertTrue(all(item['id'] for item in response.data))
+        self.assertEqual(response.data[0]['unidade_medida'], 'kg')
+        self.assertEqual(Ingrediente.objects.filter(usuario=self.user).count(), 3)
+
+    def test_bulk_create_ingredientes_nome_duplicado(self):
+        """Testa que um nome já existente invalida o lote inteiro."""
+        Ingrediente.objects.create(
+            usuario=self.user,
+            nome='Farinha',
+            preco_por_unidade=Decimal('5.50'),
+            unidade_medida='kg'
+        )
+        data = [
+            {'nome': 'Manteiga', 'preco_por_unidade': '30.00', 'unidade_medida': 'kg'},
+            {'nome': 'FARINHA', 'preco_por_unidade': '6.00', 'unidade_medida': 'kg'},
+            {'nome': 'manteiga', 'preco_por_unidade': '31.00', 'unidade_medida': 'kg'},
+        ]
+
+        response = self.client.post('/api/ingredientes/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('nome', response.data[1])
+        self.assertIn('nome', response.data[2])
+        self.assertEqual(Ingrediente.objects.count(), 1)
+
+    def test_bulk_update_e_delete_ingredientes_api(self):
+        """Testa a atualização e a remoção de ingredientes em lote."""
+        farinha = Ingrediente.objects.create(
+            usuario=self.user, nome='Farinha',
+            preco_por_unidade=Decimal('5.50'), unidade_medida='kg'
+        )
+        acucar = Ingrediente.objects.create(
+            usuario=self.user, nome='Açúcar',
+            preco_por_unidade=Decimal('4.20'), unidade_medida='kg'
+        )
+
+        response = self.client.patch('/api/ingredientes/bulk/', [
+            {'id': farinha.id, 'preco_por_unidade': '6.00'},
+            {'id': acucar.id, 'fornecedor': 'Atacadão'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        farinha.refresh_from_db()
+        acucar.refresh_from_db()
+        self.assertEqual(farinha.preco_por_unidade, Decimal('6.00'))
+        self.assertEqual(acucar.fornecedor, 'Atacadão')
+
+        response = self.client.delete(
+            '/api/ingredientes/bulk/', {'ids': [farinha.id, acucar.id, 999]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['removidos'], 2)
+        self.assertEqual(response.data['nao_encontrados'], [999])
+        self.assertEqual(Ingrediente.objects.count(), 0)
+
+    def test_bulk_update_ingrediente_de_outro_usuario(self):
+        """Testa que ingredientes de outro usuário não podem ser alterados em lote."""
+        outro = User.objects.create_user(
+            username='outro', email='outro@example.com',
+            password='testpass123', nome_comercial='Outro'
+        )
+        ingrediente = Ingrediente.objects.create(
+            usuario=outro, nome='Farinha',
+            preco_por_unidade=Decimal('5.50'), unidade_medida='kg'
+        )
+
+        response = self.client.patch('/api/ingredientes/bulk/', [
+            {'id': ingrediente.id, 'preco_por_unidade': '1.00'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', response.data[0])
+        ingrediente.refresh_from_db()
+        self.assertEqual(ingrediente.preco_por_unidade, Decimal('5.50'))
+
+    def test_duplicar_com_copia_em_outra_caixa(self):
+        """Testa se a duplicação evita nomes que só diferem em maiúsculas."""
+        ingrediente = Ingrediente.objects.create(
+            usuario=self.user, nome='farinha',
+            preco_por_unidade=Decimal('5.50'), unidade_medida='kg'
+        )
+        Ingrediente.objects.create(
+            usuario=self.user, nome='FARINHA (cópia)',
+            preco_por_unidade=Decimal('5.50'), unidade_medida='kg'
+        )
+
+        response = self.client.get(f'/api/ingredientes/{ingrediente.id}/duplicar/')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['novo_ingrediente']['nome'], 'farinha (Cópia 2)')
+
+
 class IngredienteSerializerTest(TestCase):
     """
     Testes para os serializers de ingredientes.
@@ -254,3 +389,119 @@ class IngredienteSerializerTest(TestCase):
         
         serializer = IngredienteCreateSerializer(data=data)
         self.assertTrue(serializer.is_valid())
+
+
+class IngredienteMigracaoNomeUnicoTest(TransactionTestCase):
+    """
+    Testes para a migração que cria a restrição única sem diferenciar caixa.
+    """
+    anterior = [('ingredientes', '0001_initial')]
+    posterior = [('ingredientes', '0002_nome_unico_sem_caixa')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_nomes_repetidos_recebem_sufixo(self):
+        """Testa que nomes repetidos por usuário são renomeados antes da restrição."""
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.anterior)
+        apps = executor.loader.project_state(self.anterior).apps
+        Usuario = apps.get_model('usuarios', 'Usuario')
+        IngredienteAntigo = apps.get_model('ingredientes', 'Ingrediente')
+
+        usuario = Usuario.objects.create(username='testuser', email='test@example.com')
+        outro = Usuario.objects.create(username='outro', email='outro@example.com')
+        for dono, nome in [
+            (usuario, 'Farinha'), (usuario, 'farinha'), (usuario, 'FARINHA'),
+            (usuario, 'farinha (2)'), (outro, 'farinha'),
+        ]:
+            IngredienteAntigo.objects.create(
+                usuario=dono, nome=nome, preco_por_unidade=Decimal('1.00'), unidade_medida='kg'
+            )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.posterior)
+
+        nomes = sorted(
+            Ingrediente.objects.filter(usuario_id=usuario.pk).values_list('nome', flat=True)
+        )
+        self.assertEqual(nomes, ['FARINHA (4)', 'Farinha', 'farinha (2)', 'farinha (3)'])
+        self.assertEqual(Ingrediente.objects.get(usuario_id=outro.pk).nome, 'farinha')
+
+
+class IngredienteAdminTest(TestCase):
+    """Testes do reajuste de preços pelo admin"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='adminpass123',
+            nome_comercial='Administração'
+        )
+        self.client.force_login(admin)
+        self.farinha = Ingrediente.objects.create(
+            usuario=self.user, nome='Farinha', preco_por_unidade=Decimal('5.50'), unidade_medida='kg'
+        )
+        self.acucar = Ingrediente.objects.create(
+            usuario=self.user, nome='Açúcar', preco_por_unidade=Decimal('3.99'), unidade_medida='kg'
+        )
+        self.url = '/admin/ingredientes/ingrediente/'
+        self.selecao = {
+            'action': 'reajustar_precos', '_selected_action': [self.farinha.pk, self.acucar.pk],
+        }
+
+    def test_reajuste_pede_percentual_e_aplica(self):
+        """Teste se a ação exibe o formulário e depois reajusta os preços selecionados"""
+        response = self.client.post(self.url, self.selecao)
+        self.assertContains(response, 'name="percentual"')
+
+        response = self.client.post(
+            self.url, {**self.selecao, 'aplicar': '1', 'percentual': '10'}, follow=True
+        )
+        self.assertContains(response, '2 ingrediente(s) tiveram o preço reajustado com sucesso.')
+        self.farinha.refresh_from_db()
+        self.acucar.refresh_from_db()
+        self.assertEqual(self.farinha.preco_por_unidade, Decimal('6.05'))
+        self.assertEqual(self.acucar.preco_por_unidade, Decimal('4.39'))
+
+    def test_reajuste_acima_do_limite_nao_altera(self):
+        """Teste se um reajuste que estoura o preço máximo é recusado sem alterações"""
+        Ingrediente.objects.filter(pk=self.farinha.pk).update(preco_por_unidade=Decimal('999000.00'))
+        response = self.client.post(
+            self.url, {**self.selecao, 'aplicar': '1', 'percentual': '1'}, follow=True
+        )
+        self.assertContains(response, 'O reajuste levaria preços acima de R$ 999.999,99.')
+        self.acucar.refresh_from_db()
+        self.assertEqual(self.acucar.preco_por_unidade, Decimal('3.99'))
+
+    @override_settings(ADMIN_ACAO_LIMITE_SINCRONO=1, TAREFAS_MODO='thread')
+    def test_reajuste_em_segundo_plano_valida_na_requisicao(self):
+        """Teste se a recusa do reajuste aparece mesmo quando a seleção iria para uma tarefa"""
+        Ingrediente.objects.filter(pk=self.farinha.pk).update(preco_por_unidade=Decimal('999000.00'))
+        response = self.client.post(
+            self.url, {**self.selecao, 'aplicar': '1', 'percentual': '1'}, follow=True
+        )
+        self.assertContains(response, 'O reajuste levaria preços acima de R$ 999.999,99.')
+        self.assertNotContains(response, 'em processamento em segundo plano')
+
+    def test_staff_nao_reajusta_ingredientes_de_outros(self):
+        """Teste se um staff que não é superusuário não reajusta preços de outros usuários"""
+        staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='testpass123',
+            nome_comercial='Loja Staff', is_staff=True
+        )
+        staff.user_permissions.add(*Permission.objects.filter(
+            codename__in=['view_ingrediente', 'change_ingrediente']
+        ))
+        self.client.force_login(staff)
+
+        response = self.client.post(
+            self.url, {**self.selecao, 'aplicar': '1', 'percentual': '10'}, follow=True
+        )
+        self.assertContains(response, '2 registro(s) selecionado(s) pertencem a outros usuários.')
+        self.farinha.refresh_from_db()
+        self.assertEqual(self.farinha.preco_por_unidade, Decimal('5.50'))
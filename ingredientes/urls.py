@@ -25,3 +25,6 @@ urlpatterns = [
 # - GET    /api/ingredientes/by-fornecedor/      -> by_fornecedor (ingredientes por fornecedor)
 # - GET    /api/ingredientes/stats/              -> estatisticas (estatísticas dos ingredientes)
 # - GET    /api/ingredientes/{id}/duplicar/      -> duplicar_ingrediente (duplicar ingrediente)
+# - POST   /api/ingredientes/bulk/               -> bulk (criação em lote)
+# - PATCH  /api/ingredientes/bulk/               -> bulk (atualização em lote)
+# - DELETE /api/ingredientes/bulk/               -> bulk (remoção em lote)
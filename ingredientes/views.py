@@ -3,17 +3,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
+from core.bulk import BulkModelViewSetMixin
+from core.respostas import INGREDIENTES, resposta_versionada
 from .models import Ingrediente
 from .filters import IngredienteFilter
 from .serializers import (
     IngredienteSerializer,
     IngredienteCreateSerializer,
     IngredienteUpdateSerializer,
-    IngredienteListSerializer
+    IngredienteListSerializer,
+    IngredienteBulkCreateSerializer,
+    IngredienteBulkUpdateSerializer
 )
 
 
-class IngredienteViewSet(viewsets.ModelViewSet):
+class IngredienteViewSet(BulkModelViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento completo de ingredientes.
     
@@ -29,6 +33,7 @@ class IngredienteViewSet(viewsets.ModelViewSet):
     - GET /ingredientes/search/ - Busca ingredientes por nome
     - GET /ingredientes/by_fornecedor/ - Lista ingredientes por fornecedor
     - GET /ingredientes/stats/ - Estatísticas dos ingredientes
+    - POST/PATCH/DELETE /ingredientes/bulk/ - Operações em lote
     """
     
     permission_classes = [permissions.IsAuthenticated]
@@ -37,11 +42,16 @@ class IngredienteViewSet(viewsets.ModelViewSet):
     search_fields = ['nome', 'fornecedor']
     ordering_fields = ['nome', 'preco_por_unidade', 'created_at']
     ordering = ['-created_at']
+    bulk_create_serializer_class = IngredienteBulkCreateSerializer
+    bulk_update_serializer_class = IngredienteBulkUpdateSerializer
+    bulk_response_serializer_class = IngredienteSerializer
 
     def get_queryset(self):
         """
         Retorna apenas os ingredientes do usuário autenticado.
         """
+        if getattr(self, 'swagger_fake_view', False):
+            return Ingrediente.objects.none()
         return Ingrediente.objects.filter(usuario=self.request.user)
 
     def get_serializer_class(self):
@@ -140,10 +150,14 @@ class IngredienteViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'], url_path='stats')
+    @resposta_versionada(INGREDIENTES)
     def estatisticas(self, request):
         """
         Retorna estatísticas dos ingredientes do usuário.
         URL: /api/ingredientes/stats/
+
+        A resposta traz uma ETag e fica em cache até a próxima alteração
+        nos ingredientes (ver core/respostas.py).
         """
         queryset = self.get_queryset()
         
@@ -203,7 +217,7 @@ class IngredienteViewSet(viewsets.ModelViewSet):
         contador = 1
         
         # Verifica se já existe um ingrediente com este nome
-        while Ingrediente.objects.filter(usuario=request.user, nome=novo_nome).exists():
+        while Ingrediente.objects.filter(usuario=request.user, nome__iexact=novo_nome).exists():
             contador += 1
             novo_nome = f"{ingrediente_original.nome} (Cópia {contador})"
         
@@ -1,17 +1,21 @@
 from django.contrib import admin
+
+from core.admin import AcoesEmLoteMixin, FiltroAutocomplete, ListagemGrandeMixin
+from . import custos
 from .models import Produto, ProdutoIngrediente, ProdutoDespesaFixa, ProdutoDespesaVariavel
 
 
 @admin.register(Produto)
-class ProdutoAdmin(admin.ModelAdmin):
+class ProdutoAdmin(AcoesEmLoteMixin, ListagemGrandeMixin, admin.ModelAdmin):
     list_display = [
         'nome', 'usuario', 'tempo_preparo', 'margem_lucro', 
         'periodo_analise', 'created_at'
     ]
-    list_filter = ['created_at', 'tempo_preparo', 'margem_lucro']
+    list_filter = ['created_at', 'tempo_preparo', 'margem_lucro', ('usuario', FiltroAutocomplete)]
     search_fields = ['nome', 'descricao', 'usuario__nome_comercial']
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
+    autocomplete_fields = ['usuario']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -26,29 +30,63 @@ class ProdutoAdmin(admin.ModelAdmin):
         }),
     )
 
+    actions = ['registrar_analises']
+
+    def get_queryset(self, request):
+        """Inclui o usuário, usado no __str__ (listagem e autocomplete)"""
+        return super().get_queryset(request).select_related('usuario')
+
+    def registrar_analises(self, request, queryset):
+        """Registra uma análise financeira com os custos atuais de cada produto"""
+        registradas = self.executar_em_lote(
+            request, queryset, custos.registrar_analises, descricao='Registro de análises financeiras'
+        )
+        if registradas is not None:
+            self.message_user(
+                request,
+                f'{registradas} análise(s) financeira(s) registrada(s) com sucesso.'
+            )
+    registrar_analises.short_description = 'Registrar análise financeira dos produtos selecionados'
+    registrar_analises.allowed_permissions = ('registrar_analises',)
+
+    def has_registrar_analises_permission(self, request):
+        return request.user.has_perm('analisefinanceira.add_analisefinanceira')
+
 
 @admin.register(ProdutoIngrediente)
-class ProdutoIngredienteAdmin(admin.ModelAdmin):
+class ProdutoIngredienteAdmin(ListagemGrandeMixin, admin.ModelAdmin):
     list_display = ['produto', 'ingrediente', 'quantidade', 'created_at']
-    list_filter = ['created_at', 'produto', 'ingrediente']
+    list_filter = [
+        'created_at', ('produto', FiltroAutocomplete), ('ingrediente', FiltroAutocomplete)
+    ]
+    list_select_related = ['produto__usuario', 'ingrediente']
+    autocomplete_fields = ['produto', 'ingrediente']
     search_fields = ['produto__nome', 'ingrediente__nome']
     ordering = ['-created_at']
     readonly_fields = ['created_at']
 
 
 @admin.register(ProdutoDespesaFixa)
-class ProdutoDespesaFixaAdmin(admin.ModelAdmin):
+class ProdutoDespesaFixaAdmin(ListagemGrandeMixin, admin.ModelAdmin):
     list_display = ['produto', 'despesa_fixa', 'created_at']
-    list_filter = ['created_at', 'produto', 'despesa_fixa']
+    list_filter = [
+        'created_at', ('produto', FiltroAutocomplete), ('despesa_fixa', FiltroAutocomplete)
+    ]
+    list_select_related = ['produto__usuario', 'despesa_fixa__usuario']
+    autocomplete_fields = ['produto', 'despesa_fixa']
     search_fields = ['produto__nome', 'despesa_fixa__nome']
     ordering = ['-created_at']
     readonly_fields = ['created_at']
 
 
 @admin.register(ProdutoDespesaVariavel)
-class ProdutoDespesaVariavelAdmin(admin.ModelAdmin):
+class ProdutoDespesaVariavelAdmin(ListagemGrandeMixin, admin.ModelAdmin):
     list_display = ['produto', 'despesa_variavel', 'quantidade', 'created_at']
-    list_filter = ['created_at', 'produto', 'despesa_variavel']
+    list_filter = [
+        'created_at', ('produto', FiltroAutocomplete), ('despesa_variavel', FiltroAutocomplete)
+    ]
+    list_select_related = ['produto__usuario', 'despesa_variavel__usuario']
+    autocomplete_fields = ['produto', 'despesa_variavel']
     search_fields = ['produto__nome', 'despesa_variavel__nome']
     ordering = ['-created_at']
     readonly_fields = ['created_at']
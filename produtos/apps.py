@@ -5,3 +5,9 @@ class ProdutosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'produtos'
     verbose_name = 'Produtos'
+
+    def ready(self):
+        """
+        Registra os signals que invalidam a tabela de rateio.
+        """
+        from . import signals  # noqa: F401
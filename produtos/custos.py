@@ -0,0 +1,186 @@
+"""
+Cálculo de custos e precificação de produtos.
+
+Os custos de ingredientes e despesas variáveis de vários produtos são
+somados no banco (uma consulta agregada para cada um); as despesas fixas vêm
+da tabela de rateio do usuário (ver rateio.py). O mesmo cálculo é usado pelo
+endpoint de cálculo de um produto, pelo cálculo em lote e pelo registro de
+análises financeiras (de um produto pela API ou de vários pelo admin).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+
+from analisefinanceira.models import AnaliseFinanceira
+from .models import ProdutoDespesaVariavel, ProdutoIngrediente
+from .rateio import obter_tabela
+
+
+CENTAVOS = Decimal('0.01')
+
+# Produtos calculados e análises gravadas por vez em registrar_analises
+TAMANHO_LOTE_ANALISES = 500
+
+
+def _somar_por_produto(model, produto_ids, campo_preco):
+    """Soma quantidade x preço dos itens de cada produto, em uma consulta"""
+    return dict(
+        model.objects.filter(produto_id__in=produto_ids)
+        .order_by()
+        .values('produto_id')
+        .annotate(total=Sum(
+            F('quantidade') * F(campo_preco),
+            output_field=DecimalField(max_digits=24, decimal_places=5)
+        ))
+        .values_list('produto_id', 'total')
+    )
+
+
+class CustoProduto:
+    """
+    Custos unitários e projeções de um produto no seu período de análise.
+
+    O custo fixo do período (parcela do produto no rateio) é distribuído
+    pela quantidade produzida no período (produção diária x dias).
+    """
+
+    def __init__(self, produto, custo_ingredientes, custo_despesas_variaveis, tabela):
+        self.produto = produto
+        self.tabela = tabela
+        self.quantidade_estimada = produto.producao_diaria * produto.periodo_analise
+        self.custo_fixo_periodo = tabela.total(produto.pk)
+
+        self.ingredientes = Decimal(custo_ingredientes or 0)
+        self.despesas_fixas = (
+            self.custo_fixo_periodo / self.quantidade_estimada
+            if self.quantidade_estimada else self.custo_fixo_periodo
+        )
+        self.despesas_variaveis = Decimal(custo_despesas_variaveis or 0)
+        self.total_producao = self.ingredientes + self.despesas_fixas + self.despesas_variaveis
+
+        self.preco_venda_sugerido = self.total_producao * (1 + produto.margem_lucro / 100)
+        self.faturamento_previsto = self.preco_venda_sugerido * self.quantidade_estimada
+        self.custo_total_periodo = self.total_producao * self.quantidade_estimada
+        self.lucro_previsto = self.faturamento_previsto - self.custo_total_periodo
+
+    @property
+    def roi_percentual(self):
+        if self.custo_total_periodo > 0:
+            return self.lucro_previsto / self.custo_total_periodo * 100
+        return Decimal('0')
+
+    def custos(self):
+        return {
+            'ingredientes': float(self.ingredientes),
+            'despesas_fixas': float(self.despesas_fixas),
+            'despesas_variaveis': float(self.despesas_variaveis),
+            'total_producao': float(self.total_producao),
+        }
+
+    def precificacao(self):
+        return {
+            'preco_venda_sugerido': float(self.preco_venda_sugerido),
+            'margem_lucro_percentual': float(self.produto.margem_lucro),
+            'margem_lucro_valor': float(self.preco_venda_sugerido - self.total_producao),
+        }
+
+    def projecoes_periodo(self):
+        return {
+            'quantidade_estimada': self.quantidade_estimada,
+            'faturamento_previsto': float(self.faturamento_previsto),
+            'custo_total_periodo': float(self.custo_total_periodo),
+            'lucro_previsto': float(self.lucro_previsto),
+            'roi_percentual': float(self.roi_percentual),
+        }
+
+    def rateio(self):
+        return {
+            'criterio': self.tabela.criterio,
+            'inicio': self.tabela.inicio.isoformat(),
+            'fim': self.tabela.fim.isoformat(),
+            'custo_fixo_periodo': float(self.custo_fixo_periodo),
+        }
+
+    def resumo(self):
+        """Resumo usado no cálculo em lote"""
+        return {
+            'produto_id': self.produto.pk,
+            'produto_nome': self.produto.nome,
+            'periodo_analise': self.produto.periodo_analise,
+            'custos': self.custos(),
+            'precificacao': self.precificacao(),
+            'projecoes_periodo': self.projecoes_periodo(),
+            'rateio': self.rateio(),
+        }
+
+    def valores_analise(self):
+        """Valores de uma AnaliseFinanceira com os custos atuais, em centavos"""
+        def arredondar(valor):
+            return valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+        return {
+            'custo_ingredientes': arredondar(self.ingredientes),
+            'custo_despesas_fixas': arredondar(self.despesas_fixas),
+            'custo_despesas_variaveis': arredondar(self.despesas_variaveis),
+            'preco_venda_sugerido': arredondar(self.preco_venda_sugerido),
+            'faturamento_previsto': arredondar(self.faturamento_previsto),
+            'lucro_previsto': arredondar(self.lucro_previsto),
+        }
+
+
+def calcular_custos(produtos, criterio=None, inicio=None):
+    """
+    Calcula os custos de uma lista de produtos, com as despesas fixas do
+    período de análise de cada um a partir de `inicio` (hoje, por padrão).
+    Retorna um dicionário produto_id -> CustoProduto.
+    """
+    produtos = list(produtos)
+    ids = [produto.pk for produto in produtos]
+    ingredientes = _somar_por_produto(ProdutoIngrediente, ids, 'ingrediente__preco_por_unidade')
+    variaveis = _somar_por_produto(ProdutoDespesaVariavel, ids, 'despesa_variavel__valor_por_unidade')
+
+    tabelas = {}
+    custos = {}
+    for produto in produtos:
+        chave = (produto.usuario_id, produto.periodo_analise)
+        if chave not in tabelas:
+            tabelas[chave] = obter_tabela(
+                produto.usuario_id, produto.periodo_analise, criterio, inicio
+            )
+        custos[produto.pk] = CustoProduto(
+            produto, ingredientes.get(produto.pk), variaveis.get(produto.pk), tabelas[chave]
+        )
+    return custos
+
+
+def calcular_custo(produto, criterio=None, inicio=None):
+    """Calcula os custos de um único produto"""
+    return calcular_custos([produto], criterio, inicio)[produto.pk]
+
+
+def registrar_analises(produtos, criterio=None, inicio=None):
+    """
+    Registra uma AnaliseFinanceira com os custos atuais de cada produto do
+    queryset, em uma transação. Os produtos são lidos, calculados e as
+    análises gravadas (bulk_create) em lotes de TAMANHO_LOTE_ANALISES.
+    Retorna a quantidade de análises registradas.
+    """
+    produtos = produtos.order_by('pk')
+    total = 0
+    ultimo_id = 0
+    with transaction.atomic():
+        while True:
+            lote = list(produtos.filter(pk__gt=ultimo_id)[:TAMANHO_LOTE_ANALISES])
+            if not lote:
+                break
+            custos = calcular_custos(lote, criterio, inicio)
+            analises = []
+            for produto in lote:
+                analise = AnaliseFinanceira(produto=produto, **custos[produto.pk].valores_analise())
+                analise.calcular_custo_total()
+                analises.append(analise)
+            AnaliseFinanceira.objects.bulk_create(analises)
+            total += len(analises)
+            ultimo_id = lote[-1].pk
+    return total
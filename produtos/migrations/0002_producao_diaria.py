@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='producao_diaria',
+            field=models.PositiveIntegerField(default=1, help_text='Quantidade média produzida por dia, usada no rateio das despesas fixas', verbose_name='Produção Diária'),
+        ),
+    ]
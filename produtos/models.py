@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from decimal import Decimal
@@ -43,6 +44,11 @@ class Produto(models.Model):
         verbose_name="Período de Análise (dias)",
         help_text="Período em dias para análise financeira"
     )
+    producao_diaria = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Produção Diária",
+        help_text="Quantidade média produzida por dia, usada no rateio das despesas fixas"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Criado em"
@@ -56,7 +62,14 @@ class Produto(models.Model):
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
         ordering = ['-created_at']
-        unique_together = ['usuario', 'nome']
+        constraints = [
+            # Nome único por usuário, sem diferenciar maiúsculas de minúsculas
+            models.UniqueConstraint(
+                'usuario', Lower('nome'),
+                name='produto_nome_unico_por_usuario',
+                violation_error_message='Já existe um produto com este nome.'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nome} - {self.usuario.nome_comercial}"
@@ -85,6 +98,11 @@ class Produto(models.Model):
                 'periodo_analise': 'O período de análise deve ser maior que zero.'
             })
 
+        if self.producao_diaria is not None and self.producao_diaria <= 0:
+            raise ValidationError({
+                'producao_diaria': 'A produção diária deve ser maior que zero.'
+            })
+
     @property
     def margem_lucro_formatada(self):
         """Retorna a margem de lucro formatada"""
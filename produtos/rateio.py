@@ -0,0 +1,143 @@
+"""
+Rateio das despesas fixas entre os produtos que as utilizam.
+
+Cada despesa fixa ativa é dividida entre os produtos vinculados a ela
+(ProdutoDespesaFixa) de acordo com um critério:
+- volume: proporcional à produção diária de cada produto
+- tempo_preparo: proporcional ao tempo total de preparo (tempo_preparo x produção diária)
+- igual: partes iguais
+
+O custo de cada despesa na janela [inicio, inicio + dias) vem do avaliador
+de recorrências (despesafixa/recorrencia.py), considerando a recorrência e
+a vigência de cada despesa. A tabela de rateio de um usuário é calculada uma
+vez por janela e critério, com uma única consulta por intervalo, e fica em cache até que uma despesa
+fixa, um vínculo ou um produto do usuário seja alterado (ver signals.py).
+O cálculo de custos de um produto, o cálculo em lote e o registro de
+análises financeiras leem a mesma tabela.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+
+from core.cache import obter_ou_calcular
+from despesafixa.recorrencia import custo_no_intervalo, filtro_vigencia, janela
+from .models import ProdutoDespesaFixa
+
+
+RECURSO_CACHE = 'rateio_despesas_fixas'
+
+CRITERIOS = ('volume', 'tempo_preparo', 'igual')
+
+
+def criterio_padrao():
+    return getattr(settings, 'RATEIO_CRITERIO_PADRAO', 'volume')
+
+
+@dataclass(frozen=True)
+class ParcelaRateio:
+    """Parte de uma despesa fixa atribuída a um produto no período"""
+    despesa_id: int
+    nome: str
+    valor_despesa: Decimal
+    recorrencia: str
+    custo_periodo: Decimal
+    fracao: Decimal
+    valor: Decimal
+
+
+class TabelaRateio:
+    """
+    Parcelas de cada despesa fixa atribuídas a cada produto de um usuário
+    na janela [inicio, fim) de `dias` dias.
+    """
+
+    def __init__(self, criterio, inicio, dias, parcelas_por_produto):
+        self.criterio = criterio
+        self.inicio, self.fim = janela(dias, inicio)
+        self.dias = dias
+        self._parcelas = parcelas_por_produto
+
+    def parcelas(self, produto_id):
+        return self._parcelas.get(produto_id, [])
+
+    def total(self, produto_id):
+        """Custo fixo total do produto no período"""
+        return sum((parcela.valor for parcela in self.parcelas(produto_id)), Decimal('0'))
+
+
+def _peso(criterio, producao_diaria, tempo_preparo):
+    if criterio == 'volume':
+        return Decimal(producao_diaria)
+    if criterio == 'tempo_preparo':
+        return Decimal(tempo_preparo * producao_diaria)
+    return Decimal('1')
+
+
+def calcular_tabela(usuario_id, inicio, dias, criterio):
+    """
+    Calcula a tabela de rateio do usuário em uma consulta: os vínculos das
+    despesas ativas vigentes em algum dia da janela.
+    """
+    inicio, fim = janela(dias, inicio)
+    vinculos = (
+        ProdutoDespesaFixa.objects
+        .filter(
+            filtro_vigencia(inicio, fim, prefixo='despesa_fixa__'),
+            produto__usuario_id=usuario_id,
+            despesa_fixa__ativa=True,
+        )
+        .order_by('despesa_fixa_id', 'produto_id')
+        .values_list(
+            'despesa_fixa_id', 'despesa_fixa__nome', 'despesa_fixa__valor',
+            'despesa_fixa__recorrencia', 'despesa_fixa__data_inicio', 'despesa_fixa__data_fim',
+            'produto_id', 'produto__producao_diaria', 'produto__tempo_preparo',
+        )
+    )
+
+    parcelas = defaultdict(list)
+    for despesa, linhas in groupby(vinculos, key=itemgetter(0, 1, 2, 3, 4, 5)):
+        despesa_id, nome, valor, recorrencia, data_inicio, data_fim = despesa
+        custo_periodo = custo_no_intervalo(valor, recorrencia, data_inicio, data_fim, inicio, fim)
+        if not custo_periodo:
+            continue
+
+        pesos = [
+            (produto_id, _peso(criterio, producao_diaria, tempo_preparo))
+            for *_, produto_id, producao_diaria, tempo_preparo in linhas
+        ]
+        peso_total = sum(peso for _, peso in pesos)
+        if not peso_total:
+            pesos = [(produto_id, Decimal('1')) for produto_id, _ in pesos]
+            peso_total = Decimal(len(pesos))
+
+        for produto_id, peso in pesos:
+            fracao = peso / peso_total
+            parcelas[produto_id].append(ParcelaRateio(
+                despesa_id=despesa_id,
+                nome=nome,
+                valor_despesa=valor,
+                recorrencia=recorrencia,
+                custo_periodo=custo_periodo,
+                fracao=fracao,
+                valor=custo_periodo * fracao,
+            ))
+
+    return TabelaRateio(criterio, inicio, dias, dict(parcelas))
+
+
+def obter_tabela(usuario_id, dias, criterio=None, inicio=None):
+    """
+    Retorna a tabela de rateio do cache ou a calcula.
+    A janela começa em `inicio` ou, se não informado, hoje.
+    """
+    criterio = criterio or criterio_padrao()
+    inicio, _ = janela(dias, inicio)
+    return obter_ou_calcular(
+        RECURSO_CACHE, usuario_id,
+        lambda: calcular_tabela(usuario_id, inicio, dias, criterio),
+        criterio, inicio.isoformat(), dias
+    )
@@ -1,10 +1,15 @@
 from rest_framework import serializers
 from django.core.exceptions import ValidationError
 from decimal import Decimal
+from core.bulk import BulkCreateListSerializer
+from core.integridade import UnicidadeNoBancoMixin
 from .models import Produto, ProdutoIngrediente, ProdutoDespesaFixa, ProdutoDespesaVariavel
 
 
-class ProdutoSerializer(serializers.ModelSerializer):
+MENSAGEM_NOME_DUPLICADO = 'Já existe um produto com este nome.'
+
+
+class ProdutoSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer principal para o modelo Produto.
     Usado para listagem e detalhes de produtos.
@@ -14,11 +19,13 @@ class ProdutoSerializer(serializers.ModelSerializer):
     tempo_preparo_formatado = serializers.ReadOnlyField()
     info_completa = serializers.ReadOnlyField()
 
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = Produto
         fields = [
             'id', 'usuario', 'nome', 'descricao', 'tempo_preparo', 
-            'margem_lucro', 'periodo_analise', 'created_at', 'updated_at',
+            'margem_lucro', 'periodo_analise', 'producao_diaria', 'created_at', 'updated_at',
             'usuario_nome', 'margem_lucro_formatada', 'tempo_preparo_formatado',
             'info_completa'
         ]
@@ -57,39 +64,24 @@ class ProdutoSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("O período de análise não pode ser superior a 10 anos (3650 dias).")
         return value
 
-    def validate(self, data):
-        """Validação geral dos dados"""
-        # Verificar se já existe um produto com o mesmo nome para o usuário
-        usuario = self.context['request'].user
-        nome = data.get('nome')
-        
-        if nome:
-            produtos_existentes = Produto.objects.filter(
-                usuario=usuario, 
-                nome__iexact=nome.strip()
-            )
-            
-            # Se estamos editando, excluir o produto atual da verificação
-            if self.instance:
-                produtos_existentes = produtos_existentes.exclude(id=self.instance.id)
-            
-            if produtos_existentes.exists():
-                raise serializers.ValidationError({
-                    'nome': 'Já existe um produto com este nome.'
-                })
-        
-        return data
-
-
-class ProdutoCreateSerializer(serializers.ModelSerializer):
+    def validate_producao_diaria(self, value):
+        """Validação customizada para produção diária"""
+        if value is not None and value <= 0:
+            raise serializers.ValidationError("A produção diária deve ser maior que zero.")
+        return value
+
+
+class ProdutoCreateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer otimizado para criação de produtos.
     """
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = Produto
         fields = [
             'nome', 'descricao', 'tempo_preparo', 
-            'margem_lucro', 'periodo_analise'
+            'margem_lucro', 'periodo_analise', 'producao_diaria'
         ]
 
     def validate_nome(self, value):
@@ -121,6 +113,12 @@ class ProdutoCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("O período de análise deve ser maior que zero.")
         return value
 
+    def validate_producao_diaria(self, value):
+        """Validação customizada para produção diária"""
+        if value is not None and value <= 0:
+            raise serializers.ValidationError("A produção diária deve ser maior que zero.")
+        return value
+
     def create(self, validated_data):
         """Sobrescreve o método create para definir o usuário automaticamente"""
         usuario = self.context['request'].user
@@ -128,15 +126,28 @@ class ProdutoCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ProdutoUpdateSerializer(serializers.ModelSerializer):
+class ProdutoBulkCreateSerializer(ProdutoCreateSerializer):
+    """
+    Serializer para criação de produtos em lote (usado pela importação de catálogo).
+    A unicidade dos nomes é verificada para o lote inteiro pelo ListSerializer.
+    """
+    mensagem_nome_duplicado = MENSAGEM_NOME_DUPLICADO
+
+    class Meta(ProdutoCreateSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
+
+class ProdutoUpdateSerializer(UnicidadeNoBancoMixin, serializers.ModelSerializer):
     """
     Serializer otimizado para atualização de produtos.
     """
+    mensagens_unicidade = {'nome': MENSAGEM_NOME_DUPLICADO}
+
     class Meta:
         model = Produto
         fields = [
             'nome', 'descricao', 'tempo_preparo', 
-            'margem_lucro', 'periodo_analise'
+            'margem_lucro', 'periodo_analise', 'producao_diaria'
         ]
 
     def validate_nome(self, value):
@@ -168,6 +179,12 @@ class ProdutoUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("O período de análise deve ser maior que zero.")
         return value
 
+    def validate_producao_diaria(self, value):
+        """Validação customizada para produção diária"""
+        if value is not None and value <= 0:
+            raise serializers.ValidationError("A produção diária deve ser maior que zero.")
+        return value
+
 
 class ProdutoListSerializer(serializers.ModelSerializer):
     """
@@ -182,7 +199,7 @@ class ProdutoListSerializer(serializers.ModelSerializer):
         model = Produto
         fields = [
             'id', 'nome', 'tempo_preparo', 'margem_lucro', 
-            'periodo_analise', 'created_at', 'usuario_nome',
+            'periodo_analise', 'producao_diaria', 'created_at', 'usuario_nome',
             'margem_lucro_formatada', 'tempo_preparo_formatado'
         ]
 
@@ -288,7 +305,7 @@ class ProdutoDetalhadoSerializer(serializers.ModelSerializer):
         model = Produto
         fields = [
             'id', 'usuario', 'nome', 'descricao', 'tempo_preparo', 
-            'margem_lucro', 'periodo_analise', 'created_at', 'updated_at',
+            'margem_lucro', 'periodo_analise', 'producao_diaria', 'created_at', 'updated_at',
             'usuario_nome', 'margem_lucro_formatada', 'tempo_preparo_formatado',
             'ingredientes', 'despesas_fixas', 'despesas_variaveis'
         ]
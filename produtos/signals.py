@@ -0,0 +1,63 @@
+"""
+Invalidação da tabela de rateio de despesas fixas (ver rateio.py) e das
+respostas em cache dos produtos (ver core/respostas.py).
+
+A tabela depende das despesas fixas, dos vínculos entre produtos e despesas
+fixas e da produção e tempo de preparo dos produtos do usuário. As respostas
+dependem dos produtos e de todos os seus vínculos.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar
+from core.respostas import PRODUTOS
+from core.signals import dados_alterados
+from despesafixa.models import DespesaFixa
+from .models import Produto, ProdutoDespesaFixa, ProdutoDespesaVariavel, ProdutoIngrediente
+from .rateio import RECURSO_CACHE
+
+
+@receiver([post_save, post_delete], sender=DespesaFixa)
+@receiver([post_save, post_delete], sender=Produto)
+def invalidar_rateio(sender, instance, **kwargs):
+    invalidar(RECURSO_CACHE, instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=ProdutoDespesaFixa)
+def invalidar_rateio_vinculo(sender, instance, **kwargs):
+    try:
+        usuario_id = instance.produto.usuario_id
+    except Produto.DoesNotExist:
+        return
+    invalidar(RECURSO_CACHE, usuario_id)
+
+
+@receiver(dados_alterados, sender=DespesaFixa)
+@receiver(dados_alterados, sender=Produto)
+@receiver(dados_alterados, sender=ProdutoDespesaFixa)
+def invalidar_rateio_em_lote(sender, usuario_ids, **kwargs):
+    invalidar(RECURSO_CACHE, *usuario_ids)
+
+
+@receiver([post_save, post_delete], sender=Produto)
+def invalidar_respostas(sender, instance, **kwargs):
+    invalidar(PRODUTOS, instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=ProdutoIngrediente)
+@receiver([post_save, post_delete], sender=ProdutoDespesaFixa)
+@receiver([post_save, post_delete], sender=ProdutoDespesaVariavel)
+def invalidar_respostas_vinculo(sender, instance, **kwargs):
+    try:
+        usuario_id = instance.produto.usuario_id
+    except Produto.DoesNotExist:
+        return
+    invalidar(PRODUTOS, usuario_id)
+
+
+@receiver(dados_alterados, sender=Produto)
+@receiver(dados_alterados, sender=ProdutoIngrediente)
+@receiver(dados_alterados, sender=ProdutoDespesaFixa)
+@receiver(dados_alterados, sender=ProdutoDespesaVariavel)
+def invalidar_respostas_em_lote(sender, usuario_ids, **kwargs):
+    invalidar(PRODUTOS, *usuario_ids)
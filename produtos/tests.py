@@ -1,12 +1,24 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 from rest_framework import status
+from datetime import date
 from decimal import Decimal
+from analisefinanceira.models import AnaliseFinanceira
+from despesafixa.models import DespesaFixa
+from ingredientes.models import Ingrediente
 from .models import Produto, ProdutoIngrediente, ProdutoDespesaFixa, ProdutoDespesaVariavel
+from .rateio import calcular_tabela, obter_tabela
 
 User = get_user_model()
 
+# Abril tem 30 dias: uma despesa mensal custa o valor cheio em 30 dias a partir do dia 1
+ABRIL = date(2026, 4, 1)
+
 
 class ProdutoModelTest(TestCase):
     """Testes para o modelo Produto"""
@@ -294,3 +306,309 @@ class ProdutoAPITest(APITestCase):
         self.assertIn('tempo_preparo', response.data)
         self.assertIn('margem_lucro', response.data)
         self.assertIn('periodo_analise', response.data)
+
+    def test_duplicar_com_copia_em_outra_caixa(self):
+        """Teste se a duplicação evita nomes que só diferem em maiúsculas"""
+        produto = Produto.objects.create(
+            usuario=self.user, nome='bolo', tempo_preparo=30,
+            margem_lucro=Decimal('25.00'), periodo_analise=30
+        )
+        Produto.objects.create(
+            usuario=self.user, nome='CóPIA DE BOLO', tempo_preparo=30,
+            margem_lucro=Decimal('25.00'), periodo_analise=30
+        )
+
+        response = self.client.post(f'/api/produtos/{produto.id}/duplicar/')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['produto']['nome'], 'Cópia de bolo (2)')
+
+
+class RateioDespesasFixasTest(APITestCase):
+    """Testes para o rateio de despesas fixas e o cálculo de custos"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Empresa Teste'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.aluguel = DespesaFixa.objects.create(
+            usuario=self.user, nome='Aluguel', valor=Decimal('3000.00')
+        )
+        self.bolo = Produto.objects.create(
+            usuario=self.user, nome='Bolo', tempo_preparo=60, margem_lucro=Decimal('50.00'),
+            periodo_analise=30, producao_diaria=10
+        )
+        self.torta = Produto.objects.create(
+            usuario=self.user, nome='Torta', tempo_preparo=30, margem_lucro=Decimal('50.00'),
+            periodo_analise=30, producao_diaria=30
+        )
+        for produto in (self.bolo, self.torta):
+            ProdutoDespesaFixa.objects.create(produto=produto, despesa_fixa=self.aluguel)
+
+    def test_rateio_por_volume(self):
+        """Teste se a despesa é dividida pela produção de cada produto"""
+        tabela = obter_tabela(self.user.pk, 30, 'volume', ABRIL)
+
+        self.assertEqual(tabela.total(self.bolo.pk), Decimal('750'))
+        self.assertEqual(tabela.total(self.torta.pk), Decimal('2250'))
+
+    def test_rateio_por_tempo_preparo_e_igual(self):
+        """Teste dos critérios de tempo de preparo e partes iguais"""
+        por_tempo = obter_tabela(self.user.pk, 30, 'tempo_preparo', ABRIL)
+        # Bolo: 60 min x 10 = 600; Torta: 30 min x 30 = 900
+        self.assertEqual(por_tempo.total(self.bolo.pk), Decimal('1200'))
+
+        igual = obter_tabela(self.user.pk, 15, 'igual', ABRIL)
+        self.assertEqual(igual.total(self.bolo.pk), Decimal('750'))
+        self.assertEqual(igual.total(self.torta.pk), Decimal('750'))
+
+    def test_tabela_em_cache_ate_alteracao(self):
+        """Teste se a tabela é reaproveitada e invalidada ao alterar despesas ou produtos"""
+        obter_tabela(self.user.pk, 30, 'volume', ABRIL)
+        with self.assertNumQueries(0):
+            obter_tabela(self.user.pk, 30, 'volume', ABRIL)
+
+        self.torta.producao_diaria = 10
+        self.torta.save()
+        self.assertEqual(obter_tabela(self.user.pk, 30, 'volume', ABRIL).total(self.bolo.pk), Decimal('1500'))
+
+        self.aluguel.ativa = False
+        self.aluguel.save()
+        self.assertEqual(obter_tabela(self.user.pk, 30, 'volume', ABRIL).total(self.bolo.pk), Decimal('0'))
+
+    def test_calcular_usa_rateio(self):
+        """Teste se o cálculo do produto usa a parcela rateada por unidade"""
+        response = self.client.get(f'/api/produtos/{self.bolo.pk}/calcular/?inicio=2026-04-01')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 750,00 no período / (10 por dia x 30 dias)
+        self.assertEqual(response.data['custos']['despesas_fixas'], 2.5)
+        self.assertEqual(response.data['projecoes_periodo']['quantidade_estimada'], 300)
+        self.assertEqual(response.data['detalhamento_despesas_fixas'][0]['percentual_rateio'], 25.0)
+        self.assertEqual(response.data['rateio']['fim'], '2026-05-01')
+
+        response = self.client.get(f'/api/produtos/{self.bolo.pk}/calcular/?criterio=outro')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(f'/api/produtos/{self.bolo.pk}/calcular/?inicio=2026-13-01')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_custos_em_lote_e_registro_de_analise(self):
+        """Teste do cálculo em lote e do registro de análise com a mesma tabela"""
+        response = self.client.get('/api/produtos/custos/?criterio=igual&inicio=2026-04-01')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resumos = {item['produto_id']: item for item in response.data['results']}
+        self.assertEqual(resumos[self.torta.pk]['custos']['despesas_fixas'], 1500 / 900)
+
+        response = self.client.post(f'/api/produtos/{self.bolo.pk}/registrar_analise/?inicio=2026-04-01')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        analise = AnaliseFinanceira.objects.get(produto=self.bolo)
+        self.assertEqual(analise.custo_despesas_fixas, Decimal('2.50'))
+        self.assertEqual(analise.preco_venda_sugerido, Decimal('3.75'))
+
+    def test_rateio_considera_recorrencia_e_vigencia(self):
+        """Teste se despesas anuais e com vigência entram só com o custo do período"""
+        seguro = DespesaFixa.objects.create(
+            usuario=self.user, nome='Seguro', valor=Decimal('3650.00'), recorrencia='anual',
+            data_inicio=date(2026, 1, 1)
+        )
+        encerrada = DespesaFixa.objects.create(
+            usuario=self.user, nome='Antigo Aluguel', valor=Decimal('900.00'),
+            data_fim=date(2026, 3, 31)
+        )
+        for despesa in (seguro, encerrada):
+            ProdutoDespesaFixa.objects.create(produto=self.bolo, despesa_fixa=despesa)
+
+        with self.assertNumQueries(1):
+            tabela = calcular_tabela(self.user.pk, ABRIL, 30, 'igual')
+
+        parcelas = {parcela.nome: parcela for parcela in tabela.parcelas(self.bolo.pk)}
+        # 3650,00 por ano = 10,00 por dia em 2026
+        self.assertEqual(parcelas['Seguro'].custo_periodo, Decimal('300'))
+        self.assertNotIn('Antigo Aluguel', parcelas)
+        self.assertEqual(tabela.total(self.bolo.pk), Decimal('1800'))
+
+
+class RespostasEmCacheTest(APITestCase):
+    """Testes das respostas em cache com ETag de stats e calcular"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123',
+            nome_comercial='Empresa Teste'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.farinha = Ingrediente.objects.create(
+            usuario=self.user, nome='Farinha', preco_por_unidade=Decimal('5.00'), unidade_medida='kg'
+        )
+        self.bolo = Produto.objects.create(
+            usuario=self.user, nome='Bolo', tempo_preparo=60, margem_lucro=Decimal('50.00'),
+            periodo_analise=30
+        )
+        ProdutoIngrediente.objects.create(produto=self.bolo, ingrediente=self.farinha, quantidade=Decimal('2'))
+
+    def test_stats_responde_304_sem_consultas(self):
+        """Teste se If-None-Match com a ETag atual responde 304 sem consultar o banco"""
+        response = self.client.get('/api/produtos/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/produtos/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/produtos/stats/')
+        self.assertEqual(response.data['total_produtos'], 1)
+
+        Produto.objects.create(
+            usuario=self.user, nome='Torta', tempo_preparo=30, margem_lucro=Decimal('40.00'),
+            periodo_analise=30
+        )
+        response = self.client.get('/api/produtos/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['total_produtos'], 2)
+
+    def test_calcular_invalidado_pelos_dados_do_calculo(self):
+        """Teste se calcular muda com o preço dos ingredientes e varia com os parâmetros"""
+        url = f'/api/produtos/{self.bolo.pk}/calcular/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(response.data['custos']['ingredientes'], 10.0)
+        self.assertNotEqual(self.client.get(url, {'criterio': 'igual'})['ETag'], etag)
+
+        self.farinha.preco_por_unidade = Decimal('6.00')
+        self.farinha.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['custos']['ingredientes'], 12.0)
+
+        outro = User.objects.create_user(
+            username='outro', email='outro@example.com', password='testpass123', nome_comercial='Outra'
+        )
+        self.client.force_authenticate(user=outro)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProdutoAdminTest(TestCase):
+    """Testes das listagens do admin de produtos"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='adminpass123',
+            nome_comercial='Administração'
+        )
+        self.client.force_login(self.admin)
+        self.usuario = User.objects.create_user(
+            username='loja', email='loja@example.com', password='testpass123',
+            nome_comercial='Loja'
+        )
+
+    def criar_vinculos(self, quantidade, inicio=0):
+        for indice in range(inicio, inicio + quantidade):
+            produto = Produto.objects.create(
+                usuario=self.usuario, nome=f'Produto {indice}', tempo_preparo=10,
+                margem_lucro=Decimal('20.00'), periodo_analise=30
+            )
+            ingrediente = Ingrediente.objects.create(
+                usuario=self.usuario, nome=f'Ingrediente {indice}',
+                preco_por_unidade=Decimal('1.00'), unidade_medida='kg'
+            )
+            ProdutoIngrediente.objects.create(
+                produto=produto, ingrediente=ingrediente, quantidade=Decimal('1.000')
+            )
+
+    def consultas_da_listagem(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(consultas)
+
+    def test_listagem_sem_consultas_por_linha(self):
+        """Teste se o número de consultas da listagem não cresce com as linhas"""
+        url = '/admin/produtos/produtoingrediente/'
+        self.criar_vinculos(2)
+        poucas = self.consultas_da_listagem(url)
+        self.criar_vinculos(5, inicio=2)
+        self.assertEqual(self.consultas_da_listagem(url), poucas)
+
+    def test_filtro_nao_carrega_tabela_relacionada(self):
+        """Teste se o filtro por produto consulta só o produto selecionado"""
+        self.criar_vinculos(3)
+        produto = Produto.objects.get(nome='Produto 1')
+
+        def opcoes(response):
+            especificacao = response.context['cl'].filter_specs[1]
+            return especificacao.lookup_choices
+
+        response = self.client.get('/admin/produtos/produtoingrediente/')
+        self.assertEqual(opcoes(response), [])
+        self.assertContains(response, 'filtro-autocomplete')
+
+        response = self.client.get(
+            f'/admin/produtos/produtoingrediente/?produto__id__exact={produto.pk}'
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertEqual(opcoes(response), [(produto.pk, 'Produto 1 - Loja')])
+
+    def test_registrar_analises_em_lote(self):
+        """Teste se a ação registra uma análise por produto com bulk_create"""
+        self.criar_vinculos(3)
+        produtos = list(Produto.objects.all())
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post('/admin/produtos/produto/', {
+                'action': 'registrar_analises',
+                '_selected_action': [produto.pk for produto in produtos],
+            }, follow=True)
+
+        self.assertContains(response, '3 análise(s) financeira(s) registrada(s) com sucesso.')
+        insercoes = [c for c in consultas if c['sql'].startswith('INSERT INTO "analisefinanceira_analisefinanceira"')]
+        self.assertEqual(len(insercoes), 1)
+        analise = AnaliseFinanceira.objects.get(produto=produtos[0])
+        self.assertEqual(analise.custo_ingredientes, Decimal('1.00'))
+        self.assertEqual(
+            analise.custo_total_producao,
+            analise.custo_ingredientes + analise.custo_despesas_fixas + analise.custo_despesas_variaveis
+        )
+
+    @override_settings(ADMIN_ACAO_LIMITE_SINCRONO=1, TAREFAS_MODO='imediato')
+    def test_registrar_analises_em_segundo_plano(self):
+        """Teste se seleções grandes de produtos vão para uma tarefa"""
+        self.criar_vinculos(2)
+        response = self.client.post('/admin/produtos/produto/', {
+            'action': 'registrar_analises', 'select_across': '1',
+            '_selected_action': list(Produto.objects.values_list('pk', flat=True)),
+        }, follow=True)
+
+        self.assertContains(response, '2 registro(s) em processamento em segundo plano.')
+        self.assertEqual(AnaliseFinanceira.objects.count(), 2)
+
+    def test_staff_nao_registra_analises_de_outros(self):
+        """Teste se um staff que não é superusuário só registra análises dos próprios produtos"""
+        self.criar_vinculos(1)
+        staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='testpass123',
+            nome_comercial='Loja Staff', is_staff=True
+        )
+        staff.user_permissions.add(*Permission.objects.filter(
+            codename__in=['view_produto', 'add_analisefinanceira']
+        ))
+        self.client.force_login(staff)
+
+        response = self.client.post('/admin/produtos/produto/', {
+            'action': 'registrar_analises',
+            '_selected_action': list(Produto.objects.values_list('pk', flat=True)),
+        }, follow=True)
+        self.assertContains(response, '1 registro(s) selecionado(s) pertencem a outros usuários.')
+        self.assertFalse(AnaliseFinanceira.objects.exists())
@@ -1,10 +1,17 @@
-from rest_framework import viewsets, status, permissions, filters
+from rest_framework import viewsets, status, permissions, filters, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Count, Sum, Avg
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
-from decimal import Decimal
+from analisefinanceira.models import AnaliseFinanceira
+from analisefinanceira.serializers import AnaliseFinanceiraDetalhadaSerializer
+from core.respostas import INGREDIENTES, PRODUTOS, resposta_versionada
+from despesavariavel.estatisticas import RECURSO_CACHE as DESPESAS_VARIAVEIS
+from .custos import calcular_custo, calcular_custos
 from .models import Produto, ProdutoIngrediente, ProdutoDespesaFixa, ProdutoDespesaVariavel
+from .rateio import CRITERIOS, RECURSO_CACHE as RATEIO, criterio_padrao
 from .filters import ProdutoFilter
 from .serializers import (
     ProdutoSerializer,
@@ -35,6 +42,8 @@ class ProdutoViewSet(viewsets.ModelViewSet):
     - GET /produtos/stats/ - Estatísticas dos produtos
     - POST /produtos/{id}/duplicar/ - Duplica um produto
     - GET /produtos/{id}/calcular/ - Calcula custos do produto
+    - GET /produtos/custos/ - Calcula custos de todos os produtos
+    - POST /produtos/{id}/registrar_analise/ - Registra uma análise financeira com os custos atuais
     """
     
     permission_classes = [permissions.IsAuthenticated]
@@ -48,6 +57,8 @@ class ProdutoViewSet(viewsets.ModelViewSet):
         """
         Retorna apenas os produtos do usuário autenticado.
         """
+        if getattr(self, 'swagger_fake_view', False):
+            return Produto.objects.none()
         return Produto.objects.filter(usuario=self.request.user)
 
     def get_serializer_class(self):
@@ -93,10 +104,14 @@ class ProdutoViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @resposta_versionada(PRODUTOS)
     def stats(self, request):
         """
         Endpoint para obter estatísticas dos produtos do usuário.
         GET /api/produtos/stats/
+
+        A resposta traz uma ETag e fica em cache até a próxima alteração
+        nos produtos (ver core/respostas.py).
         """
         produtos = self.get_queryset()
         
@@ -151,7 +166,7 @@ class ProdutoViewSet(viewsets.ModelViewSet):
             
             while Produto.objects.filter(
                 usuario=request.user, 
-                nome=nome_novo
+                nome__iexact=nome_novo
             ).exists():
                 contador += 1
                 nome_novo = f"{nome_base} ({contador})"
@@ -200,67 +215,61 @@ class ProdutoViewSet(viewsets.ModelViewSet):
                 'error': f'Erro ao duplicar produto: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
 
+    def _criterio_rateio(self):
+        """Critério de rateio das despesas fixas informado em ?criterio="""
+        criterio = self.request.query_params.get('criterio') or criterio_padrao()
+        if criterio not in CRITERIOS:
+            raise serializers.ValidationError({
+                'criterio': [f'Critério inválido. Use um de: {", ".join(CRITERIOS)}.']
+            })
+        return criterio
+
+    def _inicio_rateio(self):
+        """Data inicial da janela de custos informada em ?inicio=AAAA-MM-DD (padrão: hoje)"""
+        valor = self.request.query_params.get('inicio')
+        if not valor:
+            return None
+        try:
+            inicio = parse_date(valor)
+        except ValueError:
+            inicio = None
+        if inicio is None:
+            raise serializers.ValidationError({
+                'inicio': ['Data inválida. Use o formato AAAA-MM-DD.']
+            })
+        return inicio
+
     @action(detail=True, methods=['get'])
+    @resposta_versionada(
+        PRODUTOS, INGREDIENTES, DESPESAS_VARIAVEIS, RATEIO, variacao=lambda request: timezone.localdate()
+    )
     def calcular(self, request, pk=None):
         """
         Endpoint para calcular custos e análise financeira do produto.
-        GET /api/produtos/{id}/calcular/
+        GET /api/produtos/{id}/calcular/?criterio=volume|tempo_preparo|igual&inicio=AAAA-MM-DD
+
+        As despesas fixas são rateadas entre os produtos que as utilizam
+        (ver produtos/rateio.py), com o custo de cada uma nos dias do período
+        de análise a partir de `inicio`. A resposta traz uma ETag e fica em
+        cache até a próxima alteração nos dados usados no cálculo (ou até o
+        dia seguinte, que muda a janela padrão).
         """
         produto = self.get_object()
-        
-        # Calcular custo dos ingredientes
-        custo_ingredientes = Decimal('0.00')
-        for produto_ingrediente in produto.produto_ingredientes.all():
-            custo_ingredientes += produto_ingrediente.custo_total
-
-        # Calcular custo das despesas fixas (rateado pelo período de análise)
-        custo_despesas_fixas = Decimal('0.00')
-        for produto_despesa_fixa in produto.produto_despesas_fixas.all():
-            # Ratear despesa fixa pelo período de análise
-            custo_diario = produto_despesa_fixa.despesa_fixa.valor / 30  # Assumindo mês de 30 dias
-            custo_despesas_fixas += custo_diario * produto.periodo_analise
-
-        # Calcular custo das despesas variáveis
-        custo_despesas_variaveis = Decimal('0.00')
-        for produto_despesa_variavel in produto.produto_despesas_variaveis.all():
-            custo_despesas_variaveis += produto_despesa_variavel.custo_total
-
-        # Custo total de produção
-        custo_total_producao = custo_ingredientes + custo_despesas_fixas + custo_despesas_variaveis
-
-        # Preço de venda com margem de lucro
-        margem_decimal = produto.margem_lucro / 100
-        preco_venda_sugerido = custo_total_producao * (1 + margem_decimal)
-
-        # Estimativas para o período de análise (assumindo 1 produto por dia)
-        quantidade_estimada = produto.periodo_analise
-        faturamento_previsto = preco_venda_sugerido * quantidade_estimada
-        custo_total_periodo = custo_total_producao * quantidade_estimada
-        lucro_previsto = faturamento_previsto - custo_total_periodo
+        custo = calcular_custo(produto, self._criterio_rateio(), self._inicio_rateio())
+
+        ingredientes = produto.produto_ingredientes.select_related('ingrediente')
+        despesas_variaveis = produto.produto_despesas_variaveis.select_related('despesa_variavel')
 
         analise = {
             'produto_id': produto.id,
             'produto_nome': produto.nome,
             'periodo_analise': produto.periodo_analise,
+            'producao_diaria': produto.producao_diaria,
             'margem_lucro': produto.margem_lucro,
-            'custos': {
-                'ingredientes': float(custo_ingredientes),
-                'despesas_fixas': float(custo_despesas_fixas),
-                'despesas_variaveis': float(custo_despesas_variaveis),
-                'total_producao': float(custo_total_producao)
-            },
-            'precificacao': {
-                'preco_venda_sugerido': float(preco_venda_sugerido),
-                'margem_lucro_percentual': float(produto.margem_lucro),
-                'margem_lucro_valor': float(preco_venda_sugerido - custo_total_producao)
-            },
-            'projecoes_periodo': {
-                'quantidade_estimada': quantidade_estimada,
-                'faturamento_previsto': float(faturamento_previsto),
-                'custo_total_periodo': float(custo_total_periodo),
-                'lucro_previsto': float(lucro_previsto),
-                'roi_percentual': float((lucro_previsto / custo_total_periodo) * 100) if custo_total_periodo > 0 else 0
-            },
+            'custos': custo.custos(),
+            'precificacao': custo.precificacao(),
+            'projecoes_periodo': custo.projecoes_periodo(),
+            'rateio': custo.rateio(),
             'detalhamento_ingredientes': [
                 {
                     'nome': pi.ingrediente.nome,
@@ -269,15 +278,18 @@ class ProdutoViewSet(viewsets.ModelViewSet):
                     'preco_unitario': float(pi.ingrediente.preco_por_unidade),
                     'custo_total': float(pi.custo_total)
                 }
-                for pi in produto.produto_ingredientes.all()
+                for pi in ingredientes
             ],
             'detalhamento_despesas_fixas': [
                 {
-                    'nome': pdf.despesa_fixa.nome,
-                    'valor_mensal': float(pdf.despesa_fixa.valor),
-                    'valor_rateado': float(pdf.despesa_fixa.valor / 30 * produto.periodo_analise)
+                    'nome': parcela.nome,
+                    'valor': float(parcela.valor_despesa),
+                    'recorrencia': parcela.recorrencia,
+                    'custo_periodo': float(parcela.custo_periodo),
+                    'percentual_rateio': float(parcela.fracao * 100),
+                    'valor_rateado': float(parcela.valor)
                 }
-                for pdf in produto.produto_despesas_fixas.all()
+                for parcela in custo.tabela.parcelas(produto.pk)
             ],
             'detalhamento_despesas_variaveis': [
                 {
@@ -287,12 +299,46 @@ class ProdutoViewSet(viewsets.ModelViewSet):
                     'valor_unitario': float(pdv.despesa_variavel.valor_por_unidade),
                     'custo_total': float(pdv.custo_total)
                 }
-                for pdv in produto.produto_despesas_variaveis.all()
+                for pdv in despesas_variaveis
             ]
         }
 
         return Response(analise)
 
+    @action(detail=False, methods=['get'])
+    def custos(self, request):
+        """
+        Endpoint para calcular os custos de todos os produtos do usuário.
+        GET /api/produtos/custos/?criterio=volume|tempo_preparo|igual&inicio=AAAA-MM-DD
+
+        Aceita os mesmos filtros e a mesma paginação da listagem.
+        """
+        criterio = self._criterio_rateio()
+        inicio = self._inicio_rateio()
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        produtos = page if page is not None else list(queryset)
+        custos = calcular_custos(produtos, criterio, inicio)
+        dados = [custos[produto.pk].resumo() for produto in produtos]
+
+        if page is not None:
+            return self.get_paginated_response(dados)
+        return Response(dados)
+
+    @action(detail=True, methods=['post'])
+    def registrar_analise(self, request, pk=None):
+        """
+        Endpoint para registrar uma análise financeira com os custos atuais do produto.
+        POST /api/produtos/{id}/registrar_analise/?criterio=volume|tempo_preparo|igual&inicio=AAAA-MM-DD
+        """
+        produto = self.get_object()
+        custo = calcular_custo(produto, self._criterio_rateio(), self._inicio_rateio())
+        analise = AnaliseFinanceira.objects.create(produto=produto, **custo.valores_analise())
+
+        serializer = AnaliseFinanceiraDetalhadaSerializer(analise)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
 class ProdutoIngredienteViewSet(viewsets.ModelViewSet):
     """
@@ -303,6 +349,8 @@ class ProdutoIngredienteViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Retorna apenas os relacionamentos dos produtos do usuário autenticado."""
+        if getattr(self, 'swagger_fake_view', False):
+            return ProdutoIngrediente.objects.none()
         return ProdutoIngrediente.objects.filter(produto__usuario=self.request.user)
 
 
@@ -315,6 +363,8 @@ class ProdutoDespesaFixaViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Retorna apenas os relacionamentos dos produtos do usuário autenticado."""
+        if getattr(self, 'swagger_fake_view', False):
+            return ProdutoDespesaFixa.objects.none()
         return ProdutoDespesaFixa.objects.filter(produto__usuario=self.request.user)
 
 
@@ -327,4 +377,6 @@ class ProdutoDespesaVariavelViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Retorna apenas os relacionamentos dos produtos do usuário autenticado."""
+        if getattr(self, 'swagger_fake_view', False):
+            return ProdutoDespesaVariavel.objects.none()
         return ProdutoDespesaVariavel.objects.filter(produto__usuario=self.request.user)
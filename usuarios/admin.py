@@ -1,5 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+
+from core.cache import invalidar
+from .autenticacao import RECURSO_CACHE
 from .models import Usuario
 
 
@@ -79,7 +82,10 @@ class UsuarioAdmin(UserAdmin):
     
     def ativar_usuarios(self, request, queryset):
         """Ativa os usuários selecionados"""
+        ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=True)
+        # update() não dispara post_save: descarta os usuários em cache da autenticação JWT
+        invalidar(RECURSO_CACHE, *ids)
         self.message_user(
             request, 
             f'{updated} usuário(s) foram ativados com sucesso.'
@@ -88,7 +94,10 @@ class UsuarioAdmin(UserAdmin):
     
     def desativar_usuarios(self, request, queryset):
         """Desativa os usuários selecionados"""
+        ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=False)
+        # update() não dispara post_save: descarta os usuários em cache da autenticação JWT
+        invalidar(RECURSO_CACHE, *ids)
         self.message_user(
             request, 
             f'{updated} usuário(s) foram desativados com sucesso.'
@@ -8,7 +8,8 @@ class UsuariosConfig(AppConfig):
     
     def ready(self):
         """
-        Método chamado quando o app está pronto.
-        Aqui você pode importar signals ou fazer outras configurações.
+        Registra os signals que invalidam o cache de usuários autenticados
+        e a gravação dos últimos logins pendentes (fim de requisição e
+        encerramento do processo), e as métricas dos caches de autenticação.
         """
-        pass
+        from . import revogacao, signals, ultimo_login  # noqa: F401
@@ -0,0 +1,113 @@
+"""
+Autenticação JWT com cache do usuário.
+
+A JWTAuthentication do Simple JWT busca o Usuario pelo user_id do token em
+toda requisição. Aqui o usuário resolvido fica no cache (ver core/cache.py)
+por JWT_USUARIO_CACHE_TIMEOUT segundos, e qualquer gravação ou exclusão do
+usuário (alteração de dados, senha ou desativação) invalida a entrada (ver
+signals.py). Alterações em lote com update(), que não disparam post_save,
+devem chamar invalidar(RECURSO_CACHE, *ids), como as ações de ativar e
+desativar do admin. O tamanho do cache é limitado pela configuração de CACHES.
+
+Os contadores de acertos e falhas são do processo e podem ser consultados
+com estatisticas().
+"""
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.cache import obter_ou_calcular
+from core.metricas import registrar_coletor
+
+
+RECURSO_CACHE = 'usuario_autenticado'
+
+_trava = threading.Lock()
+_contadores = {'consultas': 0, 'falhas': 0}
+
+
+def _contar(*nomes):
+    with _trava:
+        for nome in nomes:
+            _contadores[nome] += 1
+
+
+def estatisticas():
+    """Consultas ao cache de usuários neste processo e a taxa de acerto"""
+    with _trava:
+        consultas, falhas = _contadores['consultas'], _contadores['falhas']
+    acertos = consultas - falhas
+    return {
+        'consultas': consultas,
+        'acertos': acertos,
+        'falhas': falhas,
+        'taxa_acerto': acertos / consultas if consultas else 0.0,
+    }
+
+
+def _metricas():
+    dados = estatisticas()
+    return [
+        ('cache_usuarios_consultas_total', 'counter',
+         'Usuários de tokens JWT buscados no cache.', dados['consultas']),
+        ('cache_usuarios_falhas_total', 'counter',
+         'Usuários de tokens JWT que não estavam no cache.', dados['falhas']),
+    ]
+
+
+registrar_coletor('usuarios_autenticados', _metricas)
+
+
+def zerar_estatisticas():
+    with _trava:
+        for nome in _contadores:
+            _contadores[nome] = 0
+
+
+def obter_usuario(usuario_id):
+    """Usuário pelo id, do cache ou do banco; None se não existir"""
+    UserModel = get_user_model()
+
+    def buscar():
+        _contar('falhas')
+        return UserModel._default_manager.filter(
+            **{api_settings.USER_ID_FIELD: usuario_id}
+        ).first()
+
+    _contar('consultas')
+    return obter_ou_calcular(
+        RECURSO_CACHE, usuario_id, buscar, timeout=settings.JWT_USUARIO_CACHE_TIMEOUT
+    )
+
+
+class JWTAuthenticationComCache(JWTAuthentication):
+    """JWTAuthentication que resolve o usuário do token pelo cache"""
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = obter_usuario(usuario_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
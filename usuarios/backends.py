@@ -0,0 +1,59 @@
+"""
+Backend de autenticação por username ou email.
+
+O usuário é localizado em uma única consulta, atendida pelos índices de
+username e de Lower(email), e a senha é verificada no máximo uma vez. Para
+usuários inexistentes (ou email ambíguo) o hasher é executado mesmo assim,
+com uma senha descartável, para que o tempo de resposta não revele se a
+conta existe.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+
+UserModel = get_user_model()
+
+
+def buscar_por_username_ou_email(identificador):
+    """
+    Usuário cujo username é `identificador` ou, na falta dele, cujo email é
+    `identificador` (sem diferenciar maiúsculas de minúsculas). Retorna None
+    se não houver usuário ou se o email pertencer a mais de um.
+    """
+    candidatos = list(
+        UserModel._default_manager
+        .alias(email_normalizado=Lower('email'))
+        .filter(Q(username=identificador) | Q(email_normalizado=identificador.lower()))
+        .annotate(prioridade=Case(
+            When(username=identificador, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .order_by('prioridade', 'pk')[:2]
+    )
+    if not candidatos:
+        return None
+    if candidatos[0].username == identificador or len(candidatos) == 1:
+        return candidatos[0]
+    return None
+
+
+class UsernameOuEmailBackend(ModelBackend):
+    """ModelBackend que aceita username ou email no campo de login"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        usuario = buscar_por_username_ou_email(username)
+        if usuario is None:
+            # Custo equivalente ao de uma verificação de senha real
+            UserModel().set_password(password)
+            return None
+        if usuario.check_password(password) and self.user_can_authenticate(usuario):
+            return usuario
+        return None
@@ -0,0 +1,90 @@
+import time
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+SENHA = 'Benchmark#2026'
+
+
+class Rollback(Exception):
+    """Desfaz o usuário temporário criado para o benchmark"""
+
+
+def login_legado(username, password):
+    """Fluxo anterior do login: username e, se falhar, email + nova autenticação"""
+    backend = ModelBackend()
+    usuario = backend.authenticate(None, username=username, password=password)
+    if usuario is None:
+        try:
+            usuario_obj = User.objects.get(email=username)
+            usuario = backend.authenticate(None, username=usuario_obj.username, password=password)
+        except User.DoesNotExist:
+            pass
+    return usuario
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vazão do login (logins por segundo) por username, por email, '
+        'com senha errada e com usuário inexistente, comparando com o fluxo anterior'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tentativas', type=int, default=20,
+            help='Logins por cenário (o custo é dominado pelo hasher de senhas)'
+        )
+        parser.add_argument(
+            '--sem-legado', action='store_true',
+            help='Não mede o fluxo anterior (username e depois email)'
+        )
+
+    def handle(self, *args, **options):
+        tentativas = options['tentativas']
+        if tentativas < 1:
+            raise CommandError('--tentativas deve ser maior que zero.')
+
+        fluxos = [('atual', lambda u, p: authenticate(None, username=u, password=p))]
+        if not options['sem_legado']:
+            fluxos.append(('legado', login_legado))
+
+        try:
+            with transaction.atomic():
+                User.objects.create_user(
+                    username='benchmark_login', email='benchmark_login@exemplo.com',
+                    password=SENHA, nome_comercial='Benchmark'
+                )
+                cenarios = [
+                    ('username', 'benchmark_login', SENHA, True),
+                    ('email', 'benchmark_login@exemplo.com', SENHA, True),
+                    ('email, senha errada', 'benchmark_login@exemplo.com', 'errada', False),
+                    ('usuário inexistente', 'ninguem@exemplo.com', 'errada', False),
+                ]
+                self.stdout.write(
+                    f'{"fluxo":<8} {"cenário":<22} {"logins/s":>10} {"ms/login":>10} {"consultas":>10}'
+                )
+                for fluxo, autenticar in fluxos:
+                    for nome, username, senha, esperado in cenarios:
+                        self._medir(fluxo, nome, autenticar, username, senha, esperado, tentativas)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _medir(self, fluxo, nome, autenticar, username, senha, esperado, tentativas):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            for _ in range(tentativas):
+                usuario = autenticar(username, senha)
+                if (usuario is not None) != esperado:
+                    raise CommandError(f'Resultado inesperado no cenário "{nome}" ({fluxo}).')
+            duracao = time.perf_counter() - inicio
+
+        self.stdout.write(
+            f'{fluxo:<8} {nome:<22} {tentativas / duracao:>10.1f} '
+            f'{duracao / tentativas * 1000:>10.1f} {len(consultas) / tentativas:>10.1f}'
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from usuarios.revogacao import purgar_expirados
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove, em lotes, os tokens JWT emitidos e revogados que já expiraram. '
+        'Deve ser executado periodicamente (ex.: cron a cada hora)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanho-lote', type=int, default=1000,
+            help='Tokens removidos por transação'
+        )
+
+    def handle(self, *args, **options):
+        if options['tamanho_lote'] < 1:
+            raise CommandError('--tamanho-lote deve ser maior que zero.')
+
+        removidos = purgar_expirados(options['tamanho_lote'])
+        self.stdout.write(self.style.SUCCESS(f'{removidos} token(s) expirado(s) removido(s).'))
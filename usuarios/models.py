@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Usuario(AbstractUser):
@@ -46,6 +47,10 @@ class Usuario(AbstractUser):
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
         ordering = ['-created_at']
+        indexes = [
+            # Login por email (ver backends.py), sem diferenciar caixa
+            models.Index(Lower('email'), name='usuario_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username} - {self.nome_comercial}"
@@ -0,0 +1,160 @@
+"""
+Tokens JWT revogados (logout e rotação de refresh tokens).
+
+A lista de revogados é a do app token_blacklist do Simple JWT, mas a
+verificação de cada refresh token passa antes por um filtro de Bloom em
+memória (ver core/bloom.py) com os jti revogados ainda não expirados. Se o
+jti não está no filtro, o token não foi revogado e o banco não é consultado;
+só os positivos (revogados de fato ou falsos positivos, ~0,1%) consultam a
+tabela.
+
+Para que o filtro de cada processo enxergue as revogações feitas pelos
+outros, cada revogação incrementa uma versão no cache (ver core/cache.py) e
+o processo que encontra uma versão nova carrega só as revogações mais
+recentes, por id. A purga dos expirados (comando purgar_tokens_expirados)
+incrementa outra versão, que faz os processos reconstruírem o filtro.
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from core.bloom import FiltroBloom
+from core.cache import invalidar, obter_versao
+from core.metricas import registrar_coletor
+
+
+RECURSO_CACHE = 'tokens_revogados'
+
+# Ids recarregados antes do último já visto, para não perder revogações
+# cujo commit terminou fora da ordem dos ids
+MARGEM_IDS = 100
+
+
+class RegistroRevogacoes:
+    """Verificação de revogação com o filtro de Bloom do processo"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._filtro = None
+        self._ultimo_id = 0
+        self._versao = None
+        self._base = None
+        self._contadores = {'verificacoes': 0, 'dispensadas': 0, 'falsos_positivos': 0}
+
+    def _sincronizar(self):
+        # As versões são lidas antes das consultas: uma revogação feita
+        # durante a carga muda a versão e é carregada na próxima verificação
+        versao = obter_versao(RECURSO_CACHE, 'novos')
+        base = obter_versao(RECURSO_CACHE, 'base')
+        with self._trava:
+            if self._filtro is None or self._filtro.cheio or base != self._base:
+                self._reconstruir()
+            elif versao != self._versao:
+                self._carregar(self._filtro, self._ultimo_id - MARGEM_IDS)
+            self._versao, self._base = versao, base
+
+    def _reconstruir(self):
+        vigentes = BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow())
+        capacidade = max(settings.TOKENS_REVOGADOS_CAPACIDADE, 2 * vigentes.count())
+        self._filtro = FiltroBloom(capacidade)
+        self._ultimo_id = 0
+        self._carregar(self._filtro, 0, vigentes)
+
+    def _carregar(self, filtro, desde_id, revogados=None):
+        revogados = revogados if revogados is not None else BlacklistedToken.objects.all()
+        for revogado_id, jti in revogados.filter(pk__gt=desde_id).values_list('pk', 'token__jti'):
+            filtro.adicionar(jti)
+            self._ultimo_id = max(self._ultimo_id, revogado_id)
+
+    def revogado(self, jti):
+        """Indica se o token com o jti informado foi revogado"""
+        self._sincronizar()
+        with self._trava:
+            self._contadores['verificacoes'] += 1
+            if jti not in self._filtro:
+                self._contadores['dispensadas'] += 1
+                return False
+
+        existe = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if not existe:
+            with self._trava:
+                self._contadores['falsos_positivos'] += 1
+        return existe
+
+    def registrar(self, jti):
+        """Inclui no filtro um token recém-revogado e avisa os outros processos"""
+        with self._trava:
+            if self._filtro is not None:
+                self._filtro.adicionar(jti)
+        invalidar(RECURSO_CACHE, 'novos')
+
+    def estatisticas(self):
+        """Verificações deste processo e quantas dispensaram o banco"""
+        with self._trava:
+            dados = dict(self._contadores)
+            dados['no_filtro'] = len(self._filtro) if self._filtro is not None else 0
+        dados['taxa_dispensa'] = (
+            dados['dispensadas'] / dados['verificacoes'] if dados['verificacoes'] else 0.0
+        )
+        return dados
+
+
+registro = RegistroRevogacoes()
+
+
+def _metricas():
+    dados = registro.estatisticas()
+    return [
+        ('tokens_revogados_verificacoes_total', 'counter',
+         'Refresh tokens verificados na lista de revogados.', dados['verificacoes']),
+        ('tokens_revogados_dispensadas_total', 'counter',
+         'Verificações resolvidas pelo filtro em memória, sem consultar o banco.', dados['dispensadas']),
+        ('tokens_revogados_falsos_positivos_total', 'counter',
+         'Falsos positivos do filtro em memória.', dados['falsos_positivos']),
+    ]
+
+
+registrar_coletor('tokens_revogados', _metricas)
+
+
+def purgar_expirados(tamanho_lote=1000):
+    """
+    Remove, em lotes de `tamanho_lote`, os tokens emitidos (e as revogações
+    deles) que já expiraram. Retorna quantos tokens foram removidos.
+    """
+    agora = aware_utcnow()
+    total = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=agora)
+            .order_by('pk').values_list('pk', flat=True)[:tamanho_lote]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+        total += len(ids)
+    if total:
+        invalidar(RECURSO_CACHE, 'base')
+    return total
+
+
+class RefreshTokenRevogavel(RefreshToken):
+    """RefreshToken cuja verificação de revogação usa o filtro em memória"""
+
+    def check_blacklist(self):
+        if registro.revogado(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        resultado = super().blacklist()
+        registro.registrar(self.payload[api_settings.JTI_CLAIM])
+        return resultado
@@ -1,7 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Lower
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
 from .models import Usuario
+from .revogacao import RefreshTokenRevogavel, registro
+from .ultimo_login import registrar_login
 import re
 
 
@@ -29,15 +39,18 @@ class UsuarioSerializer(serializers.ModelSerializer):
         }
 
     def validate_email(self, value):
-        """Valida se o email é único"""
+        """
+        Valida se o email é único, sem diferenciar maiúsculas de minúsculas
+        (o login por email também não diferencia)
+        """
+        usuarios = Usuario.objects.alias(email_normalizado=Lower('email')).filter(
+            email_normalizado=value.lower()
+        )
         if self.instance:
             # Se estamos atualizando, excluir o usuário atual da verificação
-            if Usuario.objects.exclude(pk=self.instance.pk).filter(email=value).exists():
-                raise serializers.ValidationError("Este email já está em uso.")
-        else:
-            # Se estamos criando, verificar se já existe
-            if Usuario.objects.filter(email=value).exists():
-                raise serializers.ValidationError("Este email já está em uso.")
+            usuarios = usuarios.exclude(pk=self.instance.pk)
+        if usuarios.exists():
+            raise serializers.ValidationError("Este email já está em uso.")
         return value
 
     def validate_cnpj(self, value):
@@ -174,3 +187,32 @@ class UsuarioListSerializer(serializers.ModelSerializer):
             'id', 'username', 'email', 'nome_completo', 
             'nome_comercial', 'is_active', 'created_at'
         ]
+
+
+class TokenObtainPairUltimoLoginSerializer(TokenObtainPairSerializer):
+    """
+    Emissão de tokens (/api/auth/token/) com o last_login registrado
+    conforme ULTIMO_LOGIN_MODO.
+    """
+    token_class = RefreshTokenRevogavel
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        registrar_login(self.user)
+        return data
+
+
+class TokenRefreshRevogavelSerializer(TokenRefreshSerializer):
+    """Renovação de tokens com a verificação de revogação em memória"""
+    token_class = RefreshTokenRevogavel
+
+
+class TokenVerifyRevogavelSerializer(TokenVerifySerializer):
+    """Verificação de tokens com a verificação de revogação em memória"""
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        jti = token.get(api_settings.JTI_CLAIM)
+        if registro.revogado(jti):
+            raise serializers.ValidationError("Token is blacklisted")
+        return {}
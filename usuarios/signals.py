@@ -0,0 +1,14 @@
+"""
+Invalidação do cache de usuários autenticados (ver autenticacao.py).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidar
+from .autenticacao import RECURSO_CACHE
+from .models import Usuario
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_usuario_autenticado(sender, instance, **kwargs):
+    invalidar(RECURSO_CACHE, instance.pk)
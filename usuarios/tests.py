@@ -1,9 +1,22 @@
-from django.test import TestCase
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
+from datetime import timedelta
+from io import StringIO
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from core.bloom import FiltroBloom
+from core.cache import invalidar
+from .autenticacao import estatisticas, zerar_estatisticas
+from .revogacao import RECURSO_CACHE as RECURSO_REVOGADOS, RefreshTokenRevogavel, registro
+from .ultimo_login import descarregar, pendentes
 
 Usuario = get_user_model()
 
@@ -69,6 +82,10 @@ class UsuarioAPITest(APITestCase):
         self.login_url = reverse('usuario-login')
         self.usuarios_url = reverse('usuario-list')
 
+    def tearDown(self):
+        # Grava os logins pendentes enquanto o banco de teste existe
+        descarregar()
+
     def test_create_usuario_api(self):
         """Testa a criação de usuário via API"""
         response = self.client.post(
@@ -242,3 +259,330 @@ class UsuarioAPITest(APITestCase):
         usuario.refresh_from_db()
         self.assertEqual(usuario.nome_comercial, 'Nova Loja')
         self.assertEqual(usuario.telefone, '11999999999')
+
+
+class ContadorHasher(MD5PasswordHasher):
+    """Hasher rápido que conta quantas vezes uma senha foi processada"""
+    algorithm = 'contador'
+    execucoes = 0
+
+    def encode(self, password, salt):
+        ContadorHasher.execucoes += 1
+        return super().encode(password, salt)
+
+
+@override_settings(PASSWORD_HASHERS=['usuarios.tests.ContadorHasher'])
+class LoginUsernameOuEmailTest(APITestCase):
+    """Testes do backend de login por username ou email"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='testuser',
+            email='Test@Example.com',
+            password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        ContadorHasher.execucoes = 0
+
+    def autenticar(self, username, password):
+        ContadorHasher.execucoes = 0
+        with self.assertNumQueries(1):
+            usuario = authenticate(username=username, password=password)
+        self.assertEqual(ContadorHasher.execucoes, 1)
+        return usuario
+
+    def test_login_por_username_e_email_em_uma_consulta(self):
+        """Teste se username e email são resolvidos em uma consulta e uma verificação de senha"""
+        self.assertEqual(self.autenticar('testuser', 'testpass123'), self.usuario)
+        self.assertEqual(self.autenticar('test@example.com', 'testpass123'), self.usuario)
+
+    def test_falhas_executam_o_hasher_uma_vez(self):
+        """Teste se senha errada e usuário inexistente custam o mesmo que um login válido"""
+        self.assertIsNone(self.autenticar('test@example.com', 'senhaerrada'))
+        self.assertIsNone(self.autenticar('ninguem@example.com', 'senhaerrada'))
+
+    def test_username_tem_prioridade_sobre_email(self):
+        """Teste se o username de um usuário vence o email igual de outro"""
+        outro = Usuario.objects.create_user(
+            username='test@example.com',
+            email='outro@example.com',
+            password='outrasenha123',
+            nome_comercial='Outra Loja'
+        )
+        self.assertEqual(self.autenticar('test@example.com', 'outrasenha123'), outro)
+        self.assertIsNone(self.autenticar('test@example.com', 'testpass123'))
+
+    def test_email_ambiguo_nao_autentica(self):
+        """Teste se um email compartilhado por dois usuários não autentica nenhum deles"""
+        Usuario.objects.create_user(
+            username='outro',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Outra Loja'
+        )
+        self.assertIsNone(self.autenticar('TEST@example.com', 'testpass123'))
+
+    def test_usuario_inativo_nao_autentica(self):
+        """Teste se usuários inativos não fazem login"""
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertIsNone(self.autenticar('testuser', 'testpass123'))
+
+    def test_email_duplicado_sem_diferenciar_caixa(self):
+        """Teste se o cadastro recusa um email que só difere na caixa"""
+        response = self.client.post(reverse('usuario-list'), {
+            'username': 'outro',
+            'email': 'TEST@example.COM',
+            'password': 'testpass123',
+            'confirm_password': 'testpass123',
+            'nome_comercial': 'Outra Loja'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+
+
+class JWTUsuarioCacheTest(APITestCase):
+    """Testes do cache de usuários autenticados por JWT"""
+
+    def setUp(self):
+        cache.clear()
+        zerar_estatisticas()
+        self.usuario = Usuario.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        refresh = RefreshToken.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.me_url = reverse('usuario-me')
+
+    def test_usuario_em_cache_dispensa_consulta(self):
+        """Teste se só a primeira requisição busca o usuário no banco"""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.me_url)
+
+        self.assertEqual(response.data['username'], 'testuser')
+        self.assertEqual(estatisticas()['acertos'], 1)
+        self.assertEqual(estatisticas()['falhas'], 1)
+        self.assertEqual(estatisticas()['taxa_acerto'], 0.5)
+
+    def test_alteracao_do_usuario_invalida_cache(self):
+        """Teste se alterações feitas pela API aparecem na requisição seguinte"""
+        self.client.get(self.me_url)
+        response = self.client.patch(
+            reverse('usuario-update-me'), {'nome_comercial': 'Nova Loja'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.me_url)
+        self.assertEqual(response.data['nome_comercial'], 'Nova Loja')
+
+    def test_usuario_desativado_perde_acesso(self):
+        """Teste se a desativação vale imediatamente, mesmo com o usuário em cache"""
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+
+        self.usuario.is_active = False
+        self.usuario.save()
+
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def _acao_do_admin(self, acao):
+        admin = Usuario.objects.get_or_create(
+            username='admin',
+            defaults={'email': 'admin@example.com', 'nome_comercial': 'Administração',
+                      'is_staff': True, 'is_superuser': True},
+        )[0]
+        # Cliente à parte: o logout do APIClient também descartaria o token
+        cliente = Client()
+        cliente.force_login(admin)
+        response = cliente.post('/admin/usuarios/usuario/', {
+            'action': acao, '_selected_action': [self.usuario.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_acoes_do_admin_invalidam_cache(self):
+        """Teste se ativar e desativar pelo admin (update em lote) valem imediatamente"""
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+
+        self._acao_do_admin('desativar_usuarios')
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # O usuário inativo também fica em cache até a reativação
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self._acao_do_admin('ativar_usuarios')
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+
+    def test_estatisticas_restritas_a_administradores(self):
+        """Teste se só administradores consultam as estatísticas do cache"""
+        url = reverse('usuario-cache-autenticacao')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.usuario.is_staff = True
+        self.usuario.save()
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('taxa_acerto', response.data)
+
+
+@override_settings(ULTIMO_LOGIN_MODO='agrupado', ULTIMO_LOGIN_INTERVALO=3600)
+class UltimoLoginTest(APITestCase):
+    """Testes da gravação do último login"""
+
+    def setUp(self):
+        descarregar()
+        self.usuario = Usuario.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        self.credenciais = {'username': 'testuser', 'password': 'testpass123'}
+
+    def tearDown(self):
+        descarregar()
+
+    def login(self, url=None):
+        response = self.client.post(url or reverse('usuario-login'), self.credenciais, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(ULTIMO_LOGIN_MODO='exato')
+    def test_modo_exato_grava_a_cada_login(self):
+        """Teste se o modo exato grava o last_login na hora"""
+        self.login()
+
+        self.usuario.refresh_from_db()
+        self.assertIsNotNone(self.usuario.last_login)
+        self.assertEqual(pendentes(), 0)
+
+    def test_modo_agrupado_grava_em_lote(self):
+        """Teste se os logins ficam pendentes e são gravados em um único UPDATE"""
+        outro = Usuario.objects.create_user(
+            username='outro', email='outro@example.com',
+            password='testpass123', nome_comercial='Outra Loja'
+        )
+        self.login()
+        self.login(reverse('token_obtain_pair'))
+        self.credenciais['username'] = 'outro'
+        self.login()
+
+        self.usuario.refresh_from_db()
+        self.assertIsNone(self.usuario.last_login)
+        self.assertEqual(pendentes(), 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(descarregar(), 2)
+
+        self.usuario.refresh_from_db()
+        outro.refresh_from_db()
+        self.assertIsNotNone(self.usuario.last_login)
+        self.assertIsNotNone(outro.last_login)
+        self.assertEqual(pendentes(), 0)
+
+    @override_settings(ULTIMO_LOGIN_INTERVALO=0)
+    def test_lote_vencido_e_gravado_no_login(self):
+        """Teste se o lote é gravado quando passa do intervalo configurado"""
+        self.login()
+
+        self.usuario.refresh_from_db()
+        self.assertIsNotNone(self.usuario.last_login)
+        self.assertEqual(pendentes(), 0)
+
+
+class FiltroBloomTest(TestCase):
+    """Testes do filtro de Bloom"""
+
+    def test_sem_falsos_negativos_e_poucos_falsos_positivos(self):
+        """Teste se todo valor incluído é encontrado e a taxa de falsos positivos é baixa"""
+        filtro = FiltroBloom(1000, 0.01)
+        for i in range(1000):
+            filtro.adicionar(f'incluido-{i}')
+
+        self.assertTrue(all(f'incluido-{i}' in filtro for i in range(1000)))
+        falsos_positivos = sum(f'ausente-{i}' in filtro for i in range(10000))
+        self.assertLess(falsos_positivos, 300)
+        self.assertGreater(len(filtro), 980)
+
+    def test_repetidos_nao_contam(self):
+        """Teste se incluir o mesmo valor de novo não consome capacidade"""
+        filtro = FiltroBloom(10)
+        filtro.adicionar('jti')
+        filtro.adicionar('jti')
+
+        self.assertEqual(len(filtro), 1)
+
+
+class RevogacaoTokensTest(APITestCase):
+    """Testes da revogação de refresh tokens (logout e rotação)"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            nome_comercial='Loja Teste'
+        )
+        self.refresh = RefreshTokenRevogavel.for_user(self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        self.refresh_url = reverse('token_refresh')
+
+    def renovar(self, refresh):
+        return self.client.post(self.refresh_url, {'refresh': str(refresh)}, format='json')
+
+    def test_logout_revoga_refresh_token(self):
+        """Teste se o refresh token deixa de ser aceito após o logout"""
+        response = self.client.post(
+            reverse('usuario-logout'), {'refresh': str(self.refresh)}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+
+        self.assertEqual(self.renovar(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotacao_revoga_token_anterior(self):
+        """Teste se a renovação devolve um novo refresh token e revoga o anterior"""
+        response = self.renovar(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], str(self.refresh))
+
+        self.assertEqual(self.renovar(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.renovar(response.data['refresh']).status_code, status.HTTP_200_OK)
+
+    def test_token_valido_nao_consulta_lista_de_revogados(self):
+        """Teste se a verificação de um token não revogado dispensa o banco"""
+        RefreshTokenRevogavel(str(RefreshTokenRevogavel.for_user(self.usuario)))
+
+        with self.assertNumQueries(0):
+            RefreshTokenRevogavel(str(self.refresh))
+        self.assertGreaterEqual(registro.estatisticas()['dispensadas'], 1)
+
+    def test_revogacao_de_outro_processo(self):
+        """Teste se revogações gravadas por outro processo são enxergadas pela versão no cache"""
+        RefreshTokenRevogavel(str(self.refresh))
+        outstanding = OutstandingToken.objects.get(jti=self.refresh['jti'])
+        BlacklistedToken.objects.create(token=outstanding)
+        invalidar(RECURSO_REVOGADOS, 'novos')
+
+        self.assertTrue(registro.revogado(self.refresh['jti']))
+        self.assertEqual(self.renovar(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_purga_remove_apenas_expirados(self):
+        """Teste se a purga remove em lotes os tokens expirados e suas revogações"""
+        expirado = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.usuario, jti=f'expirado-{i}', token='x', expires_at=expirado
+            )
+            BlacklistedToken.objects.create(token=token)
+
+        saida = StringIO()
+        call_command('purgar_tokens_expirados', '--tamanho-lote', '2', stdout=saida)
+
+        self.assertIn('5 token(s)', saida.getvalue())
+        self.assertFalse(OutstandingToken.objects.filter(jti__startswith='expirado-').exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+        self.assertTrue(OutstandingToken.objects.filter(jti=self.refresh['jti']).exists())
@@ -0,0 +1,127 @@
+"""
+Registro do último login (last_login) na emissão de tokens.
+
+No modo 'exato' cada login grava a linha do usuário na hora, como o
+update_last_login do Django. No modo 'agrupado' (padrão) os horários ficam
+em memória e são gravados juntos, em um único UPDATE, quando o lote passa
+de ULTIMO_LOGIN_INTERVALO segundos (verificado a cada login e ao fim de cada
+requisição) ou acumula ULTIMO_LOGIN_MAX_PENDENTES usuários, e também ao
+encerrar o processo. Isso evita uma escrita em usuarios_usuario por login
+nos picos de reautenticação (no SQLite cada escrita bloqueia o banco).
+
+O lote é do processo: em caso de queda abrupta, os logins ainda não
+gravados se perdem, o que é aceitável para um campo informativo.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import request_finished
+from django.utils import timezone
+
+from core.cache import invalidar
+from core.metricas import registrar_coletor
+from .autenticacao import RECURSO_CACHE
+
+
+logger = logging.getLogger(__name__)
+
+MODOS = ('exato', 'agrupado')
+
+_trava = threading.Lock()
+_pendentes = {}
+_inicio_lote = None
+
+
+def registrar_login(usuario):
+    """Registra o login do usuário conforme ULTIMO_LOGIN_MODO"""
+    if settings.ULTIMO_LOGIN_MODO not in MODOS:
+        raise ImproperlyConfigured(f'ULTIMO_LOGIN_MODO deve ser um de: {", ".join(MODOS)}.')
+    if settings.ULTIMO_LOGIN_MODO == 'exato':
+        update_last_login(None, usuario)
+        return
+
+    global _inicio_lote
+    usuario.last_login = timezone.now()
+    with _trava:
+        _pendentes[usuario.pk] = usuario.last_login
+        if _inicio_lote is None:
+            _inicio_lote = time.monotonic()
+    descarregar_se_vencido()
+
+
+def descarregar_se_vencido():
+    """Grava o lote se ele passou do intervalo ou do tamanho máximo"""
+    with _trava:
+        vencido = _inicio_lote is not None and (
+            time.monotonic() - _inicio_lote >= settings.ULTIMO_LOGIN_INTERVALO
+            or len(_pendentes) >= settings.ULTIMO_LOGIN_MAX_PENDENTES
+        )
+    if vencido:
+        descarregar()
+
+
+def pendentes():
+    """Quantidade de logins ainda não gravados neste processo"""
+    with _trava:
+        return len(_pendentes)
+
+
+def descarregar():
+    """Grava os logins pendentes em um único UPDATE; retorna quantos foram gravados"""
+    global _inicio_lote
+    with _trava:
+        lote = dict(_pendentes)
+        _pendentes.clear()
+        _inicio_lote = None
+    if not lote:
+        return 0
+
+    Usuario = get_user_model()
+    try:
+        Usuario.objects.bulk_update(
+            [Usuario(pk=usuario_id, last_login=horario) for usuario_id, horario in lote.items()],
+            ['last_login'],
+        )
+    except Exception:
+        # Devolve o lote, sem sobrescrever logins mais recentes
+        with _trava:
+            for usuario_id, horario in lote.items():
+                _pendentes.setdefault(usuario_id, horario)
+            if _inicio_lote is None:
+                _inicio_lote = time.monotonic()
+        raise
+    # bulk_update não dispara post_save
+    invalidar(RECURSO_CACHE, *lote)
+    return len(lote)
+
+
+def _descarregar_ao_fim_da_requisicao(**kwargs):
+    try:
+        descarregar_se_vencido()
+    except Exception:
+        # O lote foi devolvido; nova tentativa na próxima verificação
+        logger.exception('Falha ao gravar os últimos logins pendentes')
+
+
+def _descarregar_ao_encerrar():
+    try:
+        descarregar()
+    except Exception:
+        logger.exception('Últimos logins pendentes descartados no encerramento')
+
+
+def _metricas():
+    return [
+        ('ultimo_login_pendentes', 'gauge', 'Últimos logins aguardando gravação em lote.', pendentes()),
+    ]
+
+
+registrar_coletor('ultimo_login', _metricas)
+atexit.register(_descarregar_ao_encerrar)
+request_finished.connect(_descarregar_ao_fim_da_requisicao, dispatch_uid='ultimo_login_descarregar')
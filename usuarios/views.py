@@ -2,13 +2,14 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from core.schema import openapi, swagger_auto_schema
+from .autenticacao import estatisticas
 from .models import Usuario
+from .revogacao import RefreshTokenRevogavel
+from .ultimo_login import registrar_login
 from .filters import UsuarioFilter
 from .serializers import (
     UsuarioSerializer, 
@@ -94,6 +95,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         if self.action == 'create' or self.action == 'login':
             # Criação de conta e login são públicos
             permission_classes = [permissions.AllowAny]
+        elif self.action == 'cache_autenticacao':
+            permission_classes = [permissions.IsAdminUser]
         elif self.action in ['me', 'update_me']:
             # Ações do próprio usuário requerem autenticação
             permission_classes = [permissions.IsAuthenticated]
@@ -161,7 +164,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         usuario = serializer.save()
         
         # Gera tokens JWT para o usuário recém-criado
-        refresh = RefreshToken.for_user(usuario)
+        refresh = RefreshTokenRevogavel.for_user(usuario)
         
         return Response({
             'message': 'Usuário criado com sucesso!',
@@ -263,18 +266,13 @@ class UsuarioViewSet(viewsets.ModelViewSet):
                 'error': 'Username e password são obrigatórios.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Tenta autenticar com username ou email
-        user = authenticate(username=username, password=password)
-        if not user:
-            # Tenta com email se o username falhou
-            try:
-                usuario_obj = Usuario.objects.get(email=username)
-                user = authenticate(username=usuario_obj.username, password=password)
-            except Usuario.DoesNotExist:
-                pass
+        # Username ou email, em uma consulta e uma verificação de senha
+        # (ver usuarios/backends.py)
+        user = authenticate(request, username=username, password=password)
 
         if user and user.is_active:
-            refresh = RefreshToken.for_user(user)
+            registrar_login(user)
+            refresh = RefreshTokenRevogavel.for_user(user)
             return Response({
                 'message': 'Login realizado com sucesso!',
                 'usuario': UsuarioSerializer(user).data,
@@ -301,7 +299,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = RefreshTokenRevogavel(refresh_token)
                 token.blacklist()
             
             return Response({
@@ -351,3 +349,22 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             'message': 'Dados atualizados com sucesso!',
             'usuario': UsuarioSerializer(usuario).data
         })
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Estatísticas do cache de autenticação",
+        operation_description="""
+        Acertos e falhas do cache de usuários autenticados por JWT neste
+        processo (ver usuarios/autenticacao.py). Restrito a administradores.
+        """,
+        responses={
+            200: openapi.Response(description="Contadores e taxa de acerto"),
+            403: openapi.Response(description="Usuário não é administrador"),
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def cache_autenticacao(self, request):
+        """
+        GET /usuarios/cache_autenticacao/
+        """
+        return Response(estatisticas())